@@ -0,0 +1,108 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Local server speaking the Avatica JSON protocol, serving a generated edges table in benchmarks.
+It runs in its own process, so that it does not compete with the measured client for the GIL."""
+import json
+import multiprocessing
+import time
+from stub_server import StubHandler, StubServer
+
+COLUMNS = [
+    ("processkey", 12, "VARCHAR"),
+    ("source", 12, "VARCHAR"),
+    ("target", 12, "VARCHAR"),
+    ("duration", -5, "BIGINT"),
+    ("price", 8, "DOUBLE"),
+    ("enddate", 93, "TIMESTAMP"),
+]
+
+
+def generate_rows(total_rows):
+    """Returns the rows of the edges table, each serialized in JSON once so that serving a frame is cheap"""
+    return [json.dumps([f"case_{i // 10:09d}", f"Activity {i % 20}", f"Activity {(i + 1) % 20}", i % 3600, i * 0.5,
+                        1704103200000 + i * 1000]) for i in range(total_rows)]
+
+
+class AvaticaHandler(StubHandler):
+    """Answers the requests of the Avatica JSON protocol for any SQL request with the rows of the edges table"""
+    rows = []
+    open_latency = 0.0
+    open_connections = None
+
+    def _send_frame(self, payload, start, stop):
+        """Sends a response holding a frame of rows, splicing the serialized rows into the JSON payload"""
+        frame = {"offset": start, "done": stop >= len(self.rows), "rows": "ROWS"}
+        body = json.dumps(payload(frame)).replace('"ROWS"', "[" + ",".join(self.rows[start:stop]) + "]").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        self._drain_body()
+        request = json.loads(self.body)
+        kind = request["request"]
+        ids = {"connectionId": request.get("connectionId")}
+        if kind == "openConnection":
+            time.sleep(self.open_latency)
+            with self.open_connections.get_lock():
+                self.open_connections.value += 1
+            self._send_json({"response": kind, **ids})
+        elif kind == "closeConnection":
+            with self.open_connections.get_lock():
+                self.open_connections.value -= 1
+            self._send_json({"response": kind, **ids})
+        elif kind == "createStatement":
+            self._send_json({"response": "createStatement", **ids, "statementId": 1})
+        elif kind == "prepareAndExecute":
+            columns = [{"columnName": name, "label": name, "type": {"id": type_id, "name": type_name}}
+                       for name, type_id, type_name in COLUMNS]
+            self._send_frame(lambda frame: {"response": "executeResults", "missingStatement": False, "results": [{
+                "response": "resultSet", **ids, "statementId": request["statementId"], "ownStatement": True,
+                "signature": {"columns": columns, "sql": request["sql"]}, "updateCount": -1, "firstFrame": frame}]},
+                0, min(request.get("maxRowsInFirstFrame") or 100, len(self.rows)))
+        elif kind == "fetch":
+            offset = request["offset"]
+            self._send_frame(lambda frame: {"response": "fetch", "frame": frame},
+                             offset, min(offset + request.get("frameMaxSize", 100), len(self.rows)))
+        else:
+            self._send_json({"response": kind, **ids})
+
+    do_POST = _handle
+
+
+def _serve(total_rows, open_latency, open_connections, queue, stop):
+    handler = type("Handler", (AvaticaHandler,), {"rows": generate_rows(total_rows), "open_latency": open_latency,
+                                                  "open_connections": open_connections})
+    with StubServer(handler=handler) as server:
+        queue.put(server.url)
+        stop.wait()
+
+
+class AvaticaServer:
+    """Runs an AvaticaHandler based server in a child process
+
+    :param total_rows: the number of rows of the edges table
+    :param open_latency: the number of seconds the server takes to open a connection
+    """
+    def __init__(self, total_rows, open_latency=0.0):
+        self.queue = multiprocessing.Queue()
+        self.stop = multiprocessing.Event()
+        self.open_connections = multiprocessing.Value("i", 0)
+        self.process = multiprocessing.Process(target=_serve, args=(total_rows, open_latency, self.open_connections,
+                                                                    self.queue, self.stop), daemon=True)
+        self.url = None
+
+    @property
+    def jdbc_url(self):
+        return f"jdbc:avatica:remote:url={self.url}/druid/v2/sql/avatica/;serialization=json"
+
+    def __enter__(self):
+        self.process.start()
+        self.url = self.queue.get()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop.set()
+        self.process.join(5)
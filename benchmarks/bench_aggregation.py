@@ -0,0 +1,80 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares aggregating graph instances with Python loops, counting the edges in a Counter and keeping every duration
+in lists for their percentiles, with the GraphAggregator. A set of generated graph instances is streamed several
+times. The memory is the peak traced by tracemalloc during the aggregation.
+
+Usage: python benchmarks/bench_aggregation.py [number of graph instances, 100000 by default]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+import numpy as np
+from igrafx_mining_sdk.aggregation import aggregate_graph_instances
+from igrafx_mining_sdk.graph import GraphInstance
+
+ACTIVITIES = [f"Activity {i}" for i in range(30)]
+
+
+def graph_instance(rng):
+    """Returns the graph instance of a case of 10 to 30 events going through random activities"""
+    events = [rng.choice(ACTIVITIES) for _ in range(rng.randint(10, 30))]
+    time = 1700000000000
+    nodes, edges = [], []
+    for i, name in enumerate(events):
+        time += rng.randint(1000, 3600000)
+        nodes.append((name, {"id": name, "name": name, "eventInstance": i, "startTime": time}))
+    edges = list(zip(events, events[1:]))
+    return GraphInstance("project_id", nodes, edges, len(events) - len(set(events)), 0.0)
+
+
+def python_loops(graph_instances):
+    """Aggregates the graph instances with Python loops"""
+    nodes, edges, durations = Counter(), Counter(), defaultdict(list)
+    rework_total = 0
+    for gi in graph_instances:
+        times = dict(gi.nodes(data="startTime"))
+        nodes.update(list(gi))
+        for u, v in gi.edges:
+            edges[u, v] += 1
+            durations[u, v].append(times[v] - times[u])
+        rework_total += gi.rework_total
+    percentiles = {edge: np.percentile(values, [50, 90, 99]) for edge, values in durations.items()}
+    return nodes, edges, percentiles, rework_total
+
+
+def aggregator(graph_instances):
+    return aggregate_graph_instances(graph_instances, "project_id", time_attribute="startTime")
+
+
+def measure(aggregate, graph_instances, count):
+    """Aggregates count graph instances streamed from the list and returns the seconds and the peak traced bytes"""
+    def stream():
+        for i in range(count):
+            yield graph_instances[i % len(graph_instances)]
+    gc.collect()
+    start = time.perf_counter()
+    aggregate(stream())
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    aggregate(stream())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(count=100000):
+    rng = random.Random(0)
+    graph_instances = [graph_instance(rng) for _ in range(10000)]
+    for name, aggregate in [("Python loops", python_loops), ("GraphAggregator", aggregator)]:
+        for n in (count // 10, count):
+            elapsed, peak = measure(aggregate, graph_instances, n)
+            print(f"{name:>16}: {n:7d} graph instances in {elapsed:6.2f} s, peak {peak / 2**20:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
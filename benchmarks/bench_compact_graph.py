@@ -0,0 +1,59 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares the build time and the memory of GraphInstance, a networkx DiGraph, and CompactGraphInstance, stored in
+arrays, for graph instances of generated cases. The memory is measured with tracemalloc, which also traces the NumPy
+arrays.
+
+Usage: python benchmarks/bench_compact_graph.py [number of graph instances, 20000 by default]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from igrafx_mining_sdk.compact_graph import CompactGraphInstance
+from igrafx_mining_sdk.graph import GraphInstance
+
+ACTIVITIES = [f"Activity {i}" for i in range(30)]
+
+
+def payload(rng):
+    """Returns the JSON of the graph instance of a case of 10 to 30 events going through random activities"""
+    events = [rng.choice(ACTIVITIES) for _ in range(rng.randint(10, 30))]
+    vertices = [{"id": f"{abs(hash(name)):032x}", "name": name, "eventInstance": i} for i, name in enumerate(events)]
+    edges = [{"source": {"id": a["id"], "name": a["name"], "eventInstance": a["eventInstance"]},
+              "destination": {"id": b["id"], "name": b["name"], "eventInstance": b["eventInstance"]}}
+             for a, b in zip(vertices, vertices[1:])]
+    return {"vertexInstances": vertices, "edgeInstances": edges, "reworkTotal": len(events) - len(set(events)),
+            "concurrencyRate": 0.0}
+
+
+def measure(graph_class, payloads):
+    """Builds the graph instances of the payloads and returns the seconds, the traced bytes and the number of edges.
+    They are built twice, as tracemalloc slows down the allocations it traces."""
+    gc.collect()
+    start = time.perf_counter()
+    graphs = [graph_class.from_dict("project_id", p) for p in payloads]
+    elapsed = time.perf_counter() - start
+    del graphs
+    gc.collect()
+    tracemalloc.start()
+    graphs = [graph_class.from_dict("project_id", p) for p in payloads]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    edges = sum(graph.number_of_edges() for graph in graphs)
+    return elapsed, size, edges
+
+
+def main(count=20000):
+    rng = random.Random(0)
+    payloads = [payload(rng) for _ in range(count)]
+    for name, graph_class in [("GraphInstance", GraphInstance), ("CompactGraphInstance", CompactGraphInstance)]:
+        measure(graph_class, payloads[:100])  # Warms up the imports
+        elapsed, size, edges = measure(graph_class, payloads)
+        print(f"{name:>20}: {count / elapsed:8.0f} instances/s, {size / 2**20:7.1f} MB, "
+              f"{size / edges:6.0f} bytes per edge")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,53 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares datasources that each open their own SQL connection with datasources borrowing from the pool of the
+workgroup, as when the datasources of a project are accessed repeatedly, against a local Avatica server whose
+connections take some time to open.
+
+Usage: python benchmarks/bench_connection_pool.py [number of requests, 200 by default]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from avatica_server import AvaticaServer
+from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.datasource import Datasource
+
+OPEN_LATENCY = 0.02
+THREADS = 8
+
+
+def run(api_connector, requests, pooled, threads):
+    """Sends the requests with a new datasource each, and returns the elapsed seconds"""
+    def send(i):
+        ds = Datasource(["_vertex", "_edge", "cases"][i % 3], "edges", api_connector)
+        if not pooled:
+            ds._connection = api_connector.connect_sql()  # What each datasource used to do, without closing it
+        ds.request("SELECT * FROM edges LIMIT 10")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(send, range(requests)))
+    return time.perf_counter() - start
+
+
+def main(requests=200):
+    with AvaticaServer(10, open_latency=OPEN_LATENCY) as server:
+        with mock.patch.object(APIConnector, "_APIConnector__login", return_value={"access_token": "token"}):
+            api_connector = APIConnector("wg", "key", "http://localhost", "http://localhost", server.jdbc_url, True,
+                                         sql_transport="avatica", sql_pool_size=4)
+        for threads in [1, THREADS]:
+            for pooled in [False, True]:
+                elapsed = run(api_connector, requests, pooled, threads)
+                left_open = server.open_connections.value
+                api_connector.close()
+                print(f"{'pooled' if pooled else 'own connection':>14}, {threads} thread(s): "
+                      f"{requests / elapsed:7.1f} requests/s, {left_open:4d} connections left open on the server, "
+                      f"{server.open_connections.value:4d} after closing the workgroup")
+                with server.open_connections.get_lock():
+                    server.open_connections.value = 0
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,56 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares the memory of the Dataframes returned by Datasource.request with each dtype backend,
+and the best time of a groupby on their case IDs, with sqlite3 standing in for the JDBC driver.
+
+Usage: python benchmarks/bench_datasource_arrow.py [number of rows, 1000000 by default]
+"""
+import json
+import os
+import sys
+import sqlite3
+import time
+from unittest.mock import MagicMock
+from bench_datasource_chunks import QUERY, create_database
+from memory import peak_rss_mb, run_isolated
+from igrafx_mining_sdk.datasource import Datasource
+
+
+def child(backend, path):
+    """Reads the table once with the given dtype backend, groups it by case and prints the measures"""
+    ds = Datasource("edges", "edges", MagicMock())
+    ds._connection = sqlite3.connect(path)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    dtype_backend, _, dictionary = backend.partition("+")
+    df = ds.request(QUERY, dtype_backend=None if dtype_backend == "default" else dtype_backend,
+                    dictionary_encode=bool(dictionary))
+    loaded = time.perf_counter()
+    groupby_seconds = []
+    for _ in range(3):
+        grouped = time.perf_counter()
+        df.groupby("processkey", observed=True).agg(duration=("duration", "sum"), price=("price", "mean"),
+                                                    edges=("target", "count"))
+        groupby_seconds.append(time.perf_counter() - grouped)
+    print(json.dumps({"peak_rss_mb": peak_rss_mb(), "baseline_mb": baseline,
+                      "frame_mb": df.memory_usage(deep=True).sum() / (1 << 20),
+                      "load_seconds": loaded - start, "groupby_seconds": min(groupby_seconds)}))
+
+
+def main(rows=1000000):
+    path = create_database(rows)
+    try:
+        for backend in ["default", "numpy_nullable", "pyarrow", "pyarrow+dictionary"]:
+            result = run_isolated(__file__, "--child", backend, path)
+            print(f"{backend:>18}: Dataframe {result['frame_mb']:7.1f} MB, "
+                  f"peak RSS {result['peak_rss_mb'] - result['baseline_mb']:7.1f} MB above the baseline, "
+                  f"load {result['load_seconds']:5.2f} s, groupby {result['groupby_seconds']:5.3f} s")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:4])
+    else:
+        main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,65 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares the peak RSS and the throughput of Datasource.request and Datasource.iter_request,
+with sqlite3 standing in for the JDBC driver as a local DB-API connection.
+
+Usage: python benchmarks/bench_datasource_chunks.py [number of rows, 2000000 by default]
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock
+from memory import peak_rss_mb, run_isolated
+from igrafx_mining_sdk.datasource import Datasource
+
+QUERY = "SELECT * FROM edges"
+
+
+def create_database(rows):
+    """Creates a sqlite database holding an edges table of the given number of rows and returns its path"""
+    path = tempfile.mktemp(suffix=".db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE edges (processkey TEXT, source TEXT, target TEXT, duration INTEGER, "
+                       "price REAL, enddate TEXT)")
+    connection.executemany("INSERT INTO edges VALUES (?, ?, ?, ?, ?, ?)",
+                           ((f"case_{i // 10:09d}", f"Activity {i % 20}", f"Activity {(i + 1) % 20}", i % 3600,
+                             i * 0.5, "2024-01-01 10:00:00") for i in range(rows)))
+    connection.commit()
+    connection.close()
+    return path
+
+
+def child(mode, path):
+    """Reads the table once in the given mode and prints the measures"""
+    ds = Datasource("edges", "edges", MagicMock())
+    ds._connection = sqlite3.connect(path)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "request":
+        rows = len(ds.request(QUERY))
+    else:
+        rows = sum(len(chunk) for chunk in ds.iter_request(QUERY, chunk_size=int(mode.split("=")[1])))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"peak_rss_mb": peak_rss_mb(), "baseline_mb": baseline, "rows": rows, "seconds": elapsed}))
+
+
+def main(rows=2000000):
+    path = create_database(rows)
+    try:
+        for mode in ["request", "chunk=10000", "chunk=100000"]:
+            result = run_isolated(__file__, "--child", mode, path)
+            print(f"{mode:>13}: peak RSS {result['peak_rss_mb']:7.1f} MB "
+                  f"(before the request {result['baseline_mb']:.1f} MB), "
+                  f"{result['rows'] / result['seconds']:10.0f} rows/s")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:4])
+    else:
+        main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,90 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Measures a nightly job reading the graph instances of a project, first with an empty GraphCache, then in a new
+process with the cache filled by the first one, and checks that processes sharing a cache beyond its size limit read
+no partial entry.
+
+Usage: python benchmarks/bench_graph_cache.py [number of graph instances, 500 by default]
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock
+from igrafx_mining_sdk.data_version import DataVersionWatcher
+from igrafx_mining_sdk.graph_cache import GraphCache
+from igrafx_mining_sdk.project import Project
+
+LATENCY = 0.02
+GRAPH_INSTANCE = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "graphs",
+                              "graph_with_invalid_edges.json")
+
+
+def nightly_job(directory, keys):
+    """Reads the graph instances of the keys as a new process would and returns the time and number of requests"""
+    with open(GRAPH_INSTANCE) as f:
+        payload = json.load(f)
+    requests = []
+
+    def get_request(route, params=None):
+        requests.append(route)
+        if route.endswith("/graphInstance"):
+            time.sleep(LATENCY)
+            return MagicMock(status_code=200, json=MagicMock(return_value=payload))
+        return MagicMock(status_code=200, json=MagicMock(return_value={"files": [{"id": "a", "status": "DONE"}]}))
+
+    api_connector = MagicMock(get_request=get_request, graph_cache=GraphCache(directory),
+                              data_version_watcher=DataVersionWatcher(lambda: 1))
+    project = Project("project_id", api_connector)
+    start = time.perf_counter()
+    for key in keys:
+        project.graph_instance_from_key(key)
+    return time.perf_counter() - start, len(requests)
+
+
+def hammer(directory, worker, max_bytes, results):
+    """Writes and reads entries in a cache too small to hold them all, and counts the invalid reads"""
+    with open(GRAPH_INSTANCE) as f:
+        payload = json.load(f)
+    cache = GraphCache(directory, max_bytes=max_bytes)
+    invalid = 0
+    for i in range(300):
+        key = GraphCache.key("project_id", "graph_instance", "v1", process_key=str(i % 100))
+        cache.put(key, payload)
+        read = cache.get(GraphCache.key("project_id", "graph_instance", "v1", process_key=str((i * 7) % 100)))
+        invalid += read is not None and read != payload
+    results.put((worker, invalid, cache.evictions))
+
+
+def main(count=500):
+    directory = tempfile.mkdtemp()
+    try:
+        keys = [f"case_{i}" for i in range(count)]
+        for name in ["empty cache", "filled cache"]:
+            elapsed, requests = nightly_job(directory, keys)
+            print(f"{name:>12}: {count} graph instances in {elapsed:6.2f} s, {requests} requests")
+        stats = GraphCache(directory).stats()
+        raw = os.path.getsize(GRAPH_INSTANCE)
+        print(f"{stats['bytes'] / stats['entries']:.0f} bytes per entry, for {raw} bytes of JSON")
+
+        shutil.rmtree(directory)
+        entry_size = stats['bytes'] // stats['entries']
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=hammer, args=(directory, i, entry_size * 40, results))
+                   for i in range(4)]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        print(f"4 processes sharing a cache of 40 entries: {sum(o[1] for o in outcomes)} invalid reads, "
+              f"{sum(o[2] for o in outcomes)} evictions, {GraphCache(directory).stats()['entries']} entries left")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
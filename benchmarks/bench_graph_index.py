@@ -0,0 +1,65 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares answering repeated queries on a project graph with networkx algorithms and with its GraphIndex:
+reachability, shortest paths, descendants and loops between random pairs of nodes of a generated process graph.
+
+Usage: python benchmarks/bench_graph_index.py [number of activities, 300 by default] [number of queries, 20000]
+"""
+import random
+import sys
+import time
+import networkx as nx
+from igrafx_mining_sdk.graph import Graph
+
+
+def process_graph(size, rng):
+    """Returns a graph of activities mostly going forward, with a few rework loops going back"""
+    nodes = [(f"n{i}", {"id": f"n{i}", "name": f"Activity {i}"}) for i in range(size)]
+    edges = set()
+    for i in range(size - 1):
+        edges.add((f"n{i}", f"n{i + 1}"))
+        for _ in range(2):
+            edges.add((f"n{i}", f"n{rng.randint(i + 1, min(size - 1, i + 20))}"))
+        if rng.random() < 0.05:
+            edges.add((f"n{i}", f"n{rng.randint(max(0, i - 10), i)}"))
+    return Graph("project_id", nodes, [(u, v, {"frequency": rng.randint(1, 100)}) for u, v in sorted(edges)])
+
+
+def networkx_queries(graph, pairs):
+    in_loop = {node for component in nx.strongly_connected_components(graph) if len(component) > 1
+               for node in component}
+    for source, target in pairs:
+        if nx.has_path(graph, source, target):
+            nx.shortest_path(graph, source, target)
+        len(nx.descendants(graph, source))
+        source in in_loop
+
+
+def index_queries(graph, pairs):
+    index = graph.index()
+    for source, target in pairs:
+        if index.is_reachable(source, target):
+            index.shortest_path(source, target)
+        len(index.descendants(source))
+        index.in_loop(source)
+
+
+def main(size=300, count=20000):
+    rng = random.Random(0)
+    graph = process_graph(size, rng)
+    nodes = list(graph)
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(count)]
+    start = time.perf_counter()
+    graph.index()
+    print(f"GraphIndex of {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges built in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    graph.invalidate_index()
+    for name, queries in [("networkx", networkx_queries), ("GraphIndex", index_queries)]:
+        start = time.perf_counter()
+        queries(graph, pairs)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10}: {count} queries in {elapsed:6.2f} s, {elapsed / count * 1e6:7.1f} us per query")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
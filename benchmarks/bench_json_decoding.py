@@ -0,0 +1,84 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Micro-benchmarks of the decoding of /graph and /graphInstance payloads and of the building of the graphs, on the
+recorded payloads of tests/data/graphs and on larger payloads of the same shape.
+Decoding is measured with the json module and with orjson if it is installed, and building with the lists copied by
+networkx, as before, and with the decoded dictionaries given to the graph, as the project does.
+
+Usage: python benchmarks/bench_json_decoding.py
+"""
+import json
+import os
+import timeit
+from igrafx_mining_sdk.graph import Graph, GraphInstance
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "graphs")
+
+
+def recorded(name):
+    """Returns the raw bytes of a recorded payload"""
+    with open(os.path.join(DATA, name), "rb") as f:
+        return f.read()
+
+
+def large_graph(vertices=2000, edges_per_vertex=5):
+    """Returns the JSON of a model graph shaped like graph.json"""
+    jgraph = {"vertices": [{"id": f"{i:032x}", "name": f"Activity {i}"} for i in range(vertices)],
+              "edges": [{"id": f"{i * edges_per_vertex + j:032x}", "source": f"{i:032x}",
+                         "destination": f"{(i * 7 + j + 1) % vertices:032x}"}
+                        for i in range(vertices) for j in range(edges_per_vertex)]}
+    return json.dumps(jgraph).encode()
+
+
+def large_graph_instance(events=5000, activities=50):
+    """Returns the JSON of a graph instance shaped like graph_with_invalid_edges.json"""
+    vertices = [{"id": f"{i % activities:032x}", "name": f"Activity {i % activities}", "eventInstance": i}
+                for i in range(events)]
+    edges = [{"source": a, "destination": b} for a, b in zip(vertices, vertices[1:])]
+    return json.dumps({"vertexInstances": vertices, "edgeInstances": edges, "reworkTotal": events - activities,
+                       "concurrencyRate": 0.0}).encode()
+
+
+def build_graph_with_lists(jgraph):
+    """Builds a Graph as Graph.from_dict did, with lists copied by networkx"""
+    return Graph(0, [(item["id"], item) for item in jgraph["vertices"]],
+                 [(item["source"], item["destination"], item) for item in jgraph["edges"]])
+
+
+def build_graph_instance_with_lists(jgraph):
+    """Builds a GraphInstance as GraphInstance.from_dict did, with lists copied by networkx"""
+    return GraphInstance(0, [(item["id"], item) for item in jgraph["vertexInstances"]],
+                         [(item["source"]["id"], item["destination"]["id"]) for item in jgraph["edgeInstances"]],
+                         jgraph["reworkTotal"], jgraph["concurrencyRate"])
+
+
+def best(function, number):
+    """Returns the best time of a call of a function, in microseconds"""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    payloads = [("graph.json", recorded("graph.json"), Graph, build_graph_with_lists),
+                ("graph_with_invalid_edges.json", recorded("graph_with_invalid_edges.json"), GraphInstance,
+                 build_graph_instance_with_lists),
+                ("graph, 2000 vertices", large_graph(), Graph, build_graph_with_lists),
+                ("graph instance, 5000 events", large_graph_instance(), GraphInstance, build_graph_instance_with_lists)]
+    print(f"{'payload':>30} {'size':>9} {'json':>9} {'orjson':>9} {'lists':>9} {'direct':>9} {'before':>9} {'after':>9}")
+    for name, content, graph_class, build_with_lists in payloads:
+        number = max(1, 200000 // len(content))
+        decode_json = best(lambda: json.loads(content), number)
+        decode_orjson = best(lambda: orjson.loads(content), number) if orjson is not None else float("nan")
+        build_lists = best(lambda: build_with_lists(json.loads(content)), number) - decode_json
+        build_direct = best(lambda: graph_class._from_decoded(0, json.loads(content)), number) - decode_json
+        fastest_decode = decode_orjson if orjson is not None else decode_json
+        print(f"{name:>30} {len(content):>9} {decode_json:>8.0f}us {decode_orjson:>7.0f}us {build_lists:>7.0f}us "
+              f"{build_direct:>7.0f}us {decode_json + build_lists:>7.0f}us {fastest_decode + build_direct:>7.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares the discovery of the process keys of a project with SELECT DISTINCT on the edges table, with keyset
+pagination on the cases table, and with an incremental discovery after new cases were appended without new files.
+sqlite3 stands in for the JDBC driver, and the size of the keys is measured as a list of strings and as a
+ProcessKeyStore.
+
+Usage: python benchmarks/bench_process_keys.py [number of edges, 2000000 by default]
+"""
+import os
+import sqlite3
+import sys
+import time
+from unittest.mock import MagicMock, PropertyMock, patch
+from bench_datasource_chunks import create_database
+from igrafx_mining_sdk.datasource import Datasource
+from igrafx_mining_sdk.project import Project
+
+NEW_CASES = 1000
+
+
+def add_cases_table(path):
+    """Adds a cases table with a row per process key of the edges table, and a time column"""
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE cases (__time INTEGER, processkey TEXT)")
+    connection.execute("INSERT INTO cases SELECT ROW_NUMBER() OVER (ORDER BY processkey), processkey "
+                       "FROM edges GROUP BY processkey")
+    connection.execute("CREATE INDEX cases_time ON cases (__time)")
+    connection.commit()
+    connection.close()
+
+
+def datasource(path, name):
+    """Returns a datasource reading a table of the database, with the Druid time functions used by the discovery"""
+    ds = Datasource(name, name, MagicMock(query_cache=None))
+    ds._connection = sqlite3.connect(path)
+    ds._connection.create_function("TIMESTAMP_TO_MILLIS", 1, lambda millis: millis)
+    ds._connection.create_function("MILLIS_TO_TIMESTAMP", 1, lambda millis: millis)
+    return ds
+
+
+def timed(function):
+    """Returns the result of a function and the number of seconds it took"""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(rows=2000000):
+    path = create_database(rows)
+    try:
+        add_cases_table(path)
+        edges, cases = datasource(path, "edges"), datasource(path, "cases")
+        with patch.object(Project, "edges_datasource", new_callable=PropertyMock, return_value=edges), \
+                patch.object(Project, "cases_datasource", new_callable=PropertyMock, return_value=cases), \
+                patch.object(Project, "_Project__files_fingerprint", return_value="files"):
+            project = Project("project_id", MagicMock())
+            res, elapsed = timed(lambda: edges.request('SELECT DISTINCT processkey FROM "edges"'))
+            keys = [key for key in res["processkey"]]
+            size = sys.getsizeof(keys) + sum(sys.getsizeof(key) for key in keys)
+            print(f"SELECT DISTINCT on edges: {len(keys)} keys in {elapsed:6.2f} s, {size / 2**20:6.1f} MB as a list")
+
+            new, elapsed = timed(lambda: project.discover_process_keys(source="cases", page_size=100000))
+            print(f"   keyset pages on cases: {new} keys in {elapsed:6.2f} s, "
+                  f"{project.process_keys.nbytes / 2**20:6.1f} MB as a ProcessKeyStore")
+
+            last = len(keys)
+            cases._connection.executemany("INSERT INTO cases VALUES (?, ?)",
+                                          ((last + i, f"new_{i:09d}") for i in range(1, NEW_CASES + 1)))
+            new, elapsed = timed(lambda: project.discover_process_keys(source="cases", page_size=100000))
+            print(f"   incremental discovery: {new} new keys in {elapsed:6.2f} s, {len(project.process_keys)} in all")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
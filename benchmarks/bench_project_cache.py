@@ -0,0 +1,88 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Counts the requests sent by a dashboard reading the graphs of the projects of a workgroup over and over, while
+files are ingested in some of them: with a new Project for every read, as was needed to see new data, with long-lived
+projects that never refresh their graphs, and with long-lived projects checking the data version of the workgroup.
+
+Usage: python benchmarks/bench_project_cache.py [number of projects, 20 by default]
+"""
+import json
+import os
+import sys
+import time
+from collections import Counter
+from unittest.mock import MagicMock
+from igrafx_mining_sdk.data_version import DataVersionWatcher
+from igrafx_mining_sdk.project import Project
+
+LATENCY = 0.005
+ROUNDS = 50
+CHECK_INTERVAL = 0.05
+GRAPH = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "graphs", "graph.json")
+
+
+class FakeAPI:
+    """Answers the graph, files and data version requests of the projects after a fixed latency, and counts them"""
+    def __init__(self, projects):
+        with open(GRAPH) as f:
+            self.graph = json.load(f)
+        self.version = 0
+        self.files = {pid: 0 for pid in projects}
+        self.counts = Counter()
+
+    def ingest(self, pid):
+        self.files[pid] += 1
+        self.version += 1
+
+    def get_request(self, route, params=None):
+        time.sleep(LATENCY)
+        parts = route.strip("/").split("/")
+        kind = parts[-1] if parts[0] != "workgroups" else "version"
+        self.counts[kind] += 1
+        if kind == "graph":
+            body = self.graph
+        elif kind == "files":
+            body = {"files": [{"id": self.files[parts[1]]}]}
+        else:
+            body = {"dataVersion": self.version}
+        return MagicMock(status_code=200, json=MagicMock(return_value=body))
+
+    def connector(self, check_interval):
+        api_connector = MagicMock(get_request=self.get_request, data_version_watcher=None)
+        if check_interval is not None:
+            api_connector.data_version_watcher = DataVersionWatcher(
+                lambda: self.get_request("/workgroups/wg").json()["dataVersion"], check_interval=check_interval)
+        return api_connector
+
+
+def run(project_count, long_lived, check_interval):
+    pids = [f"p{i}" for i in range(project_count)]
+    api = FakeAPI(pids)
+    api_connector = api.connector(check_interval)
+    projects = {pid: Project(pid, api_connector) for pid in pids}
+    stale = 0
+    start = time.perf_counter()
+    for round_index in range(ROUNDS):
+        if round_index % 10 == 5:
+            api.ingest(pids[round_index % project_count])
+            time.sleep(CHECK_INTERVAL)  # The new version is seen at the next check
+        for pid in pids:
+            project = projects[pid] if long_lived else Project(pid, api_connector)
+            graph = project.graph()
+            stale += getattr(graph, "_seen_files", api.files[pid]) != api.files[pid]
+            graph._seen_files = api.files[pid]
+    return time.perf_counter() - start, api.counts, stale
+
+
+def main(project_count=20):
+    for name, long_lived, check_interval in [("new Project per read", False, None),
+                                             ("long-lived, unchecked", True, None),
+                                             ("long-lived, checked", True, CHECK_INTERVAL)]:
+        elapsed, counts, stale = run(project_count, long_lived, check_interval)
+        print(f"{name:>21}: "
+              f"{counts['graph']:5d} graph, {counts['files']:4d} files and {counts['version']:4d} data version requests, "
+              f"{stale} stale reads, {elapsed:5.2f} s")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,52 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Measures the time of a request repeated as by a dashboard, without cache, with the QueryCache in memory,
+and with its Parquet files read by a new cache as in a new process, against a local Avatica server.
+
+Usage: python benchmarks/bench_query_cache.py [number of rows, 100000 by default]
+"""
+import sys
+import tempfile
+import time
+from unittest import mock
+from avatica_server import AvaticaServer
+from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.datasource import Datasource
+from igrafx_mining_sdk.query_cache import QueryCache
+
+REPEATS = 20
+QUERY = 'SELECT * FROM "edges"'
+
+
+def timed_requests(api_connector, repeats):
+    """Returns the mean number of seconds of a request repeated with a new datasource each time"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        Datasource("edges", "edges", api_connector).request(QUERY)
+    return (time.perf_counter() - start) / repeats
+
+
+def main(rows=100000):
+    with AvaticaServer(rows) as server, tempfile.TemporaryDirectory() as directory:
+        with mock.patch.object(APIConnector, "_APIConnector__login", return_value={"access_token": "token"}):
+            api_connector = APIConnector("wg", "key", "http://localhost", "http://localhost", server.jdbc_url, True,
+                                         sql_transport="avatica")
+        uncached = timed_requests(api_connector, REPEATS)
+        print(f"   no cache: {uncached * 1000:8.1f} ms per request")
+
+        api_connector.query_cache = QueryCache(directory=directory, data_version=lambda: 1)
+        first = timed_requests(api_connector, 1)
+        cached = timed_requests(api_connector, REPEATS)
+        print(f"  first one: {first * 1000:8.1f} ms, including writing the Parquet file")
+        print(f"  in memory: {cached * 1000:8.1f} ms per request, {uncached / cached:6.0f}x faster")
+
+        for attempt in ["the first time, starting the Parquet reader", "afterwards"]:
+            api_connector.query_cache = QueryCache(directory=directory, data_version=lambda: 1)
+            from_disk = timed_requests(api_connector, 1)
+            print(f"    on disk: {from_disk * 1000:8.1f} ms for the first request of a new cache, "
+                  f"{uncached / from_disk:6.1f}x faster, {attempt}")
+        api_connector.close()
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,48 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares drawing a random sample of process keys by loading all the keys and sampling them locally, as
+get_graph_instances(shuffle=True) did, with the sampling done by the datasource with Project.sample_process_keys.
+sqlite3 stands in for the JDBC driver.
+
+Usage: python benchmarks/bench_sampling.py [number of edges, 2000000 by default] [sample size, 100 by default]
+"""
+import os
+import random
+import re
+import sys
+from unittest.mock import MagicMock, PropertyMock, patch
+from bench_datasource_chunks import create_database
+from bench_process_keys import add_cases_table, datasource, timed
+from igrafx_mining_sdk.project import Project
+
+
+def main(rows=2000000, size=100):
+    path = create_database(rows)
+    try:
+        add_cases_table(path)
+        edges, cases = datasource(path, "edges"), datasource(path, "cases")
+        for ds in [edges, cases]:
+            ds._connection.create_function("MOD", 2, lambda a, b: a % b)
+            ds._connection.create_function("RIGHT", 2, lambda text, length: text[-length:])
+            ds._connection.create_function("REGEXP_REPLACE", 3, lambda text, pattern, new: re.sub(pattern, new, text))
+            ds._connection.create_function("PARSE_LONG", 2, lambda text, radix: int(text, radix) if text else None)
+        with patch.object(Project, "edges_datasource", new_callable=PropertyMock, return_value=edges), \
+                patch.object(Project, "cases_datasource", new_callable=PropertyMock, return_value=cases):
+            project = Project("project_id", MagicMock())
+            sample, elapsed = timed(lambda: random.sample(project.process_keys, size))
+            print(f"  all keys, then random.sample: {len(sample)} keys in {elapsed:6.3f} s, "
+                  f"{len(project.process_keys)} keys retrieved")
+
+            for name, options in [("sampled by the datasource", {}), ("stratified by 20 strata", {"stratify_by": "s"})]:
+                if options:
+                    cases._connection.execute("ALTER TABLE cases ADD COLUMN s INTEGER")
+                    cases._connection.execute("UPDATE cases SET s = __time % 20")
+                project = Project("project_id", MagicMock())
+                sample, elapsed = timed(lambda: project.sample_process_keys(size, seed=1, **options))
+                print(f"{name:>31}: {len(sample)} keys in {elapsed:6.3f} s")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,93 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares the size and the encoding and decoding throughput of a batch of generated graph instances as JSON, as
+pickles of the networkx graphs and in the binary format of igrafx_mining_sdk.serialization, then the time taken to read
+a few graph instances of a large file through a memory map. The times are the best of three runs.
+
+Usage: python benchmarks/bench_serialization.py [number of graph instances, 20000 by default]
+"""
+import gc
+import json
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+from igrafx_mining_sdk.graph import GraphInstance
+from igrafx_mining_sdk.json_decoding import loads
+from igrafx_mining_sdk.serialization import GraphFile, dump_graphs, dumps_graphs, loads_graphs
+
+ACTIVITIES = [f"Activity {i}" for i in range(30)]
+RESOURCES = [f"Resource {i}" for i in range(12)]
+
+
+def graph_instance(rng, key):
+    """Returns the graph instance of a case of 10 to 30 events going through random activities"""
+    events = [rng.choice(ACTIVITIES) for _ in range(rng.randint(10, 30))]
+    time = 1700000000000 + rng.randint(0, 10 ** 10)
+    nodes = []
+    for i, name in enumerate(events):
+        start = time + rng.randint(1000, 3600000)
+        time = start + rng.randint(0, 600000)
+        nodes.append((f"{key}-{i}", {"id": f"{key}-{i}", "name": name, "eventInstance": i, "startTime": start,
+                                     "endTime": time, "resource": rng.choice(RESOURCES), "cost": rng.random() * 100,
+                                     "concurrentVertices": []}))
+    edges = [(nodes[i][0], nodes[i + 1][0]) for i in range(len(nodes) - 1)]
+    return GraphInstance("project_id", nodes, edges, len(events) - len(set(events)), rng.random())
+
+
+def json_dumps(graph_instances):
+    return json.dumps([gi.to_dict() for gi in graph_instances]).encode()
+
+
+def json_loads(data):
+    return [GraphInstance._from_decoded("project_id", jgraph) for jgraph in loads(data)]
+
+
+def pickle_dumps(graph_instances):
+    return pickle.dumps(graph_instances, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def measure(name, dumps, load, graph_instances, repeat=3):
+    """Prints the size of the encoded graph instances and the best of several encodings and decodings"""
+    encoded = elapsed = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        data = dumps(graph_instances)
+        encoded = min(encoded, time.perf_counter() - start)
+        gc.collect()
+        start = time.perf_counter()
+        decoded = load(data)
+        elapsed = min(elapsed, time.perf_counter() - start)
+        assert len(decoded) == len(graph_instances)
+        del decoded
+    count = len(graph_instances)
+    print(f"{name:>18}: {len(data) / 2 ** 20:7.1f} MB, encoded in {encoded:5.2f} s ({count / encoded:8.0f} graphs/s), "
+          f"decoded in {elapsed:5.2f} s ({count / elapsed:8.0f} graphs/s)")
+
+
+def main(count=20000):
+    rng = random.Random(0)
+    graph_instances = [graph_instance(rng, key) for key in range(count)]
+    measure("JSON", json_dumps, json_loads, graph_instances)
+    measure("pickle", pickle_dumps, pickle.loads, graph_instances)
+    measure("binary", lambda gis: dumps_graphs(gis, compression=None), loads_graphs, graph_instances)
+    measure("binary, zlib 1", dumps_graphs, loads_graphs, graph_instances)
+    measure("binary, zlib 6", lambda gis: dumps_graphs(gis, level=6), loads_graphs, graph_instances)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "graph_instances.bin")
+        dump_graphs(graph_instances, path, compression=None)
+        positions = [rng.randrange(count) for _ in range(100)]
+        start = time.perf_counter()
+        with GraphFile(path) as graph_file:
+            for position in positions:
+                graph_file[position]
+        print(f"Read {len(positions)} random graph instances of a file of {count} through a memory map in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,55 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares the cold start, the throughput and the peak RSS of the two SQL transports of the datasources,
+the Avatica JDBC driver run in a JVM and the Avatica JSON protocol spoken from Python, against a local Avatica
+server. The JDBC transport is reported as unavailable when Java or the Avatica jar are missing.
+
+Usage: python benchmarks/bench_sql_transport.py [number of rows, 1000000 by default]
+"""
+import importlib.resources
+import json
+import sys
+import time
+from unittest.mock import MagicMock
+from memory import peak_rss_mb, run_isolated
+from avatica_server import AvaticaServer
+
+
+def child(transport, jdbc_url):
+    """Runs the same request in a fresh interpreter with the given transport and prints the measures"""
+    start = time.perf_counter()
+    from igrafx_mining_sdk.api_connector import APIConnector
+    from igrafx_mining_sdk.datasource import Datasource
+    api_connector = MagicMock(jdbc_url=jdbc_url, wg_id="wg", wg_key="key", ssl_verify=True, session=None,
+                              jdbc_driver_class="org.apache.calcite.avatica.remote.Driver",
+                              jdbc_driver_path=str(importlib.resources.files("igrafx_mining_sdk") / "jars" /
+                                                   "avatica-1.26.0.jar"))
+    ds = Datasource("edges", "edges", api_connector, sql_transport=transport)
+    ds._connection = APIConnector.connect_sql(api_connector, transport)
+    chunks = ds.iter_request('SELECT * FROM "edges"', chunk_size=10000)
+    rows = len(next(chunks))
+    first_chunk = time.perf_counter() - start
+    rows += sum(len(chunk) for chunk in chunks)
+    elapsed = time.perf_counter() - start
+    ds.close_ds_connection()
+    print(json.dumps({"cold_start": first_chunk, "rows": rows, "seconds": elapsed, "peak_rss_mb": peak_rss_mb()}))
+
+
+def main(rows=1000000):
+    with AvaticaServer(rows) as server:
+        for transport in ["avatica", "jdbc"]:
+            try:
+                result = run_isolated(__file__, "--child", transport, server.jdbc_url)
+            except Exception as error:
+                reason = getattr(error, "stderr", "") or str(error)
+                print(f"{transport:>8}: unavailable ({reason.strip().splitlines()[-1]})")
+                continue
+            print(f"{transport:>8}: first chunk after {result['cold_start']:.2f} s, "
+                  f"{result['rows'] / result['seconds']:9.0f} rows/s, peak RSS {result['peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:4])
+    else:
+        main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,45 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Compares the wall time and the bytes sent by Project.add_file with and without on-the-fly zip compression,
+for several compression levels, against a local stub server reading at a given bandwidth.
+
+Usage: python benchmarks/bench_upload_compression.py [file size in MB, 64 by default] [bandwidth in Mbit/s,
+100 by default, 0 for no limit]
+"""
+import os
+import sys
+import time
+from memory import write_csv
+from stub_server import StubServer
+from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.project import Project
+
+LEVELS = [None, 0, 1, 3, 6, 9]
+
+
+def main(size_mb=64, bandwidth_mbit=100):
+    path = write_csv(size_mb)
+    try:
+        size = os.path.getsize(path)
+        print(f"file of {size / (1 << 20):.0f} MB, link of {bandwidth_mbit or 'unlimited'} Mbit/s")
+        print(f"{'level':>12} {'MB sent':>9} {'ratio':>7} {'seconds':>9}")
+        with StubServer(bandwidth=bandwidth_mbit * 125000 or None) as server:
+            with APIConnector("wg", "key", server.url, server.url + "/token", None, True) as connector:
+                project = Project("project", connector)
+                for level in LEVELS:
+                    received = server.bytes_received
+                    start = time.perf_counter()
+                    if level is None:
+                        project.add_file(path, stream=True)
+                    else:
+                        project.add_file(path, compress=True, compression_level=level)
+                    elapsed = time.perf_counter() - start
+                    sent = server.bytes_received - received
+                    name = "uncompressed" if level is None else str(level)
+                    print(f"{name:>12} {sent / (1 << 20):9.1f} {size / sent:7.2f} {elapsed:9.2f}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
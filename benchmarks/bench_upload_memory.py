@@ -0,0 +1,47 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Measures the peak RSS and the throughput of Project.add_file against a local stub server,
+with the multipart body built by requests and with the streaming encoder.
+
+Usage: python benchmarks/bench_upload_memory.py [file size in MB, 2048 by default]
+"""
+import json
+import os
+import sys
+import time
+from memory import peak_rss_mb, run_isolated, write_csv
+from stub_server import StubServer
+
+
+def child(mode, path, url):
+    """Uploads the file once in the given mode and prints the measures"""
+    from igrafx_mining_sdk.api_connector import APIConnector
+    from igrafx_mining_sdk.project import Project
+    baseline = peak_rss_mb()
+    with APIConnector("wg", "key", url, url + "/token", None, True) as connector:
+        start = time.perf_counter()
+        Project("project", connector).add_file(path, stream=(mode == "stream"))
+        elapsed = time.perf_counter() - start
+    print(json.dumps({"peak_rss_mb": peak_rss_mb(), "baseline_mb": baseline, "seconds": elapsed}))
+
+
+def main(size_mb=2048):
+    path = write_csv(size_mb)
+    try:
+        size = os.path.getsize(path) / (1 << 20)
+        print(f"file of {size:.0f} MB")
+        with StubServer() as server:
+            for mode in ["in-memory", "stream"]:
+                result = run_isolated(__file__, "--child", mode, path, server.url)
+                print(f"{mode:>9}: peak RSS {result['peak_rss_mb']:8.1f} MB "
+                      f"(interpreter and imports {result['baseline_mb']:.1f} MB), "
+                      f"{size / result['seconds']:8.1f} MB/s")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(*sys.argv[2:5])
+    else:
+        main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,36 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Measures the time validate_csv takes to check a generated event log against its column mapping.
+
+Usage: python benchmarks/bench_validation.py [file size in MB, 700 by default (about 10 million rows)]
+"""
+import os
+import sys
+import time
+from memory import write_csv
+from igrafx_mining_sdk.column_mapping import Column, ColumnMapping, ColumnType, FileStructure, FileType
+from igrafx_mining_sdk.validation import validate_csv
+
+COLUMN_MAPPING = ColumnMapping([
+    Column('Case ID', 0, ColumnType.CASE_ID),
+    Column('Activity', 1, ColumnType.TASK_NAME),
+    Column('Start Date', 2, ColumnType.TIME, time_format="dd/MM/yyyy HH:mm"),
+    Column('End Date', 3, ColumnType.TIME, time_format="dd/MM/yyyy HH:mm"),
+    Column('Price', 4, ColumnType.METRIC),
+])
+
+
+def main(size_mb=700):
+    path = write_csv(size_mb)
+    try:
+        start = time.perf_counter()
+        report = validate_csv(path, FileStructure(FileType.CSV), COLUMN_MAPPING)
+        elapsed = time.perf_counter() - start
+        print(f"{report.rows} rows of {os.path.getsize(path) / (1 << 20):.0f} MB checked in {elapsed:.1f} s "
+              f"({report.rows / elapsed / 1e6:.2f} million rows/s), {report.issue_count} issues")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,35 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Peak memory helpers for the benchmarks"""
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of the current process, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def run_isolated(script, *args):
+    """Runs a benchmark script in a fresh interpreter, so that its peak memory is not shared with other runs,
+    and returns the JSON document it prints on its last line"""
+    output = subprocess.run([sys.executable, script, *map(str, args)], check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def write_csv(size_mb, directory=None):
+    """Writes an event log CSV file of about size_mb MB and returns its path"""
+    row = "case_{:09d},Activity {:02d},01/01/2024 10:{:02d},01/01/2024 11:{:02d},{:.2f}\n"
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, dir=directory) as file:
+        file.write("Case ID,Activity,Start Date,End Date,Price\n")
+        written, i = 0, 0
+        while written < size_mb * (1 << 20):
+            lines = "".join(row.format(i + j, j % 20, j % 60, j % 60, j * 1.5) for j in range(10000))
+            file.write(lines)
+            written += len(lines)
+            i += 10000
+        return file.name
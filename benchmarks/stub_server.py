@@ -0,0 +1,104 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+"""Local HTTP server standing in for the iGrafx Mining Public API and its authentication server in benchmarks"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every request with a small JSON payload over HTTP/1.1 keep-alive connections"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    routes = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _drain_body(self):
+        self.body = None
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().strip() or b"0", 16)
+                self.rfile.read(size + 2)
+                if size == 0:
+                    break
+                self._received(size)
+        else:
+            remaining = int(self.headers.get("Content-Length", 0))
+            # Small bodies are kept for the routes that read them, large uploads are only counted
+            chunks = [] if remaining <= 1 << 20 else None
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                self._received(len(chunk))
+                if chunks is not None:
+                    chunks.append(chunk)
+            self.body = b"".join(chunks) if chunks is not None else None
+
+    def _received(self, size):
+        """Counts the bytes received and, when the server simulates a slow link, waits as long as they would take"""
+        self.server.bytes_received += size
+        if self.server.bandwidth:
+            time.sleep(size / self.server.bandwidth)
+
+    def _handle(self):
+        self._drain_body()
+        path = self.path.split("?")[0]
+        if path.endswith("/token"):
+            self._send_json({"access_token": "stub-token", "expires_in": 300})
+            return
+        handler = self.routes.get((self.command, path))
+        if handler is not None:
+            status, payload = handler(self)
+            self._send_json(payload, status)
+        else:
+            self._send_json({"message": "ok"}, 201 if self.command == "POST" else 200)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+    do_DELETE = _handle
+
+
+class StubServer:
+    """Runs a StubHandler based server in a background thread
+
+    :param routes: optional mapping of (method, path) to callables returning (status, payload)
+    :param bandwidth: optional number of bytes per second the server reads request bodies at, to simulate a WAN link
+    """
+    def __init__(self, routes=None, handler=StubHandler, bandwidth=None):
+        handler_class = type("Handler", (handler,), {"routes": routes or {}})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.bytes_received = 0
+        self.httpd.bandwidth = bandwidth
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def bytes_received(self):
+        return self.httpd.bytes_received
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.httpd.shutdown()
+        self.httpd.server_close()
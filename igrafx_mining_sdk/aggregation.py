@@ -0,0 +1,252 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import numpy as np
+from igrafx_mining_sdk.compact_graph import MISSING, CompactGraph, StringPool
+from igrafx_mining_sdk.graph import Graph
+
+# The bounds of the bins of the duration histograms, from 1 to 10^11 with 10 bins per decade, which covers durations
+# from a millisecond to three years in milliseconds. Durations under 1 fall in the first bin, from 0
+DURATION_BINS = np.concatenate([[0.0], np.logspace(0, 11, 111)])
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class AggregatedGraph(Graph):
+    """A graph aggregating graph instances of a project: its nodes and edges are those of the graph instances, with
+    the number of graph instances they are in as frequency, and the statistics of the durations of the edges"""
+    def __init__(self, project_id: str, nodes_list: list, edges_list: list, instance_count: int, rework_total: int,
+                 rework_instance_count: int, concurrency_rate_mean: float, concurrency_rate_max: float):
+        super().__init__(project_id, nodes_list, edges_list)
+        self.instance_count = instance_count
+        self.rework_total = rework_total
+        self.rework_instance_count = rework_instance_count
+        self.concurrency_rate_mean = concurrency_rate_mean
+        self.concurrency_rate_max = concurrency_rate_max
+
+
+class GraphAggregator:
+    """Aggregates a stream of graph instances into an AggregatedGraph.
+    Node IDs are interned as integer codes and the nodes and edges of the graph instances are buffered as codes, then
+    counted in batches with NumPy. The durations of the edges are counted in fixed histograms, from which their
+    percentiles are estimated, so that the memory used grows with the number of distinct nodes and edges, not with the
+    number of graph instances."""
+    def __init__(self, project_id=None, time_attribute: str = None, duration_bins=DURATION_BINS,
+                 percentiles=DEFAULT_PERCENTILES, batch_size: int = 1 << 16):
+        """Initializes the GraphAggregator class.
+
+        :param project_id: the ID of the project of the graph instances
+        :param time_attribute: the numeric node attribute holding the time of the vertex instances, for instance in
+            milliseconds, from which the duration of an edge is the time of its destination minus the time of its
+            source. None to not compute durations. Negative durations, between the nodes of a rework loop merged in a
+            single node, are left out
+        :param duration_bins: the increasing lower bounds of the bins of the duration histograms, the last bin having
+            no upper bound
+        :param percentiles: the percentiles of the durations of the edges to estimate, between 0 and 100
+        :param batch_size: the number of nodes or edges buffered before they are counted
+        """
+        self.project_id = project_id
+        self.time_attribute = time_attribute
+        self.duration_bins = np.asarray(duration_bins, dtype=np.float64)
+        if len(self.duration_bins) < 2 or np.any(np.diff(self.duration_bins) <= 0):
+            raise ValueError("duration_bins must hold at least two increasing bounds")
+        self.percentiles = tuple(percentiles)
+        if any(not 0 <= p <= 100 for p in self.percentiles):
+            raise ValueError("percentiles must be between 0 and 100")
+        self.batch_size = batch_size
+        self.pool = StringPool()
+        self._names = []  # The name of each node code, the first one seen
+        self._node_counts = np.zeros(0, dtype=np.int64)
+        self._edge_rows = {}  # (source code << 32) | destination code -> row of the edge in the arrays of the edges
+        self._edge_counts = np.zeros(0, dtype=np.int64)
+        self._histograms = np.zeros((0, len(self.duration_bins)), dtype=np.int64)
+        self._duration_sums = np.zeros(0, dtype=np.float64)
+        self._duration_mins = np.zeros(0, dtype=np.float64)
+        self._duration_maxs = np.zeros(0, dtype=np.float64)
+        self._pending_nodes = []  # The codes of the nodes
+        self._pending_sources = []  # The positions in _pending_nodes of the sources and destinations of the edges
+        self._pending_destinations = []
+        self._pending_times = []  # The times of the nodes
+        self.instance_count = 0
+        self.rework_total = 0
+        self.rework_instance_count = 0
+        self._concurrency_rate_sum = 0.0
+        self.concurrency_rate_max = 0.0
+
+    def add(self, graph_instance):
+        """Adds a graph instance, a GraphInstance or a CompactGraphInstance, to the aggregation
+
+        :param graph_instance: the graph instance to add
+        """
+        # The nodes are buffered as codes and the edges as the positions of their nodes in the buffer, in plain lists:
+        # NumPy only pays off on whole batches, a graph instance having a few dozen nodes
+        base = len(self._pending_nodes)
+        known = len(self.pool)
+        if isinstance(graph_instance, CompactGraph):
+            strings = graph_instance.pool.string
+            node_ids = [strings(node_code) for node_code in graph_instance.node_ids.tolist()]
+            self._pending_sources.extend(
+                np.repeat(np.arange(base, base + len(node_ids)), np.diff(graph_instance.indptr)).tolist())
+            self._pending_destinations.extend((graph_instance.indices + base).tolist())
+        else:
+            # The adjacency of the networkx graph is read directly, its views being slower to iterate
+            node_ids = list(graph_instance._node)
+            positions = {node_id: base + i for i, node_id in enumerate(node_ids)}
+            succ = graph_instance._succ
+            self._pending_sources.extend([positions[source] for source, successors in succ.items() for _ in successors])
+            self._pending_destinations.extend([positions[destination] for successors in succ.values()
+                                               for destination in successors])
+        codes = self.pool.codes(node_ids)
+        self._pending_nodes.extend(codes)
+        if self.time_attribute is not None:
+            self._pending_times.extend(self.__node_values(graph_instance, self.time_attribute, np.nan))
+        if len(self.pool) > known:  # The names of the nodes seen for the first time, whose codes follow the others
+            names = self.__node_values(graph_instance, "name", None)
+            self._names.extend(name for node_code, name in zip(codes, names) if node_code >= known)
+
+        rework_total = getattr(graph_instance, "rework_total", 0) or 0
+        concurrency_rate = getattr(graph_instance, "concurrency_rate", 0.0) or 0.0
+        self.instance_count += 1
+        self.rework_total += rework_total
+        self.rework_instance_count += rework_total > 0
+        self._concurrency_rate_sum += concurrency_rate
+        self.concurrency_rate_max = max(self.concurrency_rate_max, concurrency_rate)
+        if len(self._pending_nodes) + len(self._pending_sources) >= self.batch_size:
+            self.flush()
+
+    def update(self, graph_instances):
+        """Adds the graph instances of an iterable to the aggregation, consuming it lazily, and returns the aggregator
+
+        :param graph_instances: an iterable of graph instances, None values being skipped
+        """
+        for graph_instance in graph_instances:
+            if graph_instance is not None:
+                self.add(graph_instance)
+        return self
+
+    @staticmethod
+    def __node_values(graph_instance, attribute, default):
+        """Returns the values of a node attribute of a graph instance, in the order of its nodes. For the time
+        attribute, whose default is NaN, the values that are not numbers are replaced by NaN."""
+        if isinstance(graph_instance, CompactGraph):
+            columns = graph_instance.node_columns
+            if attribute not in columns.columns:
+                return [default] * graph_instance.number_of_nodes()
+            values = [columns.value(attribute, i) for i in range(graph_instance.number_of_nodes())]
+            values = [default if value is MISSING else value for value in values]
+        else:
+            values = [attributes.get(attribute, default) for attributes in graph_instance._node.values()]
+        if default is not None:
+            values = [value if isinstance(value, (int, float)) else default for value in values]
+        return values
+
+    def flush(self):
+        """Counts the buffered nodes, edges and durations"""
+        if not self._pending_nodes:
+            return
+        codes = np.array(self._pending_nodes, dtype=np.int64)
+        sources = np.array(self._pending_sources, dtype=np.intp)
+        destinations = np.array(self._pending_destinations, dtype=np.intp)
+        if len(self._node_counts) < len(self._names):
+            self._node_counts = np.concatenate([self._node_counts,
+                                                np.zeros(len(self._names) - len(self._node_counts), np.int64)])
+        self._node_counts += np.bincount(codes, minlength=len(self._node_counts))
+        keys = (codes[sources] << 32) | codes[destinations]
+        unique_keys, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        unique_rows = self.__edge_rows(unique_keys)
+        np.add.at(self._edge_counts, unique_rows, counts)
+        if self.time_attribute is not None:
+            times = np.array(self._pending_times, dtype=np.float64)
+            durations = times[destinations] - times[sources]
+            known = durations >= 0  # Neither missing times nor nodes merged across a rework loop
+            rows, durations = unique_rows[inverse][known], durations[known]
+            bins = np.clip(np.searchsorted(self.duration_bins, durations, side="right") - 1, 0, None)
+            np.add.at(self._histograms, (rows, bins), 1)
+            np.add.at(self._duration_sums, rows, durations)
+            np.minimum.at(self._duration_mins, rows, durations)
+            np.maximum.at(self._duration_maxs, rows, durations)
+        self._pending_nodes = []
+        self._pending_sources = []
+        self._pending_destinations = []
+        self._pending_times = []
+
+    def __edge_rows(self, unique_keys):
+        """Returns the rows of the edges of distinct keys, adding the edges seen for the first time"""
+        rows = self._edge_rows
+        for key in unique_keys.tolist():
+            if key not in rows:
+                rows[key] = len(rows)
+        added = len(rows) - len(self._edge_counts)
+        if added > 0:
+            self._edge_counts = np.concatenate([self._edge_counts, np.zeros(added, np.int64)])
+            self._histograms = np.concatenate([self._histograms,
+                                               np.zeros((added, len(self.duration_bins)), np.int64)])
+            self._duration_sums = np.concatenate([self._duration_sums, np.zeros(added)])
+            self._duration_mins = np.concatenate([self._duration_mins, np.full(added, np.inf)])
+            self._duration_maxs = np.concatenate([self._duration_maxs, np.full(added, -np.inf)])
+        return np.array([rows[key] for key in unique_keys.tolist()], dtype=np.intp)
+
+    def duration_percentiles(self):
+        """Returns the estimated percentiles of the durations of the edges, as an array with a row per edge and a
+        column per percentile, NaN for the edges without duration. A percentile is interpolated linearly in the bin
+        it falls in, then bounded by the exact minimum and maximum durations of the edge."""
+        self.flush()
+        histograms = self._histograms
+        totals = histograms.sum(axis=1)
+        cumulative = np.cumsum(histograms, axis=1)
+        lower = self.duration_bins
+        upper = np.append(self.duration_bins[1:], np.inf)
+        result = np.full((len(histograms), len(self.percentiles)), np.nan)
+        counted = totals > 0
+        for column, percentile in enumerate(self.percentiles):
+            target = np.maximum(totals * percentile / 100, 1)
+            bins = np.minimum((cumulative < target[:, None]).sum(axis=1), len(lower) - 1)
+            rows = np.arange(len(histograms))
+            before = np.where(bins > 0, cumulative[rows, np.maximum(bins - 1, 0)], 0)
+            in_bin = np.maximum(histograms[rows, bins], 1)
+            high = np.minimum(upper[bins], self._duration_maxs)
+            low = np.maximum(lower[bins], self._duration_mins)
+            estimate = low + (high - low) * np.clip((target - before) / in_bin, 0, 1)
+            result[counted, column] = np.clip(estimate, self._duration_mins, self._duration_maxs)[counted]
+        return result
+
+    def graph(self):
+        """Returns the AggregatedGraph of the graph instances added so far"""
+        self.flush()
+        strings = self.pool.string
+        nodes_list = [(strings(code), {"id": strings(code), "name": self._names[code],
+                                       "frequency": int(self._node_counts[code])})
+                      for code in range(len(self._names))]
+        percentiles = self.duration_percentiles() if self.time_attribute is not None else None
+        edges_list = []
+        for key, row in self._edge_rows.items():
+            source, destination = strings(key >> 32), strings(key & 0xFFFFFFFF)
+            attributes = {"source": source, "destination": destination, "frequency": int(self._edge_counts[row])}
+            durations = int(self._histograms[row].sum())
+            if percentiles is not None and durations > 0:
+                attributes["duration_count"] = durations
+                attributes["duration_mean"] = float(self._duration_sums[row] / durations)
+                attributes["duration_min"] = float(self._duration_mins[row])
+                attributes["duration_max"] = float(self._duration_maxs[row])
+                for column, percentile in enumerate(self.percentiles):
+                    attributes[f"duration_p{percentile:g}"] = float(percentiles[row, column])
+            edges_list.append((source, destination, attributes))
+        concurrency_rate_mean = self._concurrency_rate_sum / self.instance_count if self.instance_count else 0.0
+        return AggregatedGraph(self.project_id, nodes_list, edges_list, self.instance_count, self.rework_total,
+                               self.rework_instance_count, concurrency_rate_mean, self.concurrency_rate_max)
+
+
+def aggregate_graph_instances(graph_instances, project_id=None, time_attribute: str = None,
+                              duration_bins=DURATION_BINS, percentiles=DEFAULT_PERCENTILES):
+    """Aggregates an iterable of graph instances, consumed lazily, into an AggregatedGraph.
+    See GraphAggregator for the parameters.
+
+    :param graph_instances: an iterable of GraphInstance or CompactGraphInstance, None values being skipped
+    :param project_id: the ID of the project of the graph instances
+    :param time_attribute: the numeric node attribute holding the time of the vertex instances, None to not compute
+        durations
+    :param duration_bins: the increasing lower bounds of the bins of the duration histograms
+    :param percentiles: the percentiles of the durations of the edges to estimate, between 0 and 100
+    """
+    aggregator = GraphAggregator(project_id, time_attribute=time_attribute, duration_bins=duration_bins,
+                                 percentiles=percentiles)
+    return aggregator.update(graph_instances).graph()
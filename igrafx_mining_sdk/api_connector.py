@@ -2,7 +2,15 @@
 # https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
 
 import importlib.resources
+import threading
+import time
+import jaydebeapi
 import requests as req
+from requests.adapters import HTTPAdapter
+from igrafx_mining_sdk import avatica
+from igrafx_mining_sdk.connection_pool import ConnectionPool
+from igrafx_mining_sdk.data_version import DataVersionWatcher
+from igrafx_mining_sdk.retry import RetryPolicy
 
 
 class InvalidRouteError(Exception):
@@ -12,10 +20,117 @@ class InvalidRouteError(Exception):
         super().__init__(self.message)
 
 
+class TokenManager:
+    """Keeps the bearer token of a workgroup along with its expiry date, and refreshes it ahead of time.
+    It is thread-safe: when several threads need a new token at once, only one of them logs in and the others wait
+    for the new token."""
+    def __init__(self, fetch_token, refresh_margin: float = 30.0, clock=time.monotonic):
+        """Initializes the TokenManager class.
+
+        :param fetch_token: The function logging in, returning the token payload with
+            the ``access_token`` and ``expires_in`` fields
+        :param refresh_margin: The number of seconds before the expiry of the token at which it is refreshed
+        :param clock: The function returning the current time in seconds
+        """
+        self._fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._token = (None, None)  # The header and its expiry, replaced at once so that readers never see a mix
+        self.refresh_count = 0
+
+    @property
+    def header(self):
+        """Returns the current authorization header, without refreshing it"""
+        return self._token[0]
+
+    @property
+    def expires_at(self):
+        """Returns the time at which the current token must be refreshed, or None if the expiry is unknown"""
+        return self._token[1]
+
+    def is_fresh(self):
+        """Returns True if there is a token that does not need to be refreshed yet"""
+        header, expires_at = self._token
+        if header is None:
+            return False
+        return expires_at is None or self._clock() < expires_at
+
+    def set_token(self, payload: dict):
+        """Stores a token returned by the authentication server.
+        The token is considered expired ``refresh_margin`` seconds before its actual expiry,
+        or halfway through its lifetime for tokens living less than twice the margin.
+
+        :param payload: The token payload, with the ``access_token`` and ``expires_in`` fields
+        """
+        expires_in = payload.get("expires_in")
+        expires_at = None
+        if expires_in is not None:
+            expires_in = float(expires_in)
+            expires_at = self._clock() + expires_in - min(self.refresh_margin, expires_in / 2)
+        self._token = ({"Authorization": "Bearer " + payload["access_token"]}, expires_at)
+
+    def store_token(self, payload: dict):
+        """Stores a token obtained by a login done outside of the TokenManager, such as an asynchronous one, counts
+        the refresh and returns the new authorization header
+
+        :param payload: The token payload, with the ``access_token`` and ``expires_in`` fields
+        """
+        with self._lock:
+            self.set_token(payload)
+            self.refresh_count += 1
+            return self.header
+
+    def set_header(self, header: dict):
+        """Replaces the authorization header by a header whose expiry is unknown
+
+        :param header: The authorization header
+        """
+        with self._lock:
+            self._token = (header, None)
+
+    def refresh(self):
+        """Logs in and stores the new token, then returns the new authorization header"""
+        with self._lock:
+            return self.__refresh()
+
+    def get_header(self):
+        """Returns a valid authorization header, logging in first if the token is missing or about to expire"""
+        if self.is_fresh():
+            return self.header
+        with self._lock:
+            if self.is_fresh():  # Another thread refreshed the token while we were waiting for the lock
+                return self.header
+            return self.__refresh()
+
+    def invalidate(self, rejected_header: dict):
+        """Refreshes the token after the server rejected it.
+        Nothing is done if the rejected token was already replaced, so that a burst of rejected requests only
+        triggers one login.
+
+        :param rejected_header: The authorization header that was rejected
+        """
+        with self._lock:
+            if self.header is rejected_header:
+                self.__refresh()
+            return self.header
+
+    def __refresh(self):
+        self.set_token(self._fetch_token())
+        self.refresh_count += 1
+        return self.header
+
+
 class APIConnector:
     """Class to connect to the API. It allows us to log into the Mining Public API and retrieve a token.
-    It also allows us to do HTTP GET, POST and DELETE requests."""
-    def __init__(self, wg_id: str, wg_key: str, apiurl: str, authurl: str, jdbc_url: str, ssl_verify: bool):
+    It also allows us to do HTTP GET, POST and DELETE requests.
+    All requests go through a pooled HTTP session, so connections are kept alive and reused between calls."""
+    def __init__(self, wg_id: str, wg_key: str, apiurl: str, authurl: str, jdbc_url: str, ssl_verify: bool,
+                 pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 max_concurrency: int = 10, token_refresh_margin: float = 30.0, clock=time.monotonic,
+                 retry_policy: RetryPolicy = None, sql_transport: str = "jdbc", sql_pool_size: int = 4,
+                 sql_pool_timeout: float = 30.0, query_cache=None, data_version_check_interval: float = 5.0,
+                 graph_cache=None, graph_backend: str = "networkx"):
         """Initializes the APIConnector class.
 
         :param wg_id: The ID of the workgroup
@@ -24,7 +139,32 @@ class APIConnector:
         :param authurl: The URL of the authentication
         :param jdbc_url: The URL of the JDBC connection
         :param ssl_verify: Verify SSL certificates
+        :param pool_connections: The number of host connection pools to keep
+        :param pool_maxsize: The maximum number of connections kept alive per host
+        :param pool_block: Whether to wait for a free connection when the pool of a host is exhausted
+        :param max_concurrency: The maximum number of requests in flight at once for the asynchronous connector
+        :param token_refresh_margin: The number of seconds before the expiry of the token at which it is refreshed
+        :param clock: The function returning the current time in seconds, used to track the expiry of the token
+        :param retry_policy: The policy retrying the requests after transient errors, a default one if None
+        :param sql_transport: How the datasources send SQL requests, "jdbc" for the Avatica JDBC driver run in a JVM
+            or "avatica" for the Avatica JSON protocol spoken from Python
+        :param sql_pool_size: The maximum number of SQL connections the datasources open at once, per transport
+        :param sql_pool_timeout: The maximum number of seconds a datasource waits for a free SQL connection
+        :param query_cache: The QueryCache of the results of the SQL requests of the datasources, None to not cache them
+        :param data_version_check_interval: The number of seconds during which the data version of the workgroup is
+            trusted by the projects, datasources and query cache memoizing its data, before they ask for it again
+        :param graph_cache: The GraphCache storing the graphs and graph instances of the projects on disk, None to not
+            store them
+        :param graph_backend: The class of the graphs returned by the projects, "networkx" for the Graph and
+            GraphInstance subclasses of networkx.DiGraph, or "compact" for the array-backed CompactGraph and
+            CompactGraphInstance
         """
+        if sql_transport not in ("jdbc", "avatica"):
+            raise ValueError("sql_transport must be 'jdbc' or 'avatica'")
+        if sql_pool_size < 1:
+            raise ValueError("sql_pool_size must be strictly positive")
+        if graph_backend not in ("networkx", "compact"):
+            raise ValueError("graph_backend must be 'networkx' or 'compact'")
 
         self.wg_id = wg_id
         self.wg_key = wg_key
@@ -33,8 +173,129 @@ class APIConnector:
         self.jdbc_url = jdbc_url
         self.jdbc_driver_class = "org.apache.calcite.avatica.remote.Driver"
         self.jdbc_driver_path = str(importlib.resources.files("igrafx_mining_sdk") / "jars" / "avatica-1.26.0.jar")
+        self.sql_transport = sql_transport
+        self.sql_pool_size = sql_pool_size
+        self.sql_pool_timeout = sql_pool_timeout
+        self._sql_pools = {}
+        self._sql_pools_lock = threading.Lock()
+        self.query_cache = query_cache
+        self.graph_cache = graph_cache
+        self.graph_backend = graph_backend
+        self.data_version_watcher = DataVersionWatcher(self.__fetch_data_version,
+                                                       check_interval=data_version_check_interval, clock=clock)
+        if query_cache is not None and query_cache.data_version is None:
+            # The cache checks the data version through the watcher, so that a lookup only sends a request once the
+            # version is older than data_version_check_interval
+            query_cache.data_version = self.data_version_watcher.current
         self.ssl_verify = ssl_verify
-        self.token_header = self.__login()
+        self.session = self.__create_session(pool_connections, pool_maxsize, pool_block)
+        self.max_concurrency = max_concurrency
+        self._async_connector = None
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.token_manager = TokenManager(self.__login, refresh_margin=token_refresh_margin, clock=clock)
+        self.token_manager.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __create_session(self, pool_connections, pool_maxsize, pool_block):
+        """Creates the HTTP session shared by all the requests of the connector
+
+        :param pool_connections: The number of host connection pools to keep
+        :param pool_maxsize: The maximum number of connections kept alive per host
+        :param pool_block: Whether to wait for a free connection when the pool of a host is exhausted
+        """
+        if pool_connections < 1 or pool_maxsize < 1:
+            raise ValueError("pool_connections and pool_maxsize must be strictly positive")
+        session = req.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+
+    def close(self):
+        """Closes the SQL connections of the datasources, then the HTTP session and all the connections it keeps
+        alive"""
+        with self._sql_pools_lock:
+            pools = list(self._sql_pools.values())
+            self._sql_pools = {}
+        for pool in pools:
+            pool.close()
+        self.session.close()
+
+    def connect_sql(self, sql_transport: str = None):
+        """Opens a new SQL connection to Druid using Avatica
+
+        :param sql_transport: "jdbc" for the Avatica JDBC driver run in a JVM or "avatica" for the Avatica JSON
+            protocol spoken from Python, the transport of the connector if None
+        """
+        if (sql_transport or self.sql_transport) == "avatica":
+            return avatica.connect(self.jdbc_url, self.wg_id, self.wg_key, session=self.session,
+                                   ssl_verify=self.ssl_verify)
+        return jaydebeapi.connect(
+            self.jdbc_driver_class,  # Avatica JDBC driver class
+            self.jdbc_url,  # JDBC URL for Avatica
+            [self.wg_id, self.wg_key],  # User & Password
+            self.jdbc_driver_path  # Path to Avatica JDBC driver .jar file
+        )
+
+    def sql_pool(self, sql_transport: str = None):
+        """Returns the pool of SQL connections the datasources of the workgroup borrow from, creating it if needed.
+        There is one pool per transport.
+
+        :param sql_transport: the transport of the connections, the transport of the connector if None
+        """
+        sql_transport = sql_transport or self.sql_transport
+        with self._sql_pools_lock:
+            if sql_transport not in self._sql_pools:
+                self._sql_pools[sql_transport] = ConnectionPool(lambda: self.connect_sql(sql_transport),
+                                                                max_size=self.sql_pool_size,
+                                                                timeout=self.sql_pool_timeout)
+            return self._sql_pools[sql_transport]
+
+    def __fetch_data_version(self):
+        """Requests the data version of the workgroup"""
+        return self.get_request(f"/workgroups/{self.wg_id}").json().get("dataVersion")
+
+    @property
+    def async_connector(self):
+        """Returns the asynchronous connector sharing the credentials and the token of this connector"""
+        if self._async_connector is None:
+            from igrafx_mining_sdk.async_api_connector import AsyncAPIConnector
+            self._async_connector = AsyncAPIConnector(self, max_concurrency=self.max_concurrency)
+        return self._async_connector
+
+    @property
+    def retry_metrics(self):
+        """Returns the metrics of the retries made by the connector"""
+        return self.retry_policy.metrics
+
+    @property
+    def token_header(self):
+        """Returns a valid authorization header, refreshing the token if it is about to expire"""
+        return self.token_manager.get_header()
+
+    @token_header.setter
+    def token_header(self, header):
+        self.token_manager.set_header(header)
+
+    @property
+    def authurl(self):
+        """Returns the URL of the authentication"""
+        return self._authurl
+
+    @property
+    def login_data(self):
+        """Returns the form data used to log into the Mining Public API"""
+        return {
+            "grant_type": "client_credentials",
+            "client_id": self.wg_id,
+            "client_secret": self.wg_key
+        }
 
     def __process_apiurl(self, apiurl):
         """Ensure that the API URL ends with  /pub
@@ -53,19 +314,15 @@ class APIConnector:
     def __login(self):
         """Logs into the Mining Public API with the Workgroups credentials and retrieves a token for later requests.
         Handles the authentication ``/protocol/openid-connect/token`` suffix.
+        Returns the token payload, which includes the ``access_token`` and its lifetime in ``expires_in``.
         """
 
         login_url = f"{self._authurl}"
-        login_data = {
-            "grant_type": "client_credentials",
-            "client_id": self.wg_id,
-            "client_secret": self.wg_key
-        }
 
         try:
-            response = req.post(login_url, login_data, verify=self.ssl_verify)
+            response = self.session.post(login_url, self.login_data, verify=self.ssl_verify)
             response.raise_for_status()
-            return {"Authorization": "Bearer " + response.json()["access_token"]}
+            return response.json()
 
         except req.exceptions.HTTPError as error:
             print(f"HTTP Error occurred: {error}")
@@ -76,36 +333,90 @@ class APIConnector:
                                 "check that the correct credentials have been entered.\n\n"
                                 "There, you can find your workgroups ID and secret key "
                                 "and the API and authentication url.")
+            raise
 
-    def get_request(self, route, *, params=None, nblasttries=0, maxtries=3):
-        """Does an HTTP GET request to the Mining Public API by simply taking the route and eventual parameters
+    def request(self, method, route, *, params=None, json=None, files=None, data=None, headers=None,
+                nblasttries=0, maxtries=3):
+        """Does an HTTP request to the Mining Public API and returns its response.
+        The token is refreshed before the request if it is about to expire. If the token is rejected anyway,
+        it is refreshed once for all concurrent callers and the request is replayed.
+        Transient errors are retried as decided by the retry policy of the connector.
 
+        :param method: The HTTP method of the request
         :param route: The route of the request
         :param params: The parameters of the request
+        :param json: A given JSON object
+        :param files: Eventual files
+        :param data: A given body
+        :param headers: Additional headers
         :param nblasttries: The number of try of this route
-        :param maxtries: The maximum number of try
+        :param maxtries: The maximum number of tries after the token was rejected
         """
 
         response = None
         _route = self.apiurl + (route if route.startswith('/') else '/' + route)
+        started_at = self.retry_policy.clock()
+        nbretries = 0
         try:
-            response = req.get(_route,
-                               params=params,
-                               headers=self.token_header,
-                               verify=self.ssl_verify)
-            if response.status_code == 401:  # Only possible if the token has expired
-                if nblasttries < maxtries:
-                    self.token_header = self.__login()
-                    self.get_request(route, params=params, nblasttries=nblasttries + 1, maxtries=maxtries)
+            while True:
+                token_header = self.token_manager.get_header()
+                try:
+                    response = self.session.request(method, _route,
+                                                    params=params,
+                                                    json=json,
+                                                    files=files,
+                                                    data=data,
+                                                    headers={**token_header, **(headers or {})},
+                                                    verify=self.ssl_verify)
+                except self.retry_policy.retry_exceptions as error:
+                    delay = self.retry_policy.next_delay(method, route, nbretries, started_at, error=error)
+                    if delay is None:
+                        raise
                 else:
-                    raise InvalidRouteError()
+                    if response.status_code == 401:  # Only possible if the token has expired
+                        if nblasttries >= maxtries:
+                            raise InvalidRouteError()
+                        nblasttries += 1
+                        self.token_manager.invalidate(token_header)
+                        self.__rewind(files, data)
+                        continue
+                    delay = self.retry_policy.next_delay(method, route, nbretries, started_at, response=response)
+                    if delay is None:
+                        break
+                self.retry_policy.sleep(delay)
+                nbretries += 1
+                self.__rewind(files, data)
             response.raise_for_status()
         except (req.HTTPError, InvalidRouteError) as error:
             print(f"Http error occurred: {error}")
-            print(response.text)
+            if response is not None:
+                print(response.text)
         return response
 
-    def post_request(self, route, *, params=None, json=None, files=None, headers={}, nblasttries=0, maxtries=3):
+    @staticmethod
+    def __rewind(files, data):
+        """Rewinds the file objects of a request so that it can be replayed
+
+        :param files: The files of the request
+        :param data: The body of the request
+        """
+        streams = [data] + [f[1] if isinstance(f, tuple) else f for f in (files or {}).values()]
+        for stream in streams:
+            if hasattr(stream, "seek"):
+                stream.seek(0)
+
+    def get_request(self, route, *, params=None, nblasttries=0, maxtries=3):
+        """Does an HTTP GET request to the Mining Public API by simply taking the route and eventual parameters
+
+        :param route: The route of the request
+        :param params: The parameters of the request
+        :param nblasttries: The number of try of this route
+        :param maxtries: The maximum number of try
+        """
+        return self.request("GET", route, params=params, nblasttries=nblasttries, maxtries=maxtries)
+
+    def post_request(self, route, *, params=None, json=None, files=None, data=None, headers={}, nblasttries=0,
+                     maxtries=3):
         """Does an HTTP POST request to the Mining Public API by simply taking the route, an eventual JSON,
         files and headers
 
@@ -113,37 +424,13 @@ class APIConnector:
         :param params: The parameters of the request
         :param json: A given JSON object
         :param files: Eventual files
+        :param data: A given body
         :param headers: Additional headers
         :param nblasttries: The number of try of this route
         :param maxtries: The maximum number of tries
         """
-
-        response = None
-        _route = self.apiurl + (route if route.startswith('/') else '/' + route)
-        try:
-            response = req.post(_route,
-                                params=params,
-                                json=json,
-                                files=files,
-                                headers={**self.token_header, **headers},
-                                verify=self.ssl_verify)
-            if response.status_code == 401:  # Only possible if the token has expired
-                if nblasttries < maxtries:
-                    self.token_header = self.__login()
-                    self.post_request(route,
-                                      json=json,
-                                      files=files,
-                                      headers=headers,
-                                      nblasttries=nblasttries + 1,
-                                      maxtries=maxtries)
-                else:
-                    raise InvalidRouteError()
-            response.raise_for_status()
-        except (req.HTTPError, InvalidRouteError) as error:
-            if response is not None:
-                print(f"Http error occurred: {error}")
-                print(response.text)
-        return response
+        return self.request("POST", route, params=params, json=json, files=files, data=data, headers=headers,
+                            nblasttries=nblasttries, maxtries=maxtries)
 
     def delete_request(self, route, *, nblasttries=0, maxtries=3):
         """Does an HTTP DELETE request to the Mining Public API by simply taking the route
@@ -152,24 +439,7 @@ class APIConnector:
         :param nblasttries: The number of try of this route
         :param maxtries: The maximum number of tries
         """
-
-        response = None
-        _route = self.apiurl + (route if route.startswith('/') else '/' + route)
-        try:
-            response = req.delete(_route,
-                                  headers=self.token_header,
-                                  verify=self.ssl_verify)
-            if response.status_code == 401:  # Only possible if the token has expired
-                if nblasttries < maxtries:
-                    self.token_header = self.__login()
-                    self.delete_request(route, nblasttries=nblasttries + 1, maxtries=maxtries)
-                else:
-                    raise InvalidRouteError()
-            response.raise_for_status()
-        except (req.HTTPError, InvalidRouteError) as error:
-            print(f"Http error occurred: {error}")
-            print(response.text)
-        return response
+        return self.request("DELETE", route, nblasttries=nblasttries, maxtries=maxtries)
 
     def put_request(self, route, *, params=None, nblasttries=0, maxtries=3):
         """Does an HTTP PUT request to the Mining Public API by simply taking the route
@@ -179,22 +449,4 @@ class APIConnector:
         :param nblasttries: The number of try of this route
         :param maxtries: The maximum number of tries
         """
-
-        response = None
-        _route = self.apiurl + (route if route.startswith('/') else '/' + route)
-        try:
-            response = req.put(_route,
-                               params=params,
-                               headers=self.token_header,
-                               verify=self.ssl_verify)
-            if response.status_code == 401:  # Only possible if the token has expired
-                if nblasttries < maxtries:
-                    self.token_header = self.__login()
-                    self.put_request(route, params=params, nblasttries=nblasttries + 1, maxtries=maxtries)
-                else:
-                    raise InvalidRouteError()
-            response.raise_for_status()
-        except (req.HTTPError, InvalidRouteError) as error:
-            print(f"Http error occurred: {error}")
-            print(response.text)
-        return response
+        return self.request("PUT", route, params=params, nblasttries=nblasttries, maxtries=maxtries)
@@ -0,0 +1,220 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import asyncio
+import json as jsonlib
+from igrafx_mining_sdk.api_connector import InvalidRouteError
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - depends on the installed extras
+    aiohttp = None
+
+
+class AsyncResponse:
+    """The response of an asynchronous request, mirroring the attributes of a ``requests`` response that the SDK uses.
+    The body is read before the connection is released, so the response can be used outside of the session."""
+    def __init__(self, url: str, status_code: int, reason: str, headers: dict, content: bytes):
+        """Initializes the response
+
+        :param url: The URL of the request
+        :param status_code: The HTTP status code
+        :param reason: The HTTP reason phrase
+        :param headers: The headers of the response
+        :param content: The raw body of the response
+        """
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self):
+        """Returns True if the status code is lower than 400"""
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        """Returns the body of the response decoded as text"""
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        """Returns the body of the response parsed as JSON"""
+        return jsonlib.loads(self.content)
+
+    def raise_for_status(self):
+        """Raises an aiohttp.ClientResponseError if the status code is an error"""
+        if not self.ok:
+            raise aiohttp.ClientResponseError(None, (), status=self.status_code, message=self.reason)
+
+    def __repr__(self):
+        return f"<AsyncResponse [{self.status_code}]>"
+
+
+class AsyncAPIConnector:
+    """Asynchronous counterpart of the APIConnector, built on aiohttp.
+    It shares the credentials and the token of the synchronous connector it is created from,
+    caps the number of requests in flight with a semaphore and refreshes the token under a lock,
+    so that a single expired token only triggers one login.
+    The token is refreshed ahead of its expiry, as tracked by the TokenManager of the synchronous connector."""
+    def __init__(self, api_connector, max_concurrency: int = 10):
+        """Initializes the AsyncAPIConnector class.
+
+        :param api_connector: The synchronous APIConnector holding the credentials and the token
+        :param max_concurrency: The maximum number of requests in flight at once
+        """
+        if aiohttp is None:
+            raise ImportError("The asynchronous API requires aiohttp. "
+                              "Install it with 'pip install igrafx_mining_sdk[async]'.")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be strictly positive")
+        self.api_connector = api_connector
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+        self._token_lock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def __bind_loop(self):
+        """Creates the session, the semaphore and the lock for the running event loop.
+        They are recreated when the connector is used from another event loop, after closing the previous session."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._session is None or self._session.closed:
+            if self._session is not None and not self._session.closed:
+                if self._loop is loop or self._loop.is_closed():
+                    # The connections of a closed loop are already gone, closing the session only releases them
+                    await self._session.close()
+                else:  # The previous loop is still open, possibly running in another thread: the session closes there
+                    asyncio.run_coroutine_threadsafe(self._session.close(), self._loop)
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, ssl=bool(self.api_connector.ssl_verify))
+            self._session = aiohttp.ClientSession(connector=connector, headers={"Connection": "keep-alive"})
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._token_lock = asyncio.Lock()
+            self._loop = loop
+        return self._session
+
+    async def close(self):
+        """Closes the HTTP session of the connector"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __get_header(self):
+        """Returns a valid authorization header, logging in first if the token is missing or about to expire"""
+        token_manager = self.api_connector.token_manager
+        if token_manager.is_fresh():
+            return token_manager.header
+        return await self.__login(token_manager.header)
+
+    async def __login(self, expired_header):
+        """Logs into the Mining Public API again, unless another task already refreshed the expired token.
+
+        :param expired_header: The authorization header that expired or was rejected
+        """
+        token_manager = self.api_connector.token_manager
+        async with self._token_lock:
+            if token_manager.header is not expired_header and token_manager.is_fresh():
+                return token_manager.header
+            async with self._session.post(self.api_connector.authurl, data=self.api_connector.login_data) as response:
+                if response.status >= 400:
+                    raise InvalidRouteError(f"Login failed with status code {response.status}")
+                return token_manager.store_token(await response.json(content_type=None))
+
+    async def request(self, method, route, *, params=None, json=None, data=None, headers=None, maxtries=3):
+        """Does an asynchronous HTTP request to the Mining Public API and returns an AsyncResponse.
+        The token is refreshed and the request retried if the token has expired.
+        Transient errors are retried as decided by the retry policy of the synchronous connector.
+
+        :param method: The HTTP method of the request
+        :param route: The route of the request
+        :param params: The parameters of the request
+        :param json: A given JSON object
+        :param data: A given body
+        :param headers: Additional headers
+        :param maxtries: The maximum number of tries after the token was rejected
+        """
+        session = await self.__bind_loop()
+        retry_policy = self.api_connector.retry_policy
+        _route = self.api_connector.apiurl + (route if route.startswith('/') else '/' + route)
+        response = None
+        started_at = retry_policy.clock()
+        nbtries = 0
+        nbretries = 0
+        try:
+            while True:
+                token_header = await self.__get_header()
+                request_headers = {**token_header, **(headers or {})}
+                try:
+                    # Only the attempts hold a slot of the semaphore, not the delays between them
+                    async with self._semaphore, session.request(method, _route, params=params, json=json, data=data,
+                                                                headers=request_headers) as raw_response:
+                        response = AsyncResponse(str(raw_response.url), raw_response.status, raw_response.reason,
+                                                 dict(raw_response.headers), await raw_response.read())
+                except retry_policy.retry_exceptions as error:
+                    delay = retry_policy.next_delay(method, route, nbretries, started_at, error=error)
+                    if delay is None:
+                        raise
+                else:
+                    if response.status_code == 401:  # Only possible if the token has expired
+                        if nbtries >= maxtries:
+                            raise InvalidRouteError()
+                        nbtries += 1
+                        await self.__login(token_header)
+                        continue
+                    delay = retry_policy.next_delay(method, route, nbretries, started_at, response=response)
+                    if delay is None:
+                        break
+                await asyncio.sleep(delay)
+                nbretries += 1
+            response.raise_for_status()
+        except (aiohttp.ClientResponseError, InvalidRouteError) as error:
+            print(f"Http error occurred: {error}")
+            if response is not None:
+                print(response.text)
+        return response
+
+    async def get_request(self, route, *, params=None, maxtries=3):
+        """Does an asynchronous HTTP GET request to the Mining Public API
+
+        :param route: The route of the request
+        :param params: The parameters of the request
+        :param maxtries: The maximum number of tries
+        """
+        return await self.request("GET", route, params=params, maxtries=maxtries)
+
+    async def post_request(self, route, *, params=None, json=None, data=None, headers=None, maxtries=3):
+        """Does an asynchronous HTTP POST request to the Mining Public API
+
+        :param route: The route of the request
+        :param params: The parameters of the request
+        :param json: A given JSON object
+        :param data: A given body, such as an aiohttp.FormData for files
+        :param headers: Additional headers
+        :param maxtries: The maximum number of tries
+        """
+        return await self.request("POST", route, params=params, json=json, data=data, headers=headers,
+                                  maxtries=maxtries)
+
+    async def put_request(self, route, *, params=None, maxtries=3):
+        """Does an asynchronous HTTP PUT request to the Mining Public API
+
+        :param route: The route of the request
+        :param params: The parameters of the request
+        :param maxtries: The maximum number of tries
+        """
+        return await self.request("PUT", route, params=params, maxtries=maxtries)
+
+    async def delete_request(self, route, *, maxtries=3):
+        """Does an asynchronous HTTP DELETE request to the Mining Public API
+
+        :param route: The route of the request
+        :param maxtries: The maximum number of tries
+        """
+        return await self.request("DELETE", route, maxtries=maxtries)
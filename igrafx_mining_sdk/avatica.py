@@ -0,0 +1,268 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import uuid
+from datetime import datetime, timedelta
+import pandas
+import requests as req
+
+# JDBC type IDs of the temporal columns, whose values Avatica sends as numbers
+TIMESTAMP_TYPES = {93: "ms", 2014: "ms"}
+DATE_TYPES = {91: "D"}
+TIME_TYPES = {92: "ms"}
+EPOCH = datetime(1970, 1, 1)
+
+
+class AvaticaError(Exception):
+    """An error returned by the Avatica server"""
+    def __init__(self, message: str, error_code: int = None, sql_state: str = None):
+        """Initializes an AvaticaError
+
+        :param message: the error message of the server
+        :param error_code: the error code of the server
+        :param sql_state: the SQL state of the error
+        """
+        super().__init__(message)
+        self.error_code = error_code
+        self.sql_state = sql_state
+
+
+def parse_jdbc_url(jdbc_url: str):
+    """Returns the HTTP URL of the Avatica server and the properties of a JDBC URL
+    such as ``jdbc:avatica:remote:url=https://host/druid/v2/sql/avatica/;transparent_reconnection=true``
+
+    :param jdbc_url: the JDBC URL of the Avatica server
+    """
+    prefix = "jdbc:avatica:remote:"
+    if not jdbc_url.startswith(prefix):
+        raise ValueError(f"Not an Avatica JDBC URL: {jdbc_url}")
+    properties = {}
+    for item in jdbc_url[len(prefix):].split(";"):
+        if item:
+            key, _, value = item.partition("=")
+            properties[key.strip()] = value.strip()
+    if "url" not in properties:
+        raise ValueError(f"The JDBC URL has no url property: {jdbc_url}")
+    if properties.get("serialization", "json").lower() != "json":
+        raise ValueError("Only the JSON serialization of Avatica is supported")
+    return properties.pop("url"), properties
+
+
+def connect(jdbc_url: str, user: str, password: str, session: req.Session = None, ssl_verify: bool = True,
+            frame_size: int = 10000):
+    """Opens a connection to an Avatica server, such as the SQL endpoint of Druid, with the JSON protocol over HTTP.
+    It does the same requests as the Avatica JDBC driver without needing a JVM.
+
+    :param jdbc_url: the JDBC URL of the Avatica server
+    :param user: the user of the connection
+    :param password: the password of the connection
+    :param session: the HTTP session used for the requests, a new one if None
+    :param ssl_verify: verify SSL certificates
+    :param frame_size: the maximum number of rows the server sends in a single response
+    """
+    url, properties = parse_jdbc_url(jdbc_url)
+    return AvaticaConnection(url, {**properties, "user": user, "password": password},
+                             session=session, ssl_verify=ssl_verify, frame_size=frame_size)
+
+
+class AvaticaConnection:
+    """A DB-API like connection to an Avatica server, speaking the Avatica JSON protocol over HTTP"""
+    def __init__(self, url: str, info: dict, session: req.Session = None, ssl_verify: bool = True,
+                 frame_size: int = 10000):
+        """Opens the connection
+
+        :param url: the HTTP URL of the Avatica server
+        :param info: the properties of the connection, including the user and the password
+        :param session: the HTTP session used for the requests, a new one if None
+        :param ssl_verify: verify SSL certificates
+        :param frame_size: the maximum number of rows the server sends in a single response
+        """
+        if frame_size < 1:
+            raise ValueError("frame_size must be strictly positive")
+        self.url = url
+        self.session = session if session is not None else req.Session()
+        self.ssl_verify = ssl_verify
+        self.frame_size = frame_size
+        self.connection_id = str(uuid.uuid4())
+        self.closed = False
+        self.send("openConnection", info=info)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def send(self, request: str, **payload):
+        """Sends a request of the Avatica protocol and returns the response, or raises an AvaticaError
+
+        :param request: the name of the request
+        :param payload: the fields of the request, besides its name and the connection ID
+        """
+        response = self.session.post(self.url, json={"request": request, "connectionId": self.connection_id,
+                                                     **payload}, verify=self.ssl_verify)
+        body = response.json() if response.content else {}
+        if body.get("response") == "error" or not response.ok:
+            message = body.get("errorMessage") or f"Avatica request failed with status {response.status_code}"
+            raise AvaticaError(message, body.get("errorCode"), body.get("sqlState"))
+        return body
+
+    def cursor(self):
+        """Returns a new cursor on the connection"""
+        if self.closed:
+            raise AvaticaError("The connection is closed")
+        return AvaticaCursor(self)
+
+    def commit(self):
+        """Does nothing, the datasources are read only"""
+
+    def close(self):
+        """Closes the connection on the server"""
+        if not self.closed:
+            self.closed = True
+            self.send("closeConnection")
+
+
+class AvaticaCursor:
+    """A DB-API like cursor of an AvaticaConnection.
+    The rows are fetched from the server one frame at a time, as they are consumed.
+    They can be read as tuples with the fetch methods, or as columns with fetchmany_columns."""
+    arraysize = 1
+
+    def __init__(self, connection: AvaticaConnection):
+        """Creates a statement on the server
+
+        :param connection: the connection of the cursor
+        """
+        self.connection = connection
+        self.statement_id = connection.send("createStatement")["statementId"]
+        self.description = None
+        self.rowcount = -1
+        self._rows = []
+        self._position = 0
+        self._offset = 0
+        self._done = True
+        self._converters = []
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def execute(self, sql: str, parameters=None):
+        """Executes an SQL request
+
+        :param sql: the SQL request
+        :param parameters: not supported, the request must not contain parameters
+        """
+        if parameters:
+            raise AvaticaError("Parameters are not supported")
+        response = self.connection.send("prepareAndExecute", statementId=self.statement_id, sql=sql,
+                                        maxRowCount=-1, maxRowsTotal=-1,
+                                        maxRowsInFirstFrame=self.connection.frame_size)
+        if response.get("missingStatement"):
+            self.statement_id = self.connection.send("createStatement")["statementId"]
+            return self.execute(sql)
+        result = response["results"][0]
+        columns = (result.get("signature") or {}).get("columns") or []
+        self.description = [(c.get("label") or c["columnName"], c["type"]["name"], c.get("displaySize"), None,
+                             c.get("precision"), c.get("scale"), c.get("nullable")) for c in columns]
+        self._converters = [c["type"].get("id") for c in columns]
+        self.rowcount = result.get("updateCount", -1)
+        self._offset = 0
+        self.__set_frame(result.get("firstFrame") or {"rows": [], "done": True})
+
+    def __set_frame(self, frame):
+        self._rows = frame.get("rows") or []
+        self._position = 0
+        self._offset += len(self._rows)
+        self._done = frame.get("done", True)
+
+    def __next_frame(self):
+        """Fetches the next frame of the result, returns False if the result is exhausted"""
+        while self._position >= len(self._rows):
+            if self._done:
+                return False
+            response = self.connection.send("fetch", statementId=self.statement_id, offset=self._offset,
+                                            frameMaxSize=self.connection.frame_size)
+            self.__set_frame(response["frame"])
+        return True
+
+    def __take(self, size):
+        """Returns the raw rows of at most size rows, None for all the remaining rows"""
+        taken = []
+        while (size is None or len(taken) < size) and self.__next_frame():
+            end = len(self._rows) if size is None else self._position + size - len(taken)
+            taken.extend(self._rows[self._position:end])
+            self._position = min(end, len(self._rows))
+        if self._position >= len(self._rows):
+            self._rows = []
+            self._position = 0
+        return taken
+
+    def fetchone(self):
+        """Returns the next row, or None if there is none"""
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size: int = None):
+        """Returns a list of at most size rows
+
+        :param size: the maximum number of rows, the arraysize of the cursor by default
+        """
+        return self.__to_tuples(self.__take(self.arraysize if size is None else size))
+
+    def fetchall(self):
+        """Returns all the remaining rows"""
+        return self.__to_tuples(self.__take(None))
+
+    def fetchmany_columns(self, size: int = None):
+        """Returns at most size rows as a dictionary of columns, None if there is no row left.
+        Temporal columns are numpy datetime64 arrays, the other columns are lists.
+
+        :param size: the maximum number of rows, all the remaining rows if None
+        """
+        rows = self.__take(size)
+        if not rows:
+            return None
+        names = [d[0] for d in self.description]
+        columns = list(zip(*rows)) if names else []
+        return {name: self.__convert_column(type_id, column)
+                for name, type_id, column in zip(names, self._converters, columns)}
+
+    def __to_tuples(self, rows):
+        temporal = [i for i, type_id in enumerate(self._converters)
+                    if type_id in TIMESTAMP_TYPES or type_id in DATE_TYPES or type_id in TIME_TYPES]
+        if not temporal:
+            return [tuple(row) for row in rows]
+        result = []
+        for row in rows:
+            row = list(row)
+            for i in temporal:
+                row[i] = self.__convert_value(self._converters[i], row[i])
+            result.append(tuple(row))
+        return result
+
+    @staticmethod
+    def __convert_value(type_id, value):
+        if value is None or not isinstance(value, (int, float)):
+            return value
+        if type_id in DATE_TYPES:
+            return (EPOCH + timedelta(days=value)).date()
+        if type_id in TIME_TYPES:
+            return (EPOCH + timedelta(milliseconds=value)).time()
+        return EPOCH + timedelta(milliseconds=value)
+
+    @staticmethod
+    def __convert_column(type_id, column):
+        if type_id in TIMESTAMP_TYPES or type_id in DATE_TYPES:
+            values = pandas.Series(column)
+            if values.dtype == object and values.notna().any():
+                return pandas.to_datetime(values).to_numpy()
+            unit = TIMESTAMP_TYPES.get(type_id) or DATE_TYPES[type_id]
+            return pandas.to_datetime(values.astype("float64"), unit=unit).to_numpy()
+        return list(column)
+
+    def close(self):
+        """Closes the statement on the server"""
+        if self.statement_id is not None and not self.connection.closed:
+            self.connection.send("closeStatement", statementId=self.statement_id)
+        self.statement_id = None
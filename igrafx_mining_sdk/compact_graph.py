@@ -0,0 +1,355 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import threading
+import numpy as np
+from igrafx_mining_sdk.graph import Graph, GraphInstance
+from igrafx_mining_sdk.json_decoding import loads
+
+MISSING = object()
+
+
+class StringPool:
+    """Interns the strings of graphs, such as activity names and vertex IDs, as integer codes.
+    Each compact graph has its own pool by default, freed with it. Graphs built with the same pool store a string
+    they share once, for as long as the pool is kept."""
+    def __init__(self):
+        """Initializes the StringPool class."""
+        self._codes = {}
+        self._strings = []
+        self._lock = threading.Lock()
+
+    def code(self, string: str):
+        """Returns the code of a string, interning it if needed
+
+        :param string: the string to intern
+        """
+        code = self._codes.get(string)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(string)
+                if code is None:
+                    code = len(self._strings)
+                    self._strings.append(string)
+                    self._codes[string] = code
+        return code
+
+    def codes(self, strings: list):
+        """Returns the codes of a list of strings, interning the new ones
+
+        :param strings: the strings to intern
+        """
+        get = self._codes.get
+        codes = [get(string) for string in strings]
+        if None in codes:
+            with self._lock:
+                new = [string for string in dict.fromkeys(strings) if string not in self._codes]
+                self._codes.update(zip(new, range(len(self._strings), len(self._strings) + len(new))))
+                self._strings += new
+            codes = [get(string) for string in strings]
+        return codes
+
+    def string(self, code: int):
+        """Returns the string of a code
+
+        :param code: the code returned by the code method
+        """
+        return self._strings[code]
+
+    def __len__(self):
+        return len(self._strings)
+
+
+class Columns:
+    """The attributes of a list of nodes or edges, stored column by column.
+    Strings are stored as int32 codes of a StringPool, integers as int64, numbers as float64 and booleans as int8,
+    with a mask of the present values when some records lack the attribute. Other values, such as lists, are kept as
+    they are in a sparse dictionary."""
+    def __init__(self, records: list, pool: StringPool):
+        """Initializes the Columns class.
+
+        :param records: the attribute dictionaries, one per node or edge
+        :param pool: the StringPool of the strings
+        """
+        self.pool = pool
+        self.columns = {}  # name -> (kind, values, mask of the present values or None)
+        names = {}
+        for record in records:
+            names.update(dict.fromkeys(record))
+        for name in names:
+            values = [record.get(name, MISSING) for record in records]
+            self.columns[name] = self.__column(values)
+
+    def __column(self, values):
+        """Returns the kind, the values and the mask of the present values of a column"""
+        present = [value is not MISSING for value in values]
+        mask = None if all(present) else np.array(present, dtype=bool)
+        kinds = {type(value) for value in values if value is not MISSING}
+        if kinds == {str}:
+            return "str", np.array([-1 if v is MISSING else self.pool.code(v) for v in values], dtype=np.int32), None
+        if kinds == {bool}:
+            return "bool", np.array([v is True for v in values], dtype=np.int8), mask
+        if kinds == {int}:
+            return "int", np.array([0 if v is MISSING else v for v in values], dtype=np.int64), mask
+        if kinds and kinds <= {int, float}:
+            return "float", np.array([0.0 if v is MISSING else v for v in values], dtype=np.float64), mask
+        return "object", {i: v for i, v in enumerate(values) if v is not MISSING}, None
+
+    def value(self, name, index):
+        """Returns the value of an attribute of a record, or MISSING if the record lacks it
+
+        :param name: the name of the attribute
+        :param index: the index of the record
+        """
+        kind, values, mask = self.columns[name]
+        if kind == "object":
+            return values.get(index, MISSING)
+        if kind == "str":
+            code = values[index]
+            return MISSING if code < 0 else self.pool.string(code)
+        if mask is not None and not mask[index]:
+            return MISSING
+        return {"bool": bool, "int": int, "float": float}[kind](values[index])
+
+    def record(self, index):
+        """Returns the attribute dictionary of a record
+
+        :param index: the index of the record
+        """
+        record = {}
+        for name in self.columns:
+            value = self.value(name, index)
+            if value is not MISSING:
+                record[name] = value
+        return record
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes of the NumPy arrays of the columns"""
+        return sum(values.nbytes + (0 if mask is None else mask.nbytes)
+                   for kind, values, mask in self.columns.values() if kind != "object")
+
+
+class CompactGraph:
+    """A graph from a iGrafx P360 Live Mining project stored in arrays, which takes a fraction of the memory of a
+    networkx Graph and is faster to build.
+    Nodes are numbered in the order they were added and their IDs are interned in a StringPool. Edges are stored as a
+    compressed sparse row adjacency: the successors of node i are indices[indptr[i]:indptr[i + 1]]. The attributes of
+    the nodes and edges are stored in Columns.
+    The equivalent networkx Graph is built by to_networkx on the first call, and the attributes and methods of
+    networkx graphs that CompactGraph lacks are those of this Graph."""
+    def __init__(self, project_id: str, nodes_list: list, edges_list: list, pool: StringPool = None):
+        """Initializes a compact graph from the same nodes and edges as a Graph
+
+        :param project_id: the ID of the parent project
+        :param nodes_list: the list of (node ID, attribute dictionary) of the nodes
+        :param edges_list: the list of (source ID, destination ID) or (source ID, destination ID, attribute
+            dictionary) of the edges
+        :param pool: the StringPool of the strings of the graph, a new one by default
+        """
+        self.project_id = project_id
+        if pool is None:
+            pool = StringPool()
+        self.pool = pool
+        self._networkx = None
+        # Like networkx, a node or an edge added twice keeps its first position and merges its attributes
+        nodes = {}
+        for node_id, attributes in nodes_list:
+            nodes.setdefault(node_id, {}).update(attributes)
+        edges = {}
+        for edge in edges_list:
+            nodes.setdefault(edge[0], {})
+            nodes.setdefault(edge[1], {})
+            attributes = edges.setdefault((edge[0], edge[1]), {})
+            if len(edge) > 2:
+                attributes.update(edge[2])
+
+        index = {node_id: i for i, node_id in enumerate(nodes)}
+        self._node_index = None
+        self.node_ids = np.array([pool.code(node_id) for node_id in nodes], dtype=np.int32)
+        self.node_columns = Columns(list(nodes.values()), pool)
+        sources = np.array([index[source] for source, _ in edges], dtype=np.int32)
+        destinations = np.array([index[destination] for _, destination in edges], dtype=np.int32)
+        order = np.argsort(sources, kind="stable")
+        self.indices = destinations[order]
+        self.indptr = np.zeros(len(nodes) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=len(nodes)), out=self.indptr[1:])
+        edge_records = list(edges.values())
+        self.edge_columns = Columns([edge_records[i] for i in order], pool)
+        self._sources = None
+
+    @classmethod
+    def from_dict(cls, project_id, jgraph, pool: StringPool = None):
+        """Creates a CompactGraph based on the dictionary representation of the graph
+
+        :param project_id: the ID of the project the graph is in
+        :param jgraph: the dictionary we want to parse the graph from
+        :param pool: the StringPool of the strings of the graph, a new one by default
+        """
+        nodes_list = [(item["id"], item) for item in jgraph["vertices"]]
+        edges_list = [(item["source"], item["destination"], item) for item in jgraph["edges"]]
+        return cls(project_id, nodes_list, edges_list, pool=pool)
+
+    # The attributes are copied into columns, so the dictionaries decoded by the SDK are read like any other
+    _from_decoded = from_dict
+
+    @classmethod
+    def from_json(cls, project_id, path):
+        """Creates a compact graph based on the JSON returned by the iGrafx Mining Public API
+
+        :param project_id: the ID of the project the graph is in
+        :param path: the path to the JSON file we want to parse the graph from
+        """
+        with open(path, 'rb') as f:
+            jgraph = loads(f.read())
+        return cls.from_dict(project_id, jgraph)
+
+    @property
+    def _index(self):
+        """Returns the index of each node ID, built on the first lookup of a node rather than kept by every graph"""
+        if self._node_index is None:
+            self._node_index = {self.pool.string(code): i for i, code in enumerate(self.node_ids)}
+        return self._node_index
+
+    def number_of_nodes(self):
+        """Returns the number of nodes"""
+        return len(self.node_ids)
+
+    def number_of_edges(self):
+        """Returns the number of edges"""
+        return len(self.indices)
+
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def __iter__(self):
+        return (self.pool.string(code) for code in self.node_ids)
+
+    def __contains__(self, node_id):
+        return node_id in self._index
+
+    def has_node(self, node_id):
+        """Returns True if the graph has a node
+
+        :param node_id: the ID of the node
+        """
+        return node_id in self._index
+
+    def __edge_position(self, source, destination):
+        """Returns the position of an edge in the adjacency, or None if the graph lacks it"""
+        i, j = self._index.get(source), self._index.get(destination)
+        if i is None or j is None:
+            return None
+        positions = np.flatnonzero(self.indices[self.indptr[i]:self.indptr[i + 1]] == j)
+        return int(self.indptr[i] + positions[0]) if len(positions) else None
+
+    def has_edge(self, source, destination):
+        """Returns True if the graph has an edge
+
+        :param source: the ID of the source node
+        :param destination: the ID of the destination node
+        """
+        return self.__edge_position(source, destination) is not None
+
+    def successors(self, node_id):
+        """Returns an iterator over the successors of a node
+
+        :param node_id: the ID of the node
+        """
+        i = self._index[node_id]
+        return (self.pool.string(self.node_ids[j]) for j in self.indices[self.indptr[i]:self.indptr[i + 1]])
+
+    def predecessors(self, node_id):
+        """Returns an iterator over the predecessors of a node, in the order of the nodes
+
+        :param node_id: the ID of the node
+        """
+        j = self._index[node_id]
+        if self._sources is None:
+            self._sources = np.repeat(np.arange(len(self.node_ids), dtype=np.int32), np.diff(self.indptr))
+        return (self.pool.string(self.node_ids[i]) for i in self._sources[self.indices == j])
+
+    def node_attributes(self, node_id):
+        """Returns the attribute dictionary of a node
+
+        :param node_id: the ID of the node
+        """
+        return self.node_columns.record(self._index[node_id])
+
+    def edge_attributes(self, source, destination):
+        """Returns the attribute dictionary of an edge
+
+        :param source: the ID of the source node
+        :param destination: the ID of the destination node
+        """
+        position = self.__edge_position(source, destination)
+        if position is None:
+            raise KeyError(f"The edge {source} -> {destination} is not in the graph")
+        return self.edge_columns.record(position)
+
+    def edge_list(self):
+        """Returns the list of the (source ID, destination ID) of the edges"""
+        ids = [self.pool.string(code) for code in self.node_ids]
+        sources = np.repeat(np.arange(len(ids)), np.diff(self.indptr))
+        return [(ids[i], ids[j]) for i, j in zip(sources, self.indices)]
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes of the arrays of the graph, without its StringPool"""
+        return (self.node_ids.nbytes + self.indptr.nbytes + self.indices.nbytes + self.node_columns.nbytes
+                + self.edge_columns.nbytes)
+
+    def _networkx_lists(self):
+        """Returns the nodes and edges lists of the equivalent networkx graph"""
+        ids = [self.pool.string(code) for code in self.node_ids]
+        nodes_list = [(node_id, self.node_columns.record(i)) for i, node_id in enumerate(ids)]
+        edges_list = [(source, destination, self.edge_columns.record(position))
+                      for position, (source, destination) in enumerate(self.edge_list())]
+        return nodes_list, edges_list
+
+    def to_networkx(self):
+        """Returns the equivalent networkx Graph, built on the first call"""
+        if self._networkx is None:
+            nodes_list, edges_list = self._networkx_lists()
+            self._networkx = Graph(self.project_id, nodes_list, edges_list)
+        return self._networkx
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.to_networkx(), name)
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(project_id={self.project_id!r}, nodes={self.number_of_nodes()}, "
+                f"edges={self.number_of_edges()})")
+
+
+class CompactGraphInstance(CompactGraph):
+    """A graph instance from a iGrafx P360 Live Mining project stored in arrays, like a CompactGraph"""
+    def __init__(self, project_id: str, nodes_list: list, edges_list: list, rework_total: int, concurrency_rate: float,
+                 pool: StringPool = None):
+        super().__init__(project_id, nodes_list, edges_list, pool=pool)
+        self.rework_total = rework_total
+        self.concurrency_rate = concurrency_rate
+
+    @classmethod
+    def from_dict(cls, project_id, jgraph, pool: StringPool = None):
+        """Creates a CompactGraphInstance based on the dictionary representation of the graph instance
+
+        :param project_id: the ID of the project the graph instance is in
+        :param jgraph: the dictionary we want to parse the graph instance from
+        :param pool: the StringPool of the strings of the graph instance, a new one by default
+        """
+        nodes_list = [(item["id"], item) for item in jgraph["vertexInstances"]]
+        edges_list = [(item["source"]["id"], item["destination"]["id"]) for item in jgraph["edgeInstances"]]
+        return cls(project_id, nodes_list, edges_list, jgraph["reworkTotal"], jgraph["concurrencyRate"], pool=pool)
+
+    _from_decoded = from_dict
+
+    def to_networkx(self):
+        """Returns the equivalent networkx GraphInstance, built on the first call"""
+        if self._networkx is None:
+            nodes_list, edges_list = self._networkx_lists()
+            self._networkx = GraphInstance(self.project_id, nodes_list, [edge[:2] for edge in edges_list],
+                                           self.rework_total, self.concurrency_rate)
+        return self._networkx
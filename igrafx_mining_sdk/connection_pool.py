@@ -0,0 +1,204 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import contextlib
+import threading
+import time
+
+
+class ConnectionPool:
+    """A thread-safe pool of SQL connections, shared by the datasources of a workgroup.
+    Connections are opened when no idle one is available, up to max_size connections at once.
+    Beyond that, a checkout waits for a connection to be checked in.
+    An idle connection is validated with a small query before it is reused if it has been idle for more than
+    validation_interval seconds, and closed if it has been idle for more than max_idle_time seconds."""
+    def __init__(self, connect, max_size: int = 4, timeout: float = 30.0, validation_query: str = "SELECT 1",
+                 validation_interval: float = 30.0, max_idle_time: float = 600.0, clock=time.monotonic):
+        """Initializes the ConnectionPool class.
+
+        :param connect: The function opening a new DB-API connection
+        :param max_size: The maximum number of connections open at once
+        :param timeout: The maximum number of seconds a checkout waits for a connection, None to wait forever
+        :param validation_query: The query run on an idle connection to check that it still works
+        :param validation_interval: The number of seconds a connection can stay idle without being validated
+        :param max_idle_time: The number of seconds after which an idle connection is closed
+        :param clock: The function returning the current time in seconds
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be strictly positive")
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.validation_query = validation_query
+        self.validation_interval = validation_interval
+        self.max_idle_time = max_idle_time
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._idle = []  # (connection, time of its checkin), the most recently used last
+        self._in_use = set()
+        self._opening = 0
+        self.closed = False
+        self.opened_count = 0
+        self.reused_count = 0
+        self.discarded_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def size(self):
+        """Returns the number of open connections, idle or checked out"""
+        with self._condition:
+            return len(self._idle) + len(self._in_use)
+
+    @property
+    def idle(self):
+        """Returns the number of idle connections"""
+        with self._condition:
+            return len(self._idle)
+
+    @property
+    def in_use(self):
+        """Returns the number of checked out connections"""
+        with self._condition:
+            return len(self._in_use)
+
+    def acquire(self):
+        """Checks out a connection, which must be checked back in with release.
+        It is an idle connection if one still works, or a new connection if the pool is not full.
+        Otherwise, it waits until a connection is checked in, and raises a TimeoutError after timeout seconds."""
+        deadline = None if self.timeout is None else self._clock() + self.timeout
+        for connection in self.__take_expired():
+            self.__close_quietly(connection)
+        while True:
+            with self._condition:
+                connection, idle_since = self.__checkout(deadline)
+            if connection is None:
+                return self.__open()
+            if self._clock() - idle_since <= self.validation_interval or self.__is_valid(connection):
+                with self._condition:
+                    self.reused_count += 1
+                return connection
+            self.__discard(connection)
+
+    def __checkout(self, deadline):
+        """Returns an idle connection and the time it was checked in, or (None, None) if a connection can be opened.
+        Must be called with the lock held."""
+        while True:
+            if self.closed:
+                raise Exception("The connection pool is closed")
+            if self._idle:
+                connection, idle_since = self._idle.pop()
+                self._in_use.add(connection)
+                return connection, idle_since
+            if len(self._in_use) + self._opening < self.max_size:
+                self._opening += 1
+                return None, None
+            remaining = None if deadline is None else deadline - self._clock()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"No connection was checked in within {self.timeout} seconds")
+            self._condition.wait(remaining)
+
+    def __open(self):
+        """Opens a new connection, in place of the slot reserved by __checkout"""
+        try:
+            connection = self._connect()
+        except BaseException:
+            with self._condition:
+                self._opening -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opening -= 1
+            self._in_use.add(connection)
+            self.opened_count += 1
+        return connection
+
+    def __take_expired(self):
+        """Removes and returns the connections idle for more than max_idle_time seconds"""
+        with self._condition:
+            now = self._clock()
+            expired = [connection for connection, idle_since in self._idle if now - idle_since > self.max_idle_time]
+            self._idle = [(connection, idle_since) for connection, idle_since in self._idle
+                          if now - idle_since <= self.max_idle_time]
+            return expired
+
+    def __is_valid(self, connection):
+        """Returns True if the validation query succeeds on a connection"""
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(self.validation_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def __discard(self, connection):
+        """Closes a checked out connection and frees its slot"""
+        with self._condition:
+            self._in_use.discard(connection)
+            self.discarded_count += 1
+            self._condition.notify()
+        self.__close_quietly(connection)
+
+    def release(self, connection, discard: bool = False):
+        """Checks a connection back in, so that it can be reused
+
+        :param connection: The connection returned by acquire
+        :param discard: Close the connection rather than reuse it, if it is known to be broken
+        """
+        with self._condition:
+            if connection not in self._in_use:
+                raise ValueError("The connection was not checked out from this pool")
+            self._in_use.discard(connection)
+            keep = not discard and not self.closed
+            if keep:
+                self._idle.append((connection, self._clock()))
+            elif discard:
+                self.discarded_count += 1
+            self._condition.notify()
+        if not keep:
+            self.__close_quietly(connection)
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Checks out a connection for the duration of the context.
+        If the context raised a network error, or another error after which the validation query fails, the
+        connection is discarded rather than reused. After errors of the query itself, or when the context is left
+        early, such as a generator of results closed before its end, it is checked back in."""
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception as error:
+            self.release(connection, discard=isinstance(error, OSError) or not self.__is_valid(connection))
+            raise
+        except BaseException:
+            self.release(connection)
+            raise
+        self.release(connection)
+
+    def close(self):
+        """Closes the idle connections. The checked out connections are closed when they are checked in."""
+        with self._condition:
+            self.closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle = []
+            self._condition.notify_all()
+        for connection in idle:
+            self.__close_quietly(connection)
+
+    @staticmethod
+    def __close_quietly(connection):
+        try:
+            connection.close()
+        except Exception as e:
+            print(f"Error closing connection: {e}")
+
+    def __repr__(self):
+        return f"ConnectionPool(max_size={self.max_size}, idle={self.idle}, in_use={self.in_use})"
@@ -0,0 +1,64 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import threading
+import time
+
+
+class DataVersionWatcher:
+    """Tracks the data version of a workgroup, which changes whenever data is ingested in one of its projects.
+    The version is asked for at most every check_interval seconds, so that the objects memoizing data from the
+    workgroup can check it before every use of their memoized data without sending a request each time."""
+    def __init__(self, fetch_version, check_interval: float = 5.0, clock=time.monotonic):
+        """Initializes the DataVersionWatcher class.
+
+        :param fetch_version: the function requesting the current data version
+        :param check_interval: the number of seconds during which a data version is trusted without asking for it
+            again, 0 to ask for it every time
+        :param clock: the function returning the current time in seconds
+        """
+        self._fetch_version = fetch_version
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        self._fingerprints = {}  # Key -> {data version: fingerprint}, for the last two data versions
+        self.check_count = 0
+
+    def current(self):
+        """Returns the data version, asking for it again if it was last checked more than check_interval seconds ago.
+        When several threads need a new version at once, only one of them asks for it."""
+        with self._lock:
+            if self._checked_at is None or self._clock() - self._checked_at >= self.check_interval:
+                self._version = self._fetch_version()
+                self._checked_at = self._clock()
+                self.check_count += 1
+            return self._version
+
+    def fingerprint(self, key, version, fetch=None):
+        """Returns the fingerprint of an object of the workgroup, such as the latest files of a project, at a data
+        version. It is fetched at most once per data version and shared by all the users of the watcher, so that the
+        objects memoizing the same data do not ask for it each. Returns None if it was not fetched for this version
+        and fetch is None.
+
+        :param key: the object, such as the ID of a project
+        :param version: the data version
+        :param fetch: the function requesting the fingerprint, None to only return a known one
+        """
+        with self._lock:
+            fingerprints = self._fingerprints.get(key, {})
+            if version in fingerprints or fetch is None:
+                return fingerprints.get(version)
+        fingerprint = fetch()
+        with self._lock:
+            fingerprints = self._fingerprints.setdefault(key, {})
+            fingerprints[version] = fingerprint
+            while len(fingerprints) > 2:
+                del fingerprints[next(iter(fingerprints))]
+        return fingerprint
+
+    def expire(self):
+        """Makes the next call to current ask for the data version, for instance after adding a file"""
+        with self._lock:
+            self._checked_at = None
@@ -1,40 +1,85 @@
 # MIT License, Copyright 2023 iGrafx
 # https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import contextlib
 import pandas
 import jaydebeapi
 from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.avatica import AvaticaError
+from igrafx_mining_sdk.data_version import DataVersionWatcher
+from igrafx_mining_sdk.query_cache import QueryCache
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - depends on the installed extras
+    pyarrow = None
+
+SQL_TRANSPORTS = ("jdbc", "avatica")
+# The errors raised by the SQL transports when the datasource rejects a request, such as one using unknown functions
+SQL_ERRORS = (jaydebeapi.DatabaseError, AvaticaError)
+
+# pandas dtypes of the DB-API type codes of the JDBC driver
+DBAPI_DTYPES = [
+    (jaydebeapi.NUMBER, "Int64"),
+    (jaydebeapi.FLOAT, "float64"),
+    (jaydebeapi.DECIMAL, "float64"),
+    (jaydebeapi.DATETIME, "datetime64[ns]"),
+    (jaydebeapi.DATE, "datetime64[ns]"),
+    (jaydebeapi.STRING, "string"),
+    (jaydebeapi.TEXT, "string"),
+]
+# pandas dtypes of the JDBC type names given as type codes by the Avatica transport
+JDBC_TYPE_DTYPES = {
+    "TINYINT": "Int64", "SMALLINT": "Int64", "INTEGER": "Int64", "BIGINT": "Int64",
+    "BOOLEAN": "boolean",
+    "FLOAT": "float64", "REAL": "float64", "DOUBLE": "float64", "DECIMAL": "float64", "NUMERIC": "float64",
+    "TIMESTAMP": "datetime64[ns]", "DATE": "datetime64[ns]",
+    "CHAR": "string", "VARCHAR": "string", "OTHER": "object",
+}
+DTYPE_BACKENDS = (None, "numpy_nullable", "pyarrow")
+# Arrow types of the pandas dtypes of the columns, the other columns take the type of their values
+ARROW_TYPES = {} if pyarrow is None else {
+    "Int64": pyarrow.int64(),
+    "boolean": pyarrow.bool_(),
+    "float64": pyarrow.float64(),
+    "datetime64[ns]": pyarrow.timestamp("ns"),
+    "string": pyarrow.string(),
+}
 
 
 class Datasource:
     """A Druid table that can be requested by the user"""
-    def __init__(self, name: str, ds_type: str, api_connector: APIConnector):
+    def __init__(self, name: str, ds_type: str, api_connector: APIConnector, sql_transport: str = None):
         """Initialise a datasource
 
         :param name: the name of the datasource
         :param ds_type: the type of the datasource
         :param api_connector: an APIConnector object that can be used to send requests to the datasource
+        :param sql_transport: how SQL requests are sent, "jdbc" for the Avatica JDBC driver run in a JVM or
+            "avatica" for the Avatica JSON protocol spoken from Python. Defaults to the transport of the APIConnector
         """
 
         self.name = name
         self.type = ds_type
         self.api_connector = api_connector
+        if sql_transport is not None and sql_transport not in SQL_TRANSPORTS:
+            raise ValueError(f"sql_transport must be one of {SQL_TRANSPORTS}")
+        self.sql_transport = sql_transport
         self._connection = None
         self._cursor = None
         self._columns = None
+        self._columns_version = None
         self._closed = False
 
     @property
     def connection(self):
-        """Returns a JDBC connection to Druid using Avatica."""
+        """Returns a connection to Druid using Avatica, through the JDBC driver or the Avatica JSON protocol.
+        The connection is opened for the datasource, outside the pool of the workgroup, so that holding it does not
+        take a connection from the requests of the other datasources, and closed by close_ds_connection. The requests
+        of the datasource do not need it: they borrow a connection from the pool for their own duration."""
         if self._closed:
             return None
         if self._connection is None:
-            self._connection = jaydebeapi.connect(
-                self.api_connector.jdbc_driver_class,  # Avatica JDBC driver class
-                self.api_connector.jdbc_url,  # JDBC URL for Avatica
-                [self.api_connector.wg_id, self.api_connector.wg_key],  # User & Password
-                self.api_connector.jdbc_driver_path  # Path to Avatica JDBC driver .jar file
-            )
+            self._connection = self.api_connector.connect_sql(self.sql_transport)
         return self._connection
 
     @property
@@ -46,33 +91,245 @@ class Datasource:
             self._cursor = self.connection.cursor()
         return self._cursor
 
-    def request(self, sqlreq):
-        """Sends an SQL request to the datasource and returns the results as a pandas Dataframe
+    @contextlib.contextmanager
+    def __borrow(self):
+        """Yields the connection held by the datasource if there is one, or else a connection checked out from the
+        pool of the workgroup and checked back in when the context exits"""
+        if self._closed:
+            raise Exception("Datasource connection is not initialized. The datasource connection is probably closed.")
+        if self._connection is not None:
+            yield self._connection
+            return
+        with self.api_connector.sql_pool(self.sql_transport).connection() as connection:
+            yield connection
+
+    def request(self, sqlreq, dtype_backend: str = None, dictionary_encode: bool = False, use_cache: bool = True):
+        """Sends an SQL request to the datasource and returns the results as a pandas Dataframe.
+        By default, pandas infers the dtypes of the columns from their values.
+        With dtype_backend="numpy_nullable", the columns have the dtypes of the column types of the result, as the
+        chunks of iter_request, so integer columns use the nullable Int64 dtype and strings the string dtype.
+        With dtype_backend="pyarrow", the Dataframe is backed by the Arrow table returned by request_arrow,
+        which stores strings and missing values more compactly.
+        If the workgroup has a QueryCache, the results of read requests are served from it while they are fresh.
 
         :param sqlreq: the SQL request to execute
+        :param dtype_backend: None, "numpy_nullable" or "pyarrow"
+        :param dictionary_encode: with the pyarrow backend, turn the string columns into categorical columns,
+            which are smaller and faster to group by when their values repeat, such as case IDs and activities
+        :param use_cache: look the request up in the QueryCache of the workgroup, if it has one
+        """
+        if dtype_backend not in DTYPE_BACKENDS:
+            raise ValueError(f"dtype_backend must be one of {DTYPE_BACKENDS}")
+        cache = getattr(self.api_connector, "query_cache", None)
+        if not use_cache or not isinstance(cache, QueryCache) or not cache.is_cacheable(sqlreq):
+            return self.__request(sqlreq, dtype_backend, dictionary_encode)
+        key = cache.key(self.name, sqlreq, dtype_backend=dtype_backend, dictionary_encode=dictionary_encode)
+        result = cache.get(key)
+        if result is None:
+            result = self.__request(sqlreq, dtype_backend, dictionary_encode)
+            cache.put(key, result)
+        return result
+
+    def __request(self, sqlreq, dtype_backend, dictionary_encode):
+        """Sends an SQL request to the datasource and returns the results as a pandas Dataframe"""
+        if dtype_backend == "pyarrow":
+            table = self.request_arrow(sqlreq, dictionary_encode=dictionary_encode)
+            # Dictionary columns become categorical columns rather than Arrow dictionaries, which pandas groups slowly
+            return table.to_pandas(types_mapper=lambda arrow_type: None if pyarrow.types.is_dictionary(arrow_type)
+                                   else pandas.ArrowDtype(arrow_type))
+        if dtype_backend == "numpy_nullable":
+            with self.__execute(sqlreq) as cursor:
+                return pandas.concat(self.__iter_frames(cursor, 10000, empty=True), ignore_index=True)
+        with self.__execute(sqlreq) as cur:
+            cols = [i[0] for i in cur.description]
+            if hasattr(cur, "fetchmany_columns"):
+                return pandas.DataFrame(cur.fetchmany_columns() or {col: [] for col in cols}, columns=cols)
+            rows = cur.fetchall()
+            return pandas.DataFrame(rows, columns=cols)
+
+    def iter_request(self, sqlreq, chunk_size=10000):
+        """Sends an SQL request to the datasource and yields the results as pandas Dataframes of at most chunk_size
+        rows, fetched one chunk at a time, so that only one chunk of the result is held in memory.
+        Every chunk has the same dtypes, taken from the column types of the result, or from the first chunk when the
+        driver does not give them. Integer columns use the nullable Int64 dtype.
+        The request uses its own cursor, which is closed once the results are consumed or the iteration is stopped.
+
+        :param sqlreq: the SQL request to execute
+        :param chunk_size: the maximum number of rows of each Dataframe
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be strictly positive")
+        with self.__execute(sqlreq) as cursor:
+            yield from self.__iter_frames(cursor, chunk_size)
+
+    def request_arrow(self, sqlreq, chunk_size=10000, dictionary_encode: bool = False):
+        """Sends an SQL request to the datasource and returns the results as a pyarrow Table.
+        The rows are fetched chunk_size at a time and each chunk is turned into one Arrow array per column, typed with
+        the column types of the result, or with the type of the first chunk when the driver does not give them.
+        The table holds the arrays of all the chunks without copying them into a single buffer.
+        It requires pyarrow, which is installed with 'pip install igrafx_mining_sdk[arrow]'.
+
+        :param sqlreq: the SQL request to execute
+        :param chunk_size: the maximum number of rows converted at once
+        :param dictionary_encode: store each distinct value of the string columns once,
+            with a dictionary shared by all the chunks
+        """
+        if pyarrow is None:
+            raise ImportError("Arrow results require pyarrow. "
+                              "Install it with 'pip install igrafx_mining_sdk[arrow]'.")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be strictly positive")
+        with self.__execute(sqlreq) as cursor:
+            cols = [i[0] for i in cursor.description]
+            types = [ARROW_TYPES.get(self.__dtype_from_type_code(i[1])) for i in cursor.description]
+            arrays = [[] for _ in cols]
+            for columns in self.__iter_columns(cursor, chunk_size):
+                for chunks, arrow_type, values in zip(arrays, types, columns):
+                    array = self.__to_arrow(values, arrow_type)
+                    if dictionary_encode and pyarrow.types.is_string(array.type):
+                        array = array.dictionary_encode()
+                    chunks.append(array)
+        fields = []
+        for chunks, arrow_type in zip(arrays, types):
+            # Columns of unknown type take the type of their first chunk that is not entirely null
+            arrow_type = arrow_type or next((c.type for c in chunks if c.type != pyarrow.null()), pyarrow.string())
+            if dictionary_encode and pyarrow.types.is_string(arrow_type):
+                arrow_type = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+            fields.append(pyarrow.chunked_array([c.cast(arrow_type) for c in chunks], type=arrow_type))
+        table = pyarrow.Table.from_arrays(fields, names=cols)
+        return table.unify_dictionaries() if dictionary_encode else table
+
+    @contextlib.contextmanager
+    def __execute(self, sqlreq):
+        """Executes an SQL request on a new cursor of a borrowed connection, which are released when the context exits
+
+        :param sqlreq: the SQL request to execute
+        """
+        with self.__borrow() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sqlreq)
+                yield cursor
+            finally:
+                cursor.close()
+
+    def __iter_frames(self, cursor, chunk_size, empty=False):
+        """Yields the rows of an executed cursor as Dataframes with the same dtypes
+
+        :param cursor: the executed cursor
+        :param chunk_size: the maximum number of rows of each Dataframe
+        :param empty: yield an empty Dataframe with the columns of the result if it has no row
+        """
+        cols = [i[0] for i in cursor.description]
+        dtypes = [self.__dtype_from_type_code(i[1]) for i in cursor.description]
+        for columns in self.__iter_columns(cursor, chunk_size):
+            data = {}
+            for position, values in enumerate(columns):
+                if dtypes[position] is None:
+                    dtypes[position] = self.__infer_dtype(pandas.Series(values))
+                data[position] = self.__to_series(values, dtypes[position])
+            empty = False
+            yield self.__frame(data, cols)
+        if empty:
+            yield self.__frame({position: pandas.Series([], dtype=dtype or "object")
+                                for position, dtype in enumerate(dtypes)}, cols)
+
+    @staticmethod
+    def __frame(data, cols):
+        """Returns a Dataframe of columns given by position, which allows several columns with the same name"""
+        frame = pandas.DataFrame(data)
+        frame.columns = cols
+        return frame
+
+    @staticmethod
+    def __iter_columns(cursor, chunk_size):
+        """Yields the rows of an executed cursor as lists of columns of at most chunk_size values.
+        The rows are read as columns when the cursor supports it, without building a tuple per row.
+
+        :param cursor: the executed cursor
+        :param chunk_size: the maximum number of rows of each chunk
+        """
+        columnar = hasattr(cursor, "fetchmany_columns")
+        while True:
+            if columnar:
+                columns = cursor.fetchmany_columns(chunk_size)
+                if columns is None:
+                    break
+                yield list(columns.values())
+            else:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield list(zip(*rows))
+
+    @staticmethod
+    def __to_series(values, dtype):
+        """Returns the values of a column as a Series of the given dtype
+
+        :param values: the values of a chunk of the column
+        :param dtype: the pandas dtype of the column
         """
-        cur = self.cursor
-        if cur is None:
-            raise Exception("Datasource cursor is not initialized. The datasource connection is probably closed.")
-        self.cursor.execute(sqlreq)
-        rows = self.cursor.fetchall()
-        cols = [i[0] for i in self.cursor.description]
-        return pandas.DataFrame(rows, columns=cols)
-
-    def load_dataframe(self, load_limit=None):
+        if dtype.startswith("datetime"):
+            return pandas.to_datetime(pandas.Series(values))
+        return pandas.Series(values, dtype=dtype)
+
+    @staticmethod
+    def __to_arrow(values, arrow_type):
+        """Returns the values of a column as an Arrow array of the given type, or of the inferred type if None
+
+        :param values: the values of a chunk of the column
+        :param arrow_type: the Arrow type of the column
+        """
+        if arrow_type is not None and pyarrow.types.is_timestamp(arrow_type):
+            values = pandas.to_datetime(pandas.Series(values))
+        return pyarrow.array(values, type=arrow_type, from_pandas=True)
+
+    @staticmethod
+    def __dtype_from_type_code(type_code):
+        """Returns the pandas dtype of a DB-API type code, or None if it is unknown
+
+        :param type_code: the type code of a column of the cursor description
+        """
+        if isinstance(type_code, str):
+            return JDBC_TYPE_DTYPES.get(type_code.upper())
+        for dbapi_type, dtype in DBAPI_DTYPES:
+            if type_code is dbapi_type:
+                return dtype
+        return None
+
+    @staticmethod
+    def __infer_dtype(column):
+        """Returns the dtype the chunks of a column are given, from the values of the first chunk
+
+        :param column: the column of the first chunk
+        """
+        if pandas.api.types.is_bool_dtype(column):
+            return "boolean"
+        if pandas.api.types.is_integer_dtype(column):
+            return "Int64"
+        if pandas.api.types.is_float_dtype(column):
+            return "float64"
+        if pandas.api.types.infer_dtype(column, skipna=True) == "string":
+            return "string"
+        return "object"
+
+    def load_dataframe(self, load_limit=None, dtype_backend: str = None):
         """Loads an SQL request and returns as a dataframe
 
         :param load_limit: Maximum number of rows to load
+        :param dtype_backend: the dtypes of the columns, as in the request method
         """
         sqlreq = f'SELECT * FROM "{self.name}"'
         if load_limit is not None:
             sqlreq += f' LIMIT {load_limit}'
-        return self.request(sqlreq)
+        return self.request(sqlreq, dtype_backend=dtype_backend)
 
     @property
     def columns(self):
-        """Returns the columns of the datasource"""
-        if self._columns is None:
+        """Returns the columns of the datasource, requested again once the data version of the workgroup changed"""
+        watcher = getattr(self.api_connector, "data_version_watcher", None)
+        version = watcher.current() if isinstance(watcher, DataVersionWatcher) else None
+        if self._columns is None or version != self._columns_version:
             res = self.request(
                 "SELECT COLUMN_NAME, ORDINAL_POSITION, DATA_TYPE "
                 "FROM INFORMATION_SCHEMA.COLUMNS "
@@ -81,10 +338,11 @@ class Datasource:
                 "ORDER BY ORDINAL_POSITION"
             )
             self._columns = res["COLUMN_NAME"].to_list()
+            self._columns_version = version
         return self._columns
 
     def close_ds_connection(self):
-        """Closes the connection and the cursor when called"""
+        """Closes the cursor and the connection of the datasource"""
         if self._cursor is not None:
             try:
                 self._cursor.close()
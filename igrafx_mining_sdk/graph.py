@@ -3,11 +3,16 @@
 
 import json
 import networkx as nx
+from igrafx_mining_sdk.graph_index import GraphIndex
+from igrafx_mining_sdk.json_decoding import loads
 
 
 class Graph(nx.DiGraph):
     """A graph from a iGrafx P360 Live Mining project, created with the parent Project's ID,
     a list of nodes and a list of edges"""
+    _version = 0  # Incremented by every change of the nodes or edges, to tell whether the GraphIndex is up to date
+    _graph_index = None
+
     def __init__(self, project_id: str, nodes_list: list, edges_list: list):
         """Initializes a graph from a Mining project, created with the parent Project's ID
 
@@ -21,16 +26,188 @@ class Graph(nx.DiGraph):
         self.add_nodes_from(nodes_list)
         self.add_edges_from(edges_list)
 
+    def index(self):
+        """Returns the GraphIndex of the graph, to answer repeated reachability, path and loop queries.
+        It is built on the first call and kept with the graph, then built again once nodes or edges were added or
+        removed. After changing the attributes of the graph, call invalidate_index to build it again."""
+        graph_index = self._graph_index
+        if graph_index is None or graph_index.version != self._version:
+            graph_index = GraphIndex(self, version=self._version)
+            self._graph_index = graph_index
+        return graph_index
+
+    def invalidate_index(self):
+        """Drops the GraphIndex of the graph, which is built again by the next call to index"""
+        self._graph_index = None
+
+    # The methods adding or removing nodes or edges, which networkx implements independently of each other, count a
+    # new version of the graph
+    def add_node(self, node_for_adding, **attr):
+        """Adds a node, as networkx.DiGraph.add_node does, and counts a new version of the graph
+
+        :param node_for_adding: the node to add
+        :param attr: the attributes of the node
+        """
+        self._version += 1
+        super().add_node(node_for_adding, **attr)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        """Adds nodes, as networkx.DiGraph.add_nodes_from does, and counts a new version of the graph
+
+        :param nodes_for_adding: the nodes to add, or (node, attribute dictionary) tuples
+        :param attr: the attributes of all the nodes
+        """
+        self._version += 1
+        super().add_nodes_from(nodes_for_adding, **attr)
+
+    def remove_node(self, n):
+        """Removes a node and its edges, as networkx.DiGraph.remove_node does, and counts a new version of the graph
+
+        :param n: the node to remove
+        """
+        self._version += 1
+        super().remove_node(n)
+
+    def remove_nodes_from(self, nodes):
+        """Removes nodes and their edges, as networkx.DiGraph.remove_nodes_from does, and counts a new version of
+        the graph
+
+        :param nodes: the nodes to remove
+        """
+        self._version += 1
+        super().remove_nodes_from(nodes)
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        """Adds an edge, as networkx.DiGraph.add_edge does, and counts a new version of the graph
+
+        :param u_of_edge: the source of the edge
+        :param v_of_edge: the destination of the edge
+        :param attr: the attributes of the edge
+        """
+        self._version += 1
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        """Adds edges, as networkx.DiGraph.add_edges_from does, and counts a new version of the graph
+
+        :param ebunch_to_add: the edges to add, as (source, destination) or (source, destination, attributes) tuples
+        :param attr: the attributes of all the edges
+        """
+        self._version += 1
+        super().add_edges_from(ebunch_to_add, **attr)
+
+    def add_weighted_edges_from(self, ebunch_to_add, weight="weight", **attr):
+        """Adds weighted edges, as networkx.DiGraph.add_weighted_edges_from does, and counts a new version of the
+        graph
+
+        :param ebunch_to_add: the edges to add, as (source, destination, weight) tuples
+        :param weight: the name of the weight attribute
+        :param attr: the attributes of all the edges
+        """
+        self._version += 1
+        super().add_weighted_edges_from(ebunch_to_add, weight=weight, **attr)
+
+    def remove_edge(self, u, v):
+        """Removes an edge, as networkx.DiGraph.remove_edge does, and counts a new version of the graph
+
+        :param u: the source of the edge
+        :param v: the destination of the edge
+        """
+        self._version += 1
+        super().remove_edge(u, v)
+
+    def remove_edges_from(self, ebunch):
+        """Removes edges, as networkx.DiGraph.remove_edges_from does, and counts a new version of the graph
+
+        :param ebunch: the edges to remove
+        """
+        self._version += 1
+        super().remove_edges_from(ebunch)
+
+    def update(self, edges=None, nodes=None):
+        """Adds the nodes and edges of a graph or of collections, as networkx.DiGraph.update does, and counts a new
+        version of the graph
+
+        :param edges: a graph, or the edges to add
+        :param nodes: the nodes to add
+        """
+        self._version += 1
+        super().update(edges, nodes)
+
+    def clear(self):
+        """Removes all the nodes, edges and attributes of the graph, as networkx.DiGraph.clear does, and counts a new
+        version of the graph"""
+        self._version += 1
+        super().clear()
+
+    def clear_edges(self):
+        """Removes all the edges of the graph, as networkx.DiGraph.clear_edges does, and counts a new version of the
+        graph"""
+        self._version += 1
+        super().clear_edges()
+
+    def _add_decoded(self, nodes, edges):
+        """Adds nodes and edges whose attribute dictionaries were just decoded and belong to the graph.
+        Rather than copied into new dictionaries as by add_nodes_from and add_edges_from, they are stored as they are,
+        with the same result: a node or an edge added twice merges its attributes.
+
+        :param nodes: an iterable of (node ID, attribute dictionary)
+        :param edges: an iterable of (source ID, destination ID, attribute dictionary or None)
+        """
+        self._version += 1
+        if not (self.node_attr_dict_factory is dict and self.edge_attr_dict_factory is dict
+                and self.adjlist_inner_dict_factory is dict):
+            self.add_nodes_from(nodes)
+            self.add_edges_from((u, v, attributes or {}) for u, v, attributes in edges)
+            return
+        node, succ, pred = self._node, self._succ, self._pred
+        for n, attributes in nodes:
+            if n in node:
+                node[n].update(attributes)
+            else:
+                node[n] = attributes
+                succ[n] = {}
+                pred[n] = {}
+        for u, v, attributes in edges:
+            for n in (u, v):
+                if n not in node:
+                    node[n] = {}
+                    succ[n] = {}
+                    pred[n] = {}
+            existing = succ[u].get(v)
+            if existing is not None:
+                if attributes:
+                    existing.update(attributes)
+            else:
+                attributes = {} if attributes is None else attributes
+                succ[u][v] = attributes
+                pred[v][u] = attributes
+
     @staticmethod
     def from_dict(project_id, jgraph):
-        """Static method that creates a Graph based on the dictionary representation of the graph
+        """Static method that creates a Graph based on the dictionary representation of the graph.
+        The dictionaries of the vertices and edges are copied into the attributes of the nodes and edges of the graph,
+        so that jgraph is left as it is.
+
+        :param project_id: the ID of the project the graph is in
+        :param jgraph: the dictionary we want to parse the graph from
+        """
+        return Graph._from_decoded(project_id, jgraph, copy=True)
+
+    @staticmethod
+    def _from_decoded(project_id, jgraph, copy=False):
+        """Creates a Graph based on a dictionary just decoded by the SDK, whose dictionaries of the vertices and edges
+        become the attributes of the nodes and edges of the graph without being copied
 
         :param project_id: the ID of the project the graph is in
         :param jgraph: the dictionary we want to parse the graph from
+        :param copy: whether to copy the dictionaries, when jgraph belongs to the caller
         """
-        nodes_list = [(item["id"], item) for item in jgraph["vertices"]]
-        edges_list = [(item["source"], item["destination"], item) for item in jgraph["edges"]]
-        return Graph(project_id, nodes_list, edges_list)
+        attributes = dict if copy else (lambda item: item)
+        graph = Graph(project_id, (), ())
+        graph._add_decoded(((item["id"], attributes(item)) for item in jgraph["vertices"]),
+                           ((item["source"], item["destination"], attributes(item)) for item in jgraph["edges"]))
+        return graph
 
     @staticmethod
     def from_json(project_id, path):
@@ -39,9 +216,33 @@ class Graph(nx.DiGraph):
         :param project_id: the ID of the project the graph is in
         :param path: the path to the JSON file we want to parse the graph from
         """
-        with open(path, 'r') as f:
-            jgraph = json.load(f)
-        return Graph.from_dict(project_id, jgraph)
+        with open(path, 'rb') as f:
+            jgraph = loads(f.read())
+        return Graph._from_decoded(project_id, jgraph)
+
+    def to_dict(self):
+        """Returns the dictionary representation of the graph, as returned by the iGrafx Mining API and read by
+        from_dict. The attributes of the nodes and edges become the vertices and edges, with their IDs."""
+        vertices = []
+        for node, attributes in self.nodes(data=True):
+            vertex = dict(attributes)
+            vertex["id"] = node
+            vertices.append(vertex)
+        edges = []
+        for source, destination, attributes in self.edges(data=True):
+            edge = dict(attributes)
+            edge["source"] = source
+            edge["destination"] = destination
+            edges.append(edge)
+        return {"vertices": vertices, "edges": edges}
+
+    def to_json(self, path):
+        """Writes the JSON representation of the graph to a file, read back by from_json
+
+        :param path: the path of the JSON file
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
 
 
 class GraphInstance(Graph):
@@ -55,14 +256,30 @@ class GraphInstance(Graph):
 
     @staticmethod
     def from_dict(project_id, jgraph):
-        """Static method that creates a GraphInstance based on the dictionary representation of the graph instance
+        """Static method that creates a GraphInstance based on the dictionary representation of the graph instance.
+        The dictionaries of the vertex instances are copied into the attributes of the nodes of the graph instance,
+        so that jgraph is left as it is.
+
+        :param project_id: the ID of the project the graph instance is in
+        :param jgraph: the dictionary we want to parse the graph instance from
+        """
+        return GraphInstance._from_decoded(project_id, jgraph, copy=True)
+
+    @staticmethod
+    def _from_decoded(project_id, jgraph, copy=False):
+        """Creates a GraphInstance based on a dictionary just decoded by the SDK, whose dictionaries of the vertex
+        instances become the attributes of the nodes of the graph instance without being copied
 
         :param project_id: the ID of the project the graph instance is in
         :param jgraph: the dictionary we want to parse the graph instance from
+        :param copy: whether to copy the dictionaries, when jgraph belongs to the caller
         """
-        nodes_list = [(item["id"], item) for item in jgraph["vertexInstances"]]
-        edges_list = [(item["source"]["id"], item["destination"]["id"]) for item in jgraph["edgeInstances"]]
-        return GraphInstance(project_id, nodes_list, edges_list, jgraph["reworkTotal"], jgraph["concurrencyRate"])
+        attributes = dict if copy else (lambda item: item)
+        graph_instance = GraphInstance(project_id, (), (), jgraph["reworkTotal"], jgraph["concurrencyRate"])
+        graph_instance._add_decoded(((item["id"], attributes(item)) for item in jgraph["vertexInstances"]),
+                                    ((item["source"]["id"], item["destination"]["id"], None)
+                                     for item in jgraph["edgeInstances"]))
+        return graph_instance
 
     @staticmethod
     def from_json(project_id, path):
@@ -71,6 +288,28 @@ class GraphInstance(Graph):
         :param project_id: the ID of the project the graph is in
         :param path: the path to the JSON file we want to parse the graph from"""
 
-        with open(path, 'r') as f:
-            jgraph = json.load(f)
-        return GraphInstance.from_dict(project_id, jgraph)
+        with open(path, 'rb') as f:
+            jgraph = loads(f.read())
+        return GraphInstance._from_decoded(project_id, jgraph)
+
+    def to_dict(self):
+        """Returns the dictionary representation of the graph instance, as returned by the iGrafx Mining API and read
+        by from_dict. The edge instances refer to their vertex instances by their ID, name and event instance."""
+        vertex_instances = []
+        for node, attributes in self.nodes(data=True):
+            vertex_instance = dict(attributes)
+            vertex_instance["id"] = node
+            vertex_instances.append(vertex_instance)
+        edge_instances = [{"source": self.__vertex_reference(source), "destination": self.__vertex_reference(destination)}
+                          for source, destination in self.edges]
+        return {"vertexInstances": vertex_instances, "edgeInstances": edge_instances,
+                "reworkTotal": self.rework_total, "concurrencyRate": self.concurrency_rate}
+
+    def __vertex_reference(self, node):
+        """Returns the reference to the vertex instance of a node in an edge instance"""
+        attributes = self.nodes[node]
+        reference = {"id": node}
+        for field in ("name", "eventInstance"):
+            if field in attributes:
+                reference[field] = attributes[field]
+        return reference
@@ -0,0 +1,300 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from igrafx_mining_sdk.json_decoding import loads
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_DIRECTORY = os.path.join("~", ".cache", "igrafx", "graphs")
+SUFFIX = ".json.gz"
+
+
+class GraphCache:
+    """A cache on disk of the JSON of the graphs and graph instances of projects, shared by processes.
+    Each entry is a gzip compressed file named after the SHA-256 of its key: the project, the kind of graph, its mode
+    or process key, and the data version of the workgroup. A new data version thus never reads an entry stored before
+    it, and old entries are evicted when the cache is full, the least recently used first. The file holds a header
+    line with the key, then the JSON of the graph as received, so that listing the entries only reads their header.
+    Files are written to a temporary file then renamed, so that readers never see a partly written entry, and
+    evictions hold a lock on the directory, so that processes sharing it do not evict at the same time."""
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes: int = 1 << 30, compresslevel: int = 6):
+        """Initializes the GraphCache class.
+
+        :param directory: the directory of the cache, created if needed
+        :param max_bytes: the maximum size of the files of the cache
+        :param compresslevel: the gzip compression level of the entries, from 1 (fastest) to 9 (smallest)
+        """
+        self.directory = os.path.expanduser(str(directory))
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self._lock = threading.Lock()
+        self._bytes = None  # Estimate of the size of the cache, including the entries of this process only
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(project_id: str, kind: str, data_version: str, mode: str = None, process_key: str = None):
+        """Returns the key of a graph
+
+        :param project_id: the ID of the project
+        :param kind: "graph" or "graph_instance"
+        :param data_version: the data version of the workgroup
+        :param mode: the mode of a project graph, "simplified" or "gateways"
+        :param process_key: the process key of a graph instance
+        """
+        return {"project": project_id, "kind": kind, "mode": mode, "process_key": process_key,
+                "data_version": data_version}
+
+    def path(self, key: dict):
+        """Returns the path of the file of a key
+
+        :param key: the key returned by the key method
+        """
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + SUFFIX)
+
+    def get(self, key: dict):
+        """Returns the JSON payload stored for a key, decoded, or None if it is missing
+
+        :param key: the key returned by the key method
+        """
+        text = self.get_text(key)
+        if text is None:
+            return None
+        try:
+            return loads(text)
+        except ValueError as e:
+            print(f"Removing corrupted graph cache entry {self.path(key)}: {e}")
+            self.__remove(self.path(key))
+            return None
+
+    def get_text(self, key: dict):
+        """Returns the JSON payload stored for a key, as text, or None if it is missing
+
+        :param key: the key returned by the key method
+        """
+        path = self.path(key)
+        header, text = self.__read(path)
+        with self._lock:
+            if header is None or header.get("key") != key:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(path)  # The modification time orders the entries from the least recently used
+        except OSError:
+            pass
+        return text
+
+    def put(self, key: dict, payload):
+        """Stores the JSON payload of a key, as put_text does
+
+        :param key: the key returned by the key method
+        :param payload: the decoded JSON of the graph
+        """
+        self.put_text(key, json.dumps(payload))
+
+    def put_text(self, key: dict, text: str):
+        """Stores the JSON payload of a key, as received. When the cache exceeds max_bytes, the least recently used
+        entries are evicted down to 90% of max_bytes
+
+        :param key: the key returned by the key method
+        :param text: the JSON of the graph
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The header holding the key comes first on its own line, so that it can be read without the payload
+        header = json.dumps({"key": key, "stored_at": time.time()})
+        data = gzip.compress(f"{header}\n{text}".encode(), compresslevel=self.compresslevel)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(entry["size"] for entry in self.entries(read_keys=False))
+            else:
+                self._bytes += len(data)
+            full = self._bytes > self.max_bytes
+        if full:
+            # Evicting a tenth of the cache at once spares a scan of the directory at every following entry
+            self.prune(max_bytes=int(self.max_bytes * 0.9))
+
+    def entries(self, read_keys: bool = True):
+        """Returns the entries of the cache, the least recently used first, as dictionaries holding their path, size
+        and time of last use, and their key and time of storage if read_keys is True
+
+        :param read_keys: whether to read the files to return the keys of the entries
+        """
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = {"path": path, "size": stat.st_size, "last_used": stat.st_mtime}
+                if read_keys:
+                    header = self.__read(path, payload=False)[0] or {}
+                    entry["key"] = header.get("key")
+                    entry["stored_at"] = header.get("stored_at")
+                entries.append(entry)
+        return sorted(entries, key=lambda entry: entry["last_used"])
+
+    def prune(self, max_bytes: int = None, older_than: float = None, project_id: str = None):
+        """Removes entries of the cache and returns the number of entries removed.
+        With no argument, all the entries are removed.
+
+        :param max_bytes: remove the least recently used entries until the cache holds at most this many bytes
+        :param older_than: remove the entries unused for more than this number of seconds
+        :param project_id: remove the entries of this project
+        """
+        removed = 0
+        with self.__directory_lock():
+            entries = self.entries(read_keys=project_id is not None)
+            now = time.time()
+            kept = []
+            for entry in entries:
+                if (max_bytes is None and older_than is None and project_id is None) \
+                        or (older_than is not None and now - entry["last_used"] > older_than) \
+                        or (project_id is not None and (entry["key"] or {}).get("project") == project_id):
+                    removed += self.__remove(entry["path"])
+                else:
+                    kept.append(entry)
+            total = sum(entry["size"] for entry in kept)
+            for entry in kept:
+                if max_bytes is None or total <= max_bytes:
+                    break
+                removed += self.__remove(entry["path"])
+                total -= entry["size"]
+        with self._lock:
+            self._bytes = None if max_bytes is None else total
+            self.evictions += removed
+        return removed
+
+    def clear(self):
+        """Removes all the entries of the cache"""
+        return self.prune()
+
+    def stats(self):
+        """Returns the number of hits, misses and evictions of this process, and the number and size of the entries"""
+        entries = self.entries(read_keys=False)
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(entries), 'bytes': sum(entry["size"] for entry in entries)}
+
+    @contextlib.contextmanager
+    def __directory_lock(self):
+        """Holds an exclusive lock on the directory, shared with the other processes using it"""
+        with open(os.path.join(self.directory, ".lock"), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:  # pragma: no cover - Windows
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:  # pragma: no cover - Windows
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def __read(path, payload: bool = True):
+        """Returns the decoded header of an entry file and its payload text, or (None, None) if it is missing or
+        corrupted"""
+        try:
+            with gzip.open(path, "rb") as f:
+                header = json.loads(f.readline())
+                text = f.read().decode() if payload else None
+            return header, text
+        except FileNotFoundError:
+            return None, None
+        except (OSError, EOFError, ValueError) as e:
+            print(f"Removing corrupted graph cache entry {path}: {e}")
+            GraphCache.__remove(path)
+            return None, None
+
+    @staticmethod
+    def __remove(path):
+        """Removes a file and returns 1, or 0 if it was already removed"""
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def __repr__(self):
+        return f"GraphCache(directory={self.directory!r}, max_bytes={self.max_bytes})"
+
+
+def human_size(size):
+    """Returns a number of bytes in a human readable form
+
+    :param size: the number of bytes
+    """
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+
+def main(argv=None):
+    """Inspects and prunes a graph cache from the command line"""
+    parser = argparse.ArgumentParser(prog="igrafx-graph-cache", description="Inspect and prune a graph cache.")
+    parser.add_argument("--directory", default=DEFAULT_DIRECTORY, help="the directory of the cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="print the number and size of the entries")
+    list_parser = commands.add_parser("list", help="list the entries, the least recently used first")
+    list_parser.add_argument("--project", help="only list the entries of this project")
+    prune_parser = commands.add_parser("prune", help="remove entries")
+    prune_parser.add_argument("--max-bytes", type=int, help="evict the least recently used entries beyond this size")
+    prune_parser.add_argument("--older-than", type=float, help="remove the entries unused for this many days")
+    prune_parser.add_argument("--project", help="remove the entries of this project")
+    commands.add_parser("clear", help="remove all the entries")
+    args = parser.parse_args(argv)
+
+    cache = GraphCache(args.directory)
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"{stats['entries']} entries, {human_size(stats['bytes'])} in {cache.directory}")
+    elif args.command == "list":
+        for entry in cache.entries():
+            key = entry["key"] or {}
+            if args.project is not None and key.get("project") != args.project:
+                continue
+            last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["last_used"]))
+            detail = key.get("process_key") if key.get("kind") == "graph_instance" else key.get("mode")
+            print(f"{last_used}  {human_size(entry['size']):>9}  {key.get('project')}  {key.get('kind')}  {detail}  "
+                  f"{key.get('data_version')}")
+    elif args.command == "prune":
+        if args.max_bytes is None and args.older_than is None and args.project is None:
+            parser.error("prune needs --max-bytes, --older-than or --project, use clear to remove all the entries")
+        older_than = None if args.older_than is None else args.older_than * 86400
+        removed = cache.prune(max_bytes=args.max_bytes, older_than=older_than, project_id=args.project)
+        print(f"Removed {removed} entries")
+    else:
+        print(f"Removed {cache.clear()} entries")
+
+
+if __name__ == "__main__":
+    main()
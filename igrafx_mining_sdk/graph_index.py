@@ -0,0 +1,203 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import math
+from collections import deque
+from itertools import islice, takewhile
+import networkx as nx
+
+
+class GraphIndex:
+    """Precomputed indexes of a graph, to answer repeated queries without running the networkx algorithms again.
+    The strongly connected components, their topological order, their reachability and the nodes of each activity
+    name are computed once, when the index is built. The shortest paths from a node and the most frequent paths
+    between two nodes are computed on their first query and kept.
+    An index describes the graph as it was built: Graph.index() builds a new one after the graph changed."""
+    def __init__(self, graph: nx.DiGraph, version: int = 0):
+        """Initializes the GraphIndex class.
+
+        :param graph: the graph to index
+        :param version: the version of the graph indexed, to tell whether it changed since
+        """
+        self.graph = graph
+        self.version = version
+        self._nodes_by_name = {}
+        for node, name in graph.nodes(data="name"):
+            self._nodes_by_name.setdefault(name, []).append(node)
+        self._nodes_by_name = {name: tuple(nodes) for name, nodes in self._nodes_by_name.items()}
+
+        # The components are numbered in topological order, so that every edge goes to a component of higher number
+        condensation = nx.condensation(graph)
+        order = list(nx.topological_sort(condensation))
+        number = {component: i for i, component in enumerate(order)}
+        self._component = {node: number[component] for node, component in condensation.graph["mapping"].items()}
+        members = [[] for _ in order]
+        for node in graph:
+            members[self._component[node]].append(node)
+        self._members = [tuple(nodes) for nodes in members]
+        self._topological_order = [node for nodes in self._members for node in nodes]
+        self._loops = [frozenset(nodes) for nodes in self._members
+                       if len(nodes) > 1 or graph.has_edge(nodes[0], nodes[0])]
+        self._in_loop = set().union(*self._loops)
+        # The components reachable from each component, as the bits of an integer, from the last component to the
+        # first one
+        self._reachable = [0] * len(order)
+        for i in reversed(range(len(order))):
+            reachable = 1 << i
+            for successor in condensation.successors(order[i]):
+                reachable |= self._reachable[number[successor]]
+            self._reachable[i] = reachable
+        self._reachable_nodes = {}  # The nodes of the components reachable from a component, found on the first query
+        self._shortest_path_trees = {}
+        self._frequent_paths = {}  # (source, target, weight) -> (paths found, whether they are all the paths)
+        self._transition_costs = {}
+
+    def nodes_named(self, name):
+        """Returns the nodes of an activity name
+
+        :param name: the name of the activity
+        """
+        return self._nodes_by_name.get(name, ())
+
+    def topological_order(self):
+        """Returns the nodes in topological order: a node comes before the nodes it leads to, except for the nodes of
+        a same loop, which are next to each other"""
+        return list(self._topological_order)
+
+    def component(self, node):
+        """Returns the number of the strongly connected component of a node, in topological order
+
+        :param node: the node
+        """
+        return self._component[node]
+
+    def loops(self):
+        """Returns the loops of the graph, as the sets of nodes of its strongly connected components with a cycle"""
+        return list(self._loops)
+
+    def in_loop(self, node):
+        """Returns whether a node is in a loop
+
+        :param node: the node
+        """
+        return node in self._in_loop
+
+    def is_reachable(self, source, target):
+        """Returns whether a path leads from a node to another one, or from a node to itself if it is in a loop
+
+        :param source: the first node of the path
+        :param target: the last node of the path
+        """
+        if source == target:
+            return source in self._in_loop
+        return bool(self._reachable[self._component[source]] >> self._component[target] & 1)
+
+    def descendants(self, node):
+        """Returns the set of the nodes a path leads to from a node, as networkx.descendants does
+
+        :param node: the node
+        """
+        component = self._component[node]
+        reachable_nodes = self._reachable_nodes.get(component)
+        if reachable_nodes is None:
+            reachable = self._reachable[component]
+            reachable_nodes = frozenset(other for i, nodes in enumerate(self._members) if reachable >> i & 1
+                                        for other in nodes)
+            self._reachable_nodes[component] = reachable_nodes
+        descendants = set(reachable_nodes)
+        descendants.discard(node)
+        return descendants
+
+    def activity_reachable(self, source_name, target_name):
+        """Returns whether a path leads from a node of an activity to a node of another activity
+
+        :param source_name: the name of the first activity
+        :param target_name: the name of the last activity
+        """
+        return any(self.is_reachable(source, target)
+                   for source in self.nodes_named(source_name) for target in self.nodes_named(target_name))
+
+    def __shortest_path_tree(self, source):
+        """Returns the predecessor of each node on a shortest path from a node, found by a breadth-first search on
+        the first call"""
+        tree = self._shortest_path_trees.get(source)
+        if tree is None:
+            tree = {source: None}
+            queue = deque([source])
+            successors = self.graph.succ
+            while queue:
+                node = queue.popleft()
+                for successor in successors[node]:
+                    if successor not in tree:
+                        tree[successor] = node
+                        queue.append(successor)
+            self._shortest_path_trees[source] = tree
+        return tree
+
+    def shortest_path(self, source, target):
+        """Returns the nodes of a shortest path from a node to another one, or None if no path leads to it
+
+        :param source: the first node of the path
+        :param target: the last node of the path
+        """
+        if source != target and not self.is_reachable(source, target):
+            return None
+        tree = self.__shortest_path_tree(source)
+        path = [target]
+        while path[-1] != source:
+            path.append(tree[path[-1]])
+        return path[::-1]
+
+    def shortest_path_length(self, source, target):
+        """Returns the number of edges of a shortest path from a node to another one, or None if no path leads to it
+
+        :param source: the first node of the path
+        :param target: the last node of the path
+        """
+        path = self.shortest_path(source, target)
+        return None if path is None else len(path) - 1
+
+    def most_frequent_paths(self, source, target, k: int = 5, weight: str = "frequency"):
+        """Returns the k most frequent simple paths from a node to another one, as lists of nodes.
+        The frequency of a path is the product of the probabilities of its edges, an edge being taken from its
+        source in proportion to its weight attribute. Edges without this attribute have a weight of 1.
+
+        :param source: the first node of the paths
+        :param target: the last node of the paths
+        :param k: the number of paths
+        :param weight: the edge attribute holding the number of times the edge was taken, such as the frequency of
+            an AggregatedGraph
+        """
+        key = (source, target, weight)
+        paths, complete = self._frequent_paths.get(key, (None, False))
+        if paths is None or (len(paths) < k and not complete):
+            if source != target and not self.is_reachable(source, target):
+                paths, complete = [], True
+            else:
+                costs = self.__transition_costs(weight)
+                # The paths taking an edge never taken, of infinite cost, come last and are left out
+                candidates = nx.shortest_simple_paths(self.graph, source, target, weight=lambda u, v, _: costs[u, v])
+                paths = list(islice(takewhile(lambda path: all(costs[edge] < math.inf for edge in zip(path, path[1:])),
+                                              candidates), k))
+                complete = len(paths) < k
+            self._frequent_paths[key] = (paths, complete)
+        return [list(path) for path in paths[:k]]
+
+    def __transition_costs(self, weight):
+        """Returns the cost of each edge, minus the logarithm of its probability to be taken from its source, infinite
+        if it is never taken"""
+        costs = self._transition_costs.get(weight)
+        if costs is None:
+            costs = {}
+            for node, successors in self.graph.succ.items():
+                weights = {successor: max(float(attributes.get(weight, 1) or 0), 0.0)
+                           for successor, attributes in successors.items()}
+                total = sum(weights.values())
+                for successor, value in weights.items():
+                    costs[node, successor] = -math.log(value / total) if value > 0 else math.inf
+            self._transition_costs[weight] = costs
+        return costs
+
+    def __repr__(self):
+        return (f"GraphIndex(nodes={len(self._component)}, components={len(self._members)}, "
+                f"loops={len(self._loops)})")
@@ -0,0 +1,59 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+
+def loads(content):
+    """Decodes a JSON document with orjson if it is installed, which is several times faster than the json module
+    on large graph payloads, and with the json module otherwise.
+
+    :param content: the JSON document, as bytes or str
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dumps(value):
+    """Encodes a value as compact JSON text with orjson if it is installed, and with the json module otherwise or
+    for the values orjson does not encode, such as integers beyond 64 bits.
+
+    :param value: the value to encode
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode()
+        except TypeError:
+            pass
+    return json.dumps(value, separators=(",", ":"))
+
+
+def response_json(response):
+    """Decodes the JSON body of an HTTP response of the API, synchronous or asynchronous, with loads.
+    Responses without a raw body are decoded by their own json method.
+
+    :param response: the response of the request
+    """
+    content = getattr(response, "content", None)
+    if isinstance(content, (bytes, bytearray, str)):
+        return loads(content)
+    return response.json()
+
+
+def response_text(response):
+    """Returns the JSON body of an HTTP response of the API as text, or None for responses without a raw body
+
+    :param response: the response of the request
+    """
+    content = getattr(response, "content", None)
+    if isinstance(content, (bytes, bytearray)):
+        return bytes(content).decode()
+    if isinstance(content, str):
+        return content
+    return None
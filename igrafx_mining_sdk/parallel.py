@@ -0,0 +1,185 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import requests as req
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class FetchError:
+    """A failed item of a parallel fetch, with the error of its last attempt"""
+    def __init__(self, key, error: Exception, attempts: int):
+        """Initializes a FetchError
+
+        :param key: the item that could not be fetched
+        :param error: the exception raised by the last attempt
+        :param attempts: the number of attempts made for the item
+        """
+        self.key = key
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def status_code(self):
+        """Returns the HTTP status code of the error, or None if the error did not come from an HTTP response"""
+        response = getattr(self.error, "response", None)
+        return getattr(response, "status_code", None)
+
+    def __repr__(self):
+        return f"FetchError(key={self.key!r}, error={self.error!r}, attempts={self.attempts})"
+
+
+class RateLimiter:
+    """A thread-safe limiter spacing out calls so that at most ``rate`` calls start per second"""
+    def __init__(self, rate: float, clock=time.monotonic, sleep=time.sleep):
+        """Initializes a RateLimiter
+
+        :param rate: the maximum number of calls per second
+        :param clock: the function returning the current time in seconds
+        :param sleep: the function used to wait
+        """
+        if rate <= 0:
+            raise ValueError("rate must be strictly positive")
+        self.interval = 1.0 / rate
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Waits until the next call is allowed to start"""
+        with self._lock:
+            now = self._clock()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            self._sleep(slot - now)
+
+
+def is_transient_error(error: Exception):
+    """Returns True if the error is worth retrying: connection problems, timeouts,
+    rate limiting and server-side unavailability
+
+    :param error: the exception to classify
+    """
+    if isinstance(error, (req.ConnectionError, req.Timeout)):
+        return True
+    if isinstance(error, req.HTTPError):
+        return getattr(error.response, "status_code", None) in TRANSIENT_STATUS_CODES
+    return False
+
+
+def parallel_fetch(fetch, keys, *, max_workers: int = 8, ordered: bool = False, max_in_flight: int = None,
+                   max_retries: int = 2, retry_delay: float = 0.5, rate_limiter: RateLimiter = None,
+                   errors: list = None, retry_on=is_transient_error):
+    """Calls ``fetch`` on every key from a thread pool and yields ``(key, result)`` pairs.
+    Only ``max_in_flight`` keys are submitted at once, so the keys are consumed lazily and at most that many results
+    are held in memory. A key whose last attempt fails is appended to ``errors`` as a FetchError and is not yielded.
+
+    :param fetch: the function called with each key
+    :param keys: the iterable of keys to fetch
+    :param max_workers: the number of threads of the pool
+    :param ordered: whether to yield the results in the order of the keys rather than as they complete
+    :param max_in_flight: the maximum number of keys submitted and not yet yielded, defaults to twice max_workers
+    :param max_retries: the number of retries of a key after a transient error
+    :param retry_delay: the delay before the first retry, doubled at each retry
+    :param rate_limiter: an optional RateLimiter applied to every attempt
+    :param errors: the list the failed keys are appended to
+    :param retry_on: the predicate telling whether an exception is worth retrying
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be strictly positive")
+    max_in_flight = max_in_flight or 2 * max_workers
+    if max_in_flight < max_workers:
+        raise ValueError("max_in_flight must be greater than or equal to max_workers")
+    errors = errors if errors is not None else []
+
+    def attempt(key):
+        return _fetch_with_retries(fetch, key, max_retries, retry_delay, rate_limiter, retry_on)
+
+    def outcome(key, future):
+        try:
+            return True, future.result()
+        except _AttemptsExhausted as exhausted:
+            errors.append(FetchError(key, exhausted.error, exhausted.attempts))
+            return False, None
+
+    keys = iter(keys)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for key in keys:
+                pending.append((key, executor.submit(attempt, key)))
+                if len(pending) < max_in_flight:
+                    continue
+                yield from _drain(pending, ordered, outcome, until=max_in_flight - 1)
+            yield from _drain(pending, ordered, outcome, until=0)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def sequential_fetch(fetch, keys, *, max_retries: int = 2, retry_delay: float = 0.5,
+                     rate_limiter: RateLimiter = None, errors: list = None, retry_on=is_transient_error):
+    """Calls ``fetch`` on every key, one at a time and only when the next result is requested,
+    and yields ``(key, result)`` pairs. Retries and failures are handled as in parallel_fetch.
+
+    :param fetch: the function called with each key
+    :param keys: the iterable of keys to fetch
+    :param max_retries: the number of retries of a key after a transient error
+    :param retry_delay: the delay before the first retry, doubled at each retry
+    :param rate_limiter: an optional RateLimiter applied to every attempt
+    :param errors: the list the failed keys are appended to
+    :param retry_on: the predicate telling whether an exception is worth retrying
+    """
+    errors = errors if errors is not None else []
+    for key in keys:
+        try:
+            result = _fetch_with_retries(fetch, key, max_retries, retry_delay, rate_limiter, retry_on)
+        except _AttemptsExhausted as exhausted:
+            errors.append(FetchError(key, exhausted.error, exhausted.attempts))
+            continue
+        yield key, result
+
+
+def _fetch_with_retries(fetch, key, max_retries, retry_delay, rate_limiter, retry_on):
+    """Calls ``fetch`` on a key, retrying transient errors with an exponential backoff.
+    Raises _AttemptsExhausted with the last error once the key is given up."""
+    for nb_try in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return fetch(key)
+        except Exception as error:
+            if nb_try == max_retries or not retry_on(error):
+                raise _AttemptsExhausted(error, nb_try + 1) from error
+            time.sleep(retry_delay * 2 ** nb_try)
+
+
+def _drain(pending, ordered, outcome, until):
+    """Yields the results of the pending futures until only ``until`` of them are left"""
+    while len(pending) > until:
+        if ordered:
+            key, future = pending.popleft()
+            done = [(key, future)]
+        else:
+            finished, _ = wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+            done = [(key, future) for key, future in pending if future in finished]
+            for item in done:
+                pending.remove(item)
+        for key, future in done:
+            success, result = outcome(key, future)
+            if success:
+                yield key, result
+
+
+class _AttemptsExhausted(Exception):
+    """Carries the last error of a key along with the number of attempts made"""
+    def __init__(self, error, attempts):
+        super().__init__(str(error))
+        self.error = error
+        self.attempts = attempts
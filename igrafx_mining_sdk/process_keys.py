@@ -0,0 +1,198 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import hashlib
+import heapq
+from collections.abc import Sequence
+import numpy as np
+
+PROCESS_KEY_COLUMN = "processkey"
+# The rows of a sample are those whose process key, read as a number, mixed by the multiplier and the seed, falls in the
+# first residues modulo this prime, so that the sampling is done by the datasource and repeated identically with the
+# same seed
+SAMPLE_MODULUS = 1000003
+SAMPLE_MULTIPLIER = 7919
+# The number of trailing letters and digits of the process key read as a base 36 number, which fits in a BIGINT
+SAMPLE_KEY_CHARACTERS = 12
+
+
+def sql_literal(value: str):
+    """Returns a value as an SQL string literal, with its single quotes escaped
+
+    :param value: the value to quote
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def sample_priority(key, seed: int):
+    """Returns the priority of a process key in the samples of a seed: a sample of n keys holds the n keys of
+    lowest priority, whatever the order in which the keys were read
+
+    :param key: the process key
+    :param seed: the seed of the sample
+    """
+    return int.from_bytes(hashlib.blake2b(f"{seed}:{key}".encode(), digest_size=8).digest(), "big")
+
+
+def allocate_sample(size: int, counts: dict):
+    """Splits a sample size between strata in proportion to their number of keys, by largest remainder.
+    Returns the number of keys to sample in each stratum, which is never more than its number of keys.
+
+    :param size: the number of keys to sample
+    :param counts: the number of keys of each stratum
+    """
+    size = min(size, sum(counts.values()))
+    total = sum(counts.values())
+    if total == 0:
+        return {stratum: 0 for stratum in counts}
+    quotas = {stratum: size * count / total for stratum, count in counts.items()}
+    allocation = {stratum: min(int(quota), counts[stratum]) for stratum, quota in quotas.items()}
+    by_remainder = sorted(counts, key=lambda stratum: quotas[stratum] - allocation[stratum], reverse=True)
+    while sum(allocation.values()) < size:
+        for stratum in by_remainder:
+            if sum(allocation.values()) < size and allocation[stratum] < counts[stratum]:
+                allocation[stratum] += 1
+    return allocation
+
+
+def key_sample_condition(seed: int, threshold):
+    """Returns the SQL condition keeping about threshold / SAMPLE_MODULUS of the process keys of a datasource, and all
+    the rows of the keys kept. The number hashed is made of the last SAMPLE_KEY_CHARACTERS letters and digits of the
+    key in base 36, as SQL has no hash function of strings, so keys only differing in their case or their other
+    characters are kept together. The threshold is a number, or an SQL expression giving a threshold per row.
+
+    :param seed: the seed of the sample
+    :param threshold: the number of residues kept
+    """
+    key = (f"COALESCE(PARSE_LONG(RIGHT(REGEXP_REPLACE({PROCESS_KEY_COLUMN}, '[^0-9A-Za-z]', ''), "
+           f"{SAMPLE_KEY_CHARACTERS}), 36), 0)")
+    return (f"MOD(MOD({key}, {SAMPLE_MODULUS}) * {SAMPLE_MULTIPLIER} + {seed % SAMPLE_MODULUS}, "
+            f"{SAMPLE_MODULUS}) < {threshold}")
+
+
+class KeySample:
+    """A sample of a fixed number of distinct process keys, those of lowest priority for a seed among the keys added.
+    It is a bottom-k sample: only the sampled keys are held, and the same keys give the same sample in any order."""
+    def __init__(self, size: int, seed: int):
+        """Initializes the KeySample class.
+
+        :param size: the number of keys of the sample
+        :param seed: the seed of the sample
+        """
+        self.size = size
+        self.seed = seed
+        self._heap = []  # (-priority, key), the key of highest priority first
+        self._keys = set()
+
+    def add(self, key):
+        """Adds a process key to the sample if its priority is among the lowest ones
+
+        :param key: the process key
+        """
+        if self.size == 0 or key in self._keys:
+            return
+        priority = sample_priority(key, self.seed)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, (-priority, key))
+            self._keys.add(key)
+        elif priority < -self._heap[0][0]:
+            _, dropped = heapq.heapreplace(self._heap, (-priority, key))
+            self._keys.discard(dropped)
+            self._keys.add(key)
+
+    def items(self):
+        """Returns the (priority, key) pairs of the sample"""
+        return [(-priority, key) for priority, key in self._heap]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class ProcessKeyStore(Sequence):
+    """A sorted set of process keys, stored as a single NumPy array of UTF-8 encoded bytes.
+    The array has a fixed width, so that each key takes as many bytes as the longest one, where a list of Python
+    strings takes about 50 bytes more than the length of each key. It is compact when the keys have similar lengths,
+    as generated case ids do, but not when a few keys are much longer than the others.
+    It is a read-only sequence of strings that compares equal to the list of its keys and can be added to lists, so
+    that it can be indexed, sliced and sampled like the list it replaces.
+    Keys are added page by page and merged into the sorted array when they are first read."""
+    def __init__(self, keys=()):
+        """Initializes the ProcessKeyStore class.
+
+        :param keys: the initial process keys
+        """
+        self._keys = np.array([], dtype="S1")
+        self._pending = []
+        self.add(keys)
+
+    def add(self, keys):
+        """Adds process keys to the store and returns the number of keys it did not hold yet
+
+        :param keys: an iterable of process keys
+        """
+        encoded = np.unique(np.array([str(key).encode() for key in keys], dtype=bytes))
+        if len(encoded) == 0:
+            return 0
+        new = encoded[~self.__contains_encoded(encoded)]
+        if len(new) > 0:
+            self._pending.append(new)
+        return len(new)
+
+    def __contains_encoded(self, encoded):
+        """Returns a boolean array telling which of the sorted, encoded keys are already merged in the store"""
+        keys = self._keys
+        if len(keys) == 0:
+            return np.zeros(len(encoded), dtype=bool)
+        positions = np.minimum(np.searchsorted(keys, encoded), len(keys) - 1)
+        return keys[positions] == encoded
+
+    def __merged(self):
+        """Merges the pending keys into the sorted array and returns it"""
+        if self._pending:
+            self._keys = np.unique(np.concatenate([self._keys, *self._pending]))
+            self._pending = []
+        return self._keys
+
+    @property
+    def nbytes(self):
+        """Returns the number of bytes used by the keys"""
+        return self.__merged().nbytes
+
+    def __len__(self):
+        return len(self.__merged())
+
+    def __getitem__(self, index):
+        keys = self.__merged()
+        if isinstance(index, slice):
+            return [key.decode() for key in keys[index]]
+        return keys[index].decode()
+
+    def __iter__(self):
+        for key in self.__merged():
+            yield key.decode()
+
+    def __contains__(self, key):
+        if not isinstance(key, str):
+            return False
+        self.__merged()
+        return bool(self.__contains_encoded(np.array([key.encode()]))[0])
+
+    def __eq__(self, other):
+        if isinstance(other, (ProcessKeyStore, list, tuple)):
+            return len(self) == len(other) and all(key == other_key for key, other_key in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def copy(self):
+        """Returns the process keys as a list"""
+        return list(self)
+
+    def __repr__(self):
+        return f"ProcessKeyStore(keys={len(self)}, nbytes={self.nbytes})"
@@ -1,17 +1,33 @@
 # MIT License, Copyright 2023 iGrafx
 # https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import asyncio
 import json
+import numbers
 import os
 import random
+import threading
+import time
 import uuid
+import warnings
+import pandas
 from enum import Enum
 from datetime import datetime
 from typing import List, Optional, Dict, Union
-from collections import OrderedDict
+from collections import Counter, OrderedDict
+from igrafx_mining_sdk.aggregation import DEFAULT_PERCENTILES, aggregate_graph_instances
 from igrafx_mining_sdk.graph import Graph, GraphInstance
+from igrafx_mining_sdk.compact_graph import CompactGraph, CompactGraphInstance
 from igrafx_mining_sdk.column_mapping import FileStructure, ColumnMapping
-from igrafx_mining_sdk.datasource import Datasource
+from igrafx_mining_sdk.datasource import SQL_ERRORS, Datasource
 from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.data_version import DataVersionWatcher
+from igrafx_mining_sdk.graph_cache import GraphCache
+from igrafx_mining_sdk.json_decoding import loads, response_json, response_text
+from igrafx_mining_sdk.process_keys import PROCESS_KEY_COLUMN, SAMPLE_MODULUS, KeySample, ProcessKeyStore, \
+    allocate_sample, key_sample_condition, sql_literal
+from igrafx_mining_sdk.parallel import RateLimiter, parallel_fetch, sequential_fetch
+from igrafx_mining_sdk.upload import DEFAULT_CHUNK_SIZE, FileUpload, MultipartFileEncoder, UploadSummary, \
+    ZipFileEncoder, get_mime_type, ingestion_state
 
 
 class Project:
@@ -25,8 +41,20 @@ class Project:
         self.id = pid
         self.api_connector = api_connector
         self._graph = None
+        self._graph_gateways = None
         self._ds_response = None
         self._process_keys = []
+        self._process_keys_stale = False
+        self._process_keys_watermark = None
+        self._process_keys_fingerprint = None
+        self._process_key_discovery = {"source": "edges", "page_size": None, "time_column": None}
+        self.graph_instance_errors = []
+        self._data_version = None
+        self._data_version_checked = False
+        self._check_lock = threading.Lock()
+        self._cache_hits = Counter()
+        self._cache_misses = Counter()
+        self.cache_invalidations = 0
 
     @property
     def exists(self):
@@ -34,6 +62,11 @@ class Project:
         response_project_exist = self.api_connector.get_request(f"/project/{self.id}/exist").json()
         return response_project_exist["exists"]
 
+    async def aexists(self):
+        """Asynchronously checks if the project exists"""
+        response_project_exist = await self.api_connector.async_connector.get_request(f"/project/{self.id}/exist")
+        return response_project_exist.json()["exists"]
+
     def delete_project(self):
         """Deletes the project"""
         response_project_delete = self.api_connector.delete_request(f"/project/{self.id}")
@@ -44,49 +77,433 @@ class Project:
         response_project_name = self.api_connector.get_request(f"/projects/{self.id}").json()
         return response_project_name["name"]
 
+    async def aget_project_name(self):
+        """Asynchronously returns the name of the project"""
+        response_project_name = await self.api_connector.async_connector.get_request(f"/projects/{self.id}")
+        return response_project_name.json()["name"]
+
     def graph(self, gateways=False):
         """Performs a REST request for the project model graph if it hasn't already been retrieved.
 
         :param gateways: Boolean that controls whether the graph returned will be BPMN-like or not
         """
-        if self._graph is None:
-            params = {"mode": "gateways" if gateways else "simplified"}
+        self.check_caches()
+        if self.__is_cached("graph", self._graph is not None and self._graph_gateways == gateways):
+            return self._graph
+        params = {"mode": "gateways" if gateways else "simplified"}
+        cache, key = self.__graph_cache_entry("graph", mode=params["mode"])
+        text = cache.get_text(key) if cache is not None else None
+        if text is not None:
+            self._graph = self.__graph_from_text("graph", text)
+        else:
             response_graph = self.api_connector.get_request(
                 f"/project/{self.id}/graph",
                 params=params)
-            self._graph = Graph.from_dict(self.id, response_graph.json())
+            self._graph, text = self.__graph_from_response("graph", response_graph, cache)
+            if cache is not None:
+                cache.put_text(key, text)
+        self._graph_gateways = gateways
+        return self._graph
+
+    async def agraph(self, gateways=False):
+        """Asynchronously performs a REST request for the project model graph if it hasn't already been retrieved.
+
+        :param gateways: Boolean that controls whether the graph returned will be BPMN-like or not
+        """
+        await asyncio.to_thread(self.check_caches)
+        if self.__is_cached("graph", self._graph is not None and self._graph_gateways == gateways):
+            return self._graph
+        params = {"mode": "gateways" if gateways else "simplified"}
+        cache, key = self.__graph_cache_entry("graph", mode=params["mode"])
+        text = await asyncio.to_thread(cache.get_text, key) if cache is not None else None
+        if text is not None:
+            self._graph = self.__graph_from_text("graph", text)
+        else:
+            response_graph = await self.api_connector.async_connector.get_request(
+                f"/project/{self.id}/graph",
+                params=params)
+            self._graph, text = self.__graph_from_response("graph", response_graph, cache)
+            if cache is not None:
+                await asyncio.to_thread(cache.put_text, key, text)
+        self._graph_gateways = gateways
         return self._graph
 
-    def get_graph_instances(self, limit=None, shuffle=False):
+    def get_graph_instances(self, limit=None, shuffle=False, max_workers=None, ordered=True, rate_limit=None,
+                            max_retries=2, seed=None):
         """Returns all the project's Graph Instances, performing a REST request for any instances that don't already
         exist within the project.
+        If max_workers is given, the graph instances are requested in parallel and the process keys that could not be
+        fetched are left out of the list and recorded in ``graph_instance_errors``.
 
         :param limit: the maximum number of graph instances to return
         :param shuffle: whether to shuffle the list of graph instances with a default value set to False
+        :param max_workers: the number of threads requesting the graph instances in parallel (sequential if None)
+        :param ordered: whether the graph instances are returned in the order of the process keys, in parallel mode
+        :param rate_limit: the maximum number of requests per second, in parallel mode
+        :param max_retries: the number of retries of a process key after a transient error, in parallel mode
+        :param seed: the seed of the shuffled sample, to draw the same sample again (random if None)
+        """
+        if max_workers is None:
+            return [self.graph_instance_from_key(k) for k in self.__sample_process_keys(limit, shuffle, seed)]
+        return list(self.iter_graph_instances(limit, shuffle, max_workers=max_workers, ordered=ordered,
+                                              rate_limit=rate_limit, max_retries=max_retries, seed=seed))
+
+    def iter_graph_instances(self, limit=None, shuffle=False, max_workers=None, ordered=True, prefetch=None,
+                             rate_limit=None, max_retries=2, seed=None):
+        """Lazily yields the project's Graph Instances, so that only a window of them is held in memory at once.
+        Sequentially, a graph instance is only requested when the previous one has been consumed.
+        With max_workers, at most ``prefetch`` graph instances are requested ahead of the consumer.
+        The process keys that could not be fetched are recorded in ``graph_instance_errors``.
+
+        :param limit: the maximum number of graph instances to yield
+        :param shuffle: whether to shuffle the graph instances with a default value set to False
+        :param max_workers: the number of threads requesting the graph instances in parallel (sequential if None)
+        :param ordered: whether to yield the graph instances in the order of the process keys, in parallel mode
+        :param prefetch: the maximum number of graph instances requested ahead, defaults to twice max_workers
+        :param rate_limit: the maximum number of requests per second (unlimited if None)
+        :param max_retries: the number of retries of a process key after a transient error
+        :param seed: the seed of the shuffled sample, to draw the same sample again (random if None)
+        """
+        return self.fetch_graph_instances(self.__sample_process_keys(limit, shuffle, seed), max_workers=max_workers,
+                                          ordered=ordered, prefetch=prefetch, rate_limit=rate_limit,
+                                          max_retries=max_retries)
+
+    def aggregate_graph_instances(self, limit=None, shuffle=False, max_workers=None, time_attribute=None,
+                                  percentiles=DEFAULT_PERCENTILES, rate_limit=None, max_retries=2, seed=None):
+        """Streams the project's Graph Instances into an AggregatedGraph, whose nodes and edges have the number of
+        graph instances they are in as frequency, and whose edges have the percentiles of their durations.
+        The graph instances are dropped once added, so that the memory used does not grow with their number.
+
+        :param limit: the maximum number of graph instances to aggregate
+        :param shuffle: whether to aggregate a random sample of the graph instances, with limit
+        :param max_workers: the number of threads requesting the graph instances in parallel (sequential if None)
+        :param time_attribute: the numeric node attribute holding the time of the vertex instances, from which the
+            durations of the edges are computed, None to not compute them
+        :param percentiles: the percentiles of the durations of the edges to estimate, between 0 and 100
+        :param rate_limit: the maximum number of requests per second (unlimited if None)
+        :param max_retries: the number of retries of a process key after a transient error
+        :param seed: the seed of the shuffled sample, to draw the same sample again (random if None)
+        """
+        graph_instances = self.iter_graph_instances(limit=limit, shuffle=shuffle, max_workers=max_workers,
+                                                    ordered=False, rate_limit=rate_limit, max_retries=max_retries,
+                                                    seed=seed)
+        return aggregate_graph_instances(graph_instances, project_id=self.id, time_attribute=time_attribute,
+                                         percentiles=percentiles)
+
+    def fetch_graph_instances(self, process_keys, max_workers=8, ordered=False, prefetch=None, rate_limit=None,
+                              max_retries=2):
+        """Requests the graph instances of the given process keys and yields them as they complete.
+        The process keys are consumed lazily. The process keys that still fail after their retries are recorded as
+        FetchError objects in ``graph_instance_errors``, which is reset at each call.
+
+        :param process_keys: the process keys whose graph instances we want to get
+        :param max_workers: the number of threads requesting the graph instances in parallel (sequential if None)
+        :param ordered: whether to yield the graph instances in the order of the process keys
+        :param prefetch: the maximum number of graph instances requested ahead, defaults to twice max_workers
+        :param rate_limit: the maximum number of requests per second (unlimited if None)
+        :param max_retries: the number of retries of a process key after a transient error
         """
+        self.graph_instance_errors = []
+        rate_limiter = RateLimiter(rate_limit) if rate_limit is not None else None
+        if max_workers is None:
+            results = sequential_fetch(self.__request_graph_instance, process_keys,
+                                       max_retries=max_retries,
+                                       rate_limiter=rate_limiter,
+                                       errors=self.graph_instance_errors)
+        else:
+            results = parallel_fetch(self.__request_graph_instance, process_keys,
+                                     max_workers=max_workers,
+                                     ordered=ordered,
+                                     max_in_flight=prefetch,
+                                     max_retries=max_retries,
+                                     rate_limiter=rate_limiter,
+                                     errors=self.graph_instance_errors)
+        for _, graph_instance in results:
+            yield graph_instance
+
+    def __sample_process_keys(self, limit, shuffle, seed=None):
+        """Returns the process keys whose graph instances are requested.
+        A shuffled sample of a project whose process keys are not known yet is drawn by the datasource, so that only
+        the sampled keys are retrieved.
+
+        :param limit: the maximum number of process keys to return
+        :param shuffle: whether to randomly sample the process keys
+        :param seed: the seed of the sample (random if None)
+        """
+        self.check_caches()
+        if shuffle and limit is not None and (len(self._process_keys) == 0 or self._process_keys_stale):
+            try:
+                return self.sample_process_keys(limit, seed=seed)
+            except SQL_ERRORS as error:
+                warnings.warn(f"The datasource cannot sample the process keys, sampling all the keys instead: {error}",
+                              RuntimeWarning)
         limit = min(limit, len(self.process_keys)) if limit is not None else len(self.process_keys)
-        sample = random.sample(self.process_keys, limit) if shuffle else self.process_keys[:limit]
-        return [self.graph_instance_from_key(k) for k in sample]
+        return random.Random(seed).sample(self.process_keys, limit) if shuffle else self.process_keys[:limit]
+
+    def sample_process_keys(self, size: int, seed: Optional[int] = None, source: str = "cases",
+                            sql_sampling: bool = True, stratify_by: Optional[str] = None,
+                            oversampling: float = 2.0):
+        """Returns a random sample of the process keys of the project, drawn by the datasource.
+        The datasource only returns the rows whose process key falls in a seeded pseudo-random subset of about
+        oversampling * size keys, and the sample is made of the keys of lowest seeded hash among them. The cost of
+        the sample thus depends on its size rather than on the size of the project, and the same seed draws the
+        same sample from the same data. The subset is widened if it holds too few keys.
+        With stratify_by, the sample is split between the values of a column, such as the variant of the cases, in
+        proportion to their number of keys.
+        The keys are returned in a random order.
+
+        :param size: the number of process keys to sample
+        :param seed: the seed of the sample, to draw the same sample again (random if None)
+        :param source: the datasource the keys are sampled from, "cases", which has a row per case, or "edges"
+        :param sql_sampling: whether the datasource draws the subset of keys, False to read all the keys and sample
+            them locally
+        :param stratify_by: the column of the datasource splitting the sample into strata, None for a simple sample
+        :param oversampling: the number of rows requested per sampled key
+        """
+        if source not in ("cases", "edges"):
+            raise ValueError(f"Unknown process key source '{source}', expected 'cases' or 'edges'")
+        seed = random.randrange(2 ** 32) if seed is None else seed
+        ds = self.cases_datasource if source == "cases" else self.edges_datasource
+
+        stratum_column = f", \"{stratify_by}\" AS stratum" if stratify_by is not None else ""
+        group_by = f" GROUP BY \"{stratify_by}\"" if stratify_by is not None else ""
+        res = ds.request(f"SELECT COUNT(DISTINCT {PROCESS_KEY_COLUMN}) AS n{stratum_column} FROM \"{ds.name}\""
+                         f"{group_by}", use_cache=False)
+        strata = [None if pandas.isna(stratum) else stratum for stratum in res["stratum"]] \
+            if stratify_by is not None else [None]
+        counts = {stratum: int(n) for stratum, n in zip(strata, res["n"])}
+        allocation = allocate_sample(size, counts)
+        samples = {stratum: KeySample(n, seed) for stratum, n in allocation.items() if n > 0}
+        fractions = {stratum: min(1.0, oversampling * allocation[stratum] / counts[stratum]) for stratum in samples}
+
+        while fractions:
+            condition = self.__sample_condition(fractions, seed, sql_sampling, stratify_by)
+            where = f" WHERE {condition}" if condition else ""
+            sql = f"SELECT {PROCESS_KEY_COLUMN}{stratum_column} FROM \"{ds.name}\"{where}"
+            for chunk in ds.iter_request(sql, chunk_size=10000):
+                chunk_strata = chunk["stratum"] if stratify_by is not None else [None] * len(chunk)
+                for key, stratum in zip(chunk[PROCESS_KEY_COLUMN], chunk_strata):
+                    sample = samples.get(None if pandas.isna(stratum) else stratum)
+                    if sample is not None and not pandas.isna(key):
+                        sample.add(key)
+            # A stratum with too few keys in its subset is requested again with a four times wider subset
+            fractions = {stratum: min(1.0, fraction * 4) for stratum, fraction in fractions.items()
+                         if fraction < 1.0 and sql_sampling and len(samples[stratum]) < allocation[stratum]}
+
+        return [key for _, key in sorted(item for sample in samples.values() for item in sample.items())]
+
+    @staticmethod
+    def __sample_condition(fractions, seed, sql_sampling, stratify_by):
+        """Returns the SQL condition selecting the rows of the sampled subset of each stratum, or an empty string"""
+        def threshold(fraction):
+            return min(SAMPLE_MODULUS, int(fraction * SAMPLE_MODULUS) + 1)
+
+        def is_stratum(stratum):
+            if stratum is None:
+                return f"\"{stratify_by}\" IS NULL"
+            value = stratum if isinstance(stratum, numbers.Number) else sql_literal(stratum)
+            return f"\"{stratify_by}\" = {value}"
+
+        if stratify_by is None:
+            fraction = fractions[None]
+            return key_sample_condition(seed, threshold(fraction)) if sql_sampling and fraction < 1.0 else ""
+        if not sql_sampling:
+            return " OR ".join(is_stratum(stratum) for stratum in fractions)
+        cases = " ".join(f"WHEN {is_stratum(stratum)} THEN {threshold(fraction)}"
+                         for stratum, fraction in fractions.items())
+        return key_sample_condition(seed, f"CASE {cases} ELSE 0 END")
+
+    async def aget_graph_instances(self, limit=None, shuffle=False, seed=None):
+        """Asynchronously returns the project's Graph Instances.
+        The graph instances are requested concurrently, within the concurrency limit of the workgroup.
+
+        :param limit: the maximum number of graph instances to return
+        :param shuffle: whether to shuffle the list of graph instances with a default value set to False
+        :param seed: the seed of the shuffled sample, to draw the same sample again (random if None)
+        """
+        sample = await asyncio.to_thread(self.__sample_process_keys, limit, shuffle, seed)
+        return list(await asyncio.gather(*(self.agraph_instance_from_key(k) for k in sample)))
 
     def graph_instance_from_key(self, process_id):
         """Performs a REST request for the graph instance associated with a process key, and returns it.
 
+        :param process_id: the id of the process whose graph we want to get
+        """
+        try:
+            graph_instance = self.__request_graph_instance(process_id)
+        except Exception as error:
+            print(f"Could not parse graph: {error}")
+            return None
+        return graph_instance
+
+    def __request_graph_instance(self, process_id):
+        """Performs a REST request for the graph instance associated with a process key.
+        Raises an exception if the request fails or if the graph instance cannot be parsed.
+
+        :param process_id: the id of the process whose graph we want to get
+        """
+        self.check_caches()
+        cache, key = self.__graph_cache_entry("graph_instance", process_key=process_id)
+        text = cache.get_text(key) if cache is not None else None
+        if text is not None:
+            return self.__graph_from_text("graph_instance", text)
+        parameters = {"processId": process_id}
+        response_graph_instance = self.api_connector.get_request(
+            f"/project/{self.id}/graphInstance",
+            params=parameters)
+        response_graph_instance.raise_for_status()
+        graph_instance, text = self.__graph_from_response("graph_instance", response_graph_instance, cache)
+        if cache is not None:
+            cache.put_text(key, text)
+        return graph_instance
+
+    async def agraph_instance_from_key(self, process_id):
+        """Asynchronously performs a REST request for the graph instance associated with a process key,
+        and returns it.
+
         :param process_id: the id of the process whose graph we want to get
         """
         parameters = {"processId": process_id}
         response_graph_instance = None
         try:
-            response_graph_instance = self.api_connector.get_request(
+            await asyncio.to_thread(self.check_caches)
+            cache, key = self.__graph_cache_entry("graph_instance", process_key=process_id)
+            text = await asyncio.to_thread(cache.get_text, key) if cache is not None else None
+            if text is not None:
+                return self.__graph_from_text("graph_instance", text)
+            response_graph_instance = await self.api_connector.async_connector.get_request(
                 f"/project/{self.id}/graphInstance",
                 params=parameters)
-            graph = response_graph_instance.json()
-            graph_instance = GraphInstance.from_dict(self.id, graph)
+            graph_instance, text = self.__graph_from_response("graph_instance", response_graph_instance, cache)
+            if cache is not None:
+                await asyncio.to_thread(cache.put_text, key, text)
         except Exception as error:
             print(f"Could not parse graph: {error}")
             print(response_graph_instance)
             return None
         return graph_instance
 
+    def check_caches(self):
+        """Drops the data memoized by the project if data was ingested in it since it was memoized.
+        The data version of the workgroup is checked first, which is cheap: it is shared by all the projects of the
+        connector and only asked for every few seconds. When it changed, the latest files of the project are compared
+        with those at the previous version, so that the data memoized by the projects that did not change is kept.
+        The latest files of a project are asked for once per data version by all the Project objects of the connector,
+        rather than by each of them. When the data version or the files cannot be requested, the memoized data is
+        kept and checked again next time.
+        It is called before the memoized data is used."""
+        watcher = getattr(self.api_connector, "data_version_watcher", None)
+        if not isinstance(watcher, DataVersionWatcher):
+            return
+        try:
+            version = watcher.current()
+        except Exception as error:
+            print(f"Could not request the data version of the workgroup: {error}")
+            return
+        if self._data_version_checked and version == self._data_version:
+            return
+        with self._check_lock:
+            if self._data_version_checked and version == self._data_version:
+                return  # Checked by another thread in the meantime
+            try:
+                fingerprint = watcher.fingerprint(self.id, version, self.__files_fingerprint)
+            except Exception as error:
+                print(f"Could not request the latest files of the project: {error}")
+                if self._data_version_checked:
+                    return
+                fingerprint = None
+            if self._data_version_checked:
+                # Without the files at the previous version, there is no telling whether the project changed
+                previous = watcher.fingerprint(self.id, self._data_version)
+                if previous is None or fingerprint != previous:
+                    self.invalidate_caches()
+            self._data_version = version
+            self._data_version_checked = True
+
+    def __files_fingerprint(self):
+        """Returns the metadata of the latest file of the project, as JSON"""
+        return json.dumps(self.get_project_files_metadata(1, 1, sort_order="DESC"), sort_keys=True)
+
+    def __current_files_fingerprint(self):
+        """Returns the metadata of the latest file of the project, as JSON, shared with check_caches at the current
+        data version of the workgroup. Returns None if it cannot be requested."""
+        watcher = getattr(self.api_connector, "data_version_watcher", None)
+        try:
+            if isinstance(watcher, DataVersionWatcher):
+                return watcher.fingerprint(self.id, watcher.current(), self.__files_fingerprint)
+            return self.__files_fingerprint()
+        except Exception as error:
+            print(f"Could not request the latest files of the project: {error}")
+            return None
+
+    def __graph_class(self, kind):
+        """Returns the class of the graphs or graph instances of the graph backend of the workgroup
+
+        :param kind: "graph" or "graph_instance"
+        """
+        if getattr(self.api_connector, "graph_backend", None) == "compact":
+            return CompactGraph if kind == "graph" else CompactGraphInstance
+        return Graph if kind == "graph" else GraphInstance
+
+    def __graph_from_text(self, kind, text):
+        """Builds a graph or a graph instance of the graph backend of the workgroup from its JSON
+
+        :param kind: "graph" or "graph_instance"
+        :param text: the JSON returned by the API
+        """
+        return self.__graph_class(kind)._from_decoded(self.id, loads(text))
+
+    def __graph_from_response(self, kind, response, cache):
+        """Builds a graph or a graph instance from the response of its request, and returns it with its JSON to store
+        in the cache, or None if graphs are not cached
+
+        :param kind: "graph" or "graph_instance"
+        :param response: the response of the request
+        :param cache: the GraphCache of the workgroup, or None
+        """
+        text = response_text(response) if cache is not None else None
+        if text is not None:
+            return self.__graph_from_text(kind, text), text
+        # Without the need for the text, or without a raw body, the JSON is decoded as received
+        payload = response_json(response)
+        text = json.dumps(payload) if cache is not None else None  # Before the graph takes the decoded dictionaries
+        return self.__graph_class(kind)._from_decoded(self.id, payload), text
+
+    def __graph_cache_entry(self, kind, mode=None, process_key=None):
+        """Returns the GraphCache of the workgroup and the key of a graph of the project, or (None, None) if graphs
+        are not cached or if the data version is not known.
+        The entries are tied to the data version of the workgroup, checked by check_caches, which changes with every
+        change of the data of its projects, be it an ingestion, a change of column mapping or a reset.
+
+        :param kind: "graph" or "graph_instance"
+        :param mode: the mode of the project graph
+        :param process_key: the process key of the graph instance
+        """
+        cache = getattr(self.api_connector, "graph_cache", None)
+        if not isinstance(cache, GraphCache) or not self._data_version_checked or self._data_version is None:
+            return None, None
+        return cache, GraphCache.key(self.id, kind, str(self._data_version), mode=mode, process_key=process_key)
+
+    def invalidate_caches(self):
+        """Drops the graph, the datasources and the process keys memoized by the project"""
+        self._graph = None
+        self._graph_gateways = None
+        self._ds_response = None
+        self._process_keys_stale = True
+        self.cache_invalidations += 1
+
+    def cache_stats(self):
+        """Returns the number of hits and misses of each memoized piece of data, and the number of invalidations"""
+        stats = {name: {'hits': self._cache_hits[name], 'misses': self._cache_misses[name]}
+                 for name in ("graph", "datasources", "process_keys")}
+        stats['invalidations'] = self.cache_invalidations
+        return stats
+
+    def __is_cached(self, name, cached):
+        """Counts a hit or a miss of a memoized piece of data and returns whether it is cached"""
+        (self._cache_hits if cached else self._cache_misses)[name] += 1
+        return cached
+
     def __datasource_request(self):
         """Request datasources associated with the project. It returns a name, type, host and port per datasource."""
 
@@ -108,12 +525,22 @@ class Project:
         """Returns datasource of type 'cases'"""
         return self.__get_datasource_by_name('cases')
 
+    async def adatasources(self):
+        """Asynchronously requests the datasources of the project.
+        It returns the nodes, edges and cases datasources, or an empty list if the project has no datasources."""
+        await asyncio.to_thread(self.check_caches)
+        self._ds_response = await self.api_connector.async_connector.get_request(f"/datasources/{self.id}")
+        if self._ds_response.status_code != 200:
+            return []
+        return [self.__get_datasource_by_name(ds_type) for ds_type in ['_vertex', '_edge', 'cases']]
+
     def __get_datasource_by_name(self, ds_type):
         """Helper method that filters the datasources based on the given type
 
         :param ds_type: The type of datasource. Can be 'cases', '_simplifiedEdge' or '_vertex'
         """
-        if self._ds_response is None or self._ds_response.status_code == 404:
+        self.check_caches()
+        if not self.__is_cached("datasources", self._ds_response is not None and self._ds_response.status_code != 404):
             self._ds_response = self.__datasource_request()
 
         if self._ds_response.status_code == 200:
@@ -176,15 +603,80 @@ class Project:
 
     @property
     def process_keys(self):
-        """Queries the datasources to find the different process keys of the project"""
-
-        if len(self._process_keys) == 0:
-            ds = self.edges_datasource
-            res = ds.request(f"SELECT DISTINCT processkey FROM \"{ds.name}\"")
-            self._process_keys = [key for key in res['processkey']]
+        """Queries the datasources to find the different process keys of the project.
+        The keys are discovered as by the last call to discover_process_keys, by default with a single
+        SELECT DISTINCT on the edges datasource. They are requested again when data was ingested since.
+        The keys are returned as a ProcessKeyStore, a read-only sequence that compares equal to the list of its keys."""
+        self.check_caches()
+        if not self.__is_cached("process_keys", len(self._process_keys) > 0 and not self._process_keys_stale):
+            self.discover_process_keys(**self._process_key_discovery)
 
         return self._process_keys
 
+    def discover_process_keys(self, source: str = "cases", page_size: Optional[int] = 100000,
+                              time_column: Optional[str] = "__time", full: bool = False):
+        """Queries a datasource for the process keys of the project and adds them to those already known.
+        With a page_size, the keys are requested in pages ordered by key, each page starting after the last key of
+        the previous one, so that no request has to return all the keys at once.
+        With a time_column, the latest time of the datasource is recorded as a watermark along with the latest files
+        of the project. The next discovery only requests the keys of the rows at or after the watermark if the files
+        did not change since, as rows were then only appended to the datasource. Otherwise, the new files can hold rows
+        of any time, so all the keys are requested again.
+        The keys are stored in a compact ProcessKeyStore. Returns the number of new keys.
+
+        :param source: the datasource holding the keys, "cases", which has a row per case, or "edges"
+        :param page_size: the number of keys requested at once, None to request them all with a single request
+        :param time_column: the time column of the datasource used as a watermark, None to request all the keys
+        :param full: whether to forget the known keys and the watermark, and request all the keys again
+        """
+        if source not in ("cases", "edges"):
+            raise ValueError(f"Unknown process key source '{source}', expected 'cases' or 'edges'")
+        discovery = {"source": source, "page_size": page_size, "time_column": time_column}
+        fingerprint = self.__current_files_fingerprint() if time_column is not None else None
+        # Without a watermark, new keys cannot be told apart and keys of deleted data must be dropped
+        if full or discovery != self._process_key_discovery or self._process_keys_watermark is None \
+                or fingerprint is None or fingerprint != self._process_keys_fingerprint \
+                or not isinstance(self._process_keys, ProcessKeyStore):
+            self._process_keys = ProcessKeyStore()
+            self._process_keys_watermark = None
+        self._process_key_discovery = discovery
+        ds = self.cases_datasource if source == "cases" else self.edges_datasource
+
+        conditions = []
+        watermark = None
+        if time_column is not None:
+            res = ds.request(f"SELECT TIMESTAMP_TO_MILLIS(MAX(\"{time_column}\")) AS watermark FROM \"{ds.name}\"",
+                             use_cache=False)
+            watermark = res["watermark"].iloc[0] if len(res) > 0 else None
+            watermark = None if watermark is None or pandas.isna(watermark) else int(watermark)
+            if self._process_keys_watermark is not None:
+                conditions.append(f"\"{time_column}\" >= MILLIS_TO_TIMESTAMP({self._process_keys_watermark})")
+
+        new_keys = 0
+        if page_size is None:
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            res = ds.request(f"SELECT DISTINCT {PROCESS_KEY_COLUMN} FROM \"{ds.name}\"{where}", use_cache=False)
+            new_keys += self._process_keys.add(res[PROCESS_KEY_COLUMN].dropna())
+        else:
+            last_key = None
+            while True:
+                page_conditions = conditions if last_key is None else \
+                    conditions + [f"{PROCESS_KEY_COLUMN} > {sql_literal(last_key)}"]
+                where = f" WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+                res = ds.request(f"SELECT {PROCESS_KEY_COLUMN} FROM \"{ds.name}\"{where} "
+                                 f"GROUP BY {PROCESS_KEY_COLUMN} ORDER BY {PROCESS_KEY_COLUMN} LIMIT {page_size}",
+                                 use_cache=False)
+                keys = res[PROCESS_KEY_COLUMN].dropna()
+                new_keys += self._process_keys.add(keys)
+                if len(res) < page_size or len(keys) == 0:
+                    break
+                last_key = keys.iloc[-1]
+
+        self._process_keys_watermark = watermark
+        self._process_keys_fingerprint = fingerprint
+        self._process_keys_stale = False
+        return new_keys
+
     def add_column_mapping(self, filestructure: FileStructure, columnmapping: ColumnMapping):
         """Create a column mapping for the project
 
@@ -249,6 +741,8 @@ class Project:
         """Makes an API call to manually reset a project"""
 
         response_reset = self.api_connector.post_request(f"/project/{self.id}/reset")
+        self._process_keys_watermark = None
+        self.invalidate_caches()
         return response_reset.status_code == 204
 
     def unarchive(self):
@@ -257,34 +751,216 @@ class Project:
         response_unarchive = self.api_connector.put_request(f"/projects/{self.id}/unarchive")
         return response_unarchive.status_code == 204
 
-    def add_file(self, path):
+    def add_file(self, path, stream=False, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None, max_retries=0,
+                 compress=False, compression_level=6):
         """Adds a file to the project.
         A zip file can also be added. In the file structure,
         the declared file type should be the final format of the file within the zip (e.g., .csv, .xlsx, .xls).
         It returns the information of the added file such as the file ID, the name and status of the file.
 
+        With stream set to True, the file is sent chunk by chunk instead of being loaded in memory, and the upload is
+        started again after a network error, unless the server already registered the file.
+        With compress set to True, a CSV or Excel file is compressed into a zip archive while it is streamed,
+        without writing the archive to disk. The archive holds the file under its own name, so the file structure
+        must keep declaring the type of the file itself.
+
         :param path: The path to the file to add
+        :param stream: Whether to stream the file instead of loading it in memory
+        :param chunk_size: The number of bytes read from the file at once, when streaming
+        :param progress_callback: A function called with the number of bytes sent and the total number of bytes,
+            when streaming
+        :param max_retries: The number of times the upload is started again after a network error, when streaming
+        :param compress: Whether to compress the file into a zip archive while streaming it
+        :param compression_level: The deflate compression level, from 0 (no compression) to 9 (best compression),
+            when compressing
         """
         route = f"/project/{self.id}/file?teamId={self.api_connector.wg_id}"
-        file_extension = os.path.splitext(path)[-1].lower()
-        if file_extension == ".csv":
-            mime_type = "text/csv"
-        elif file_extension == ".xlsx":
-            mime_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        elif file_extension == ".xls":
-            mime_type = "application/vnd.ms-excel"
-        elif file_extension == ".zip":
-            # When a zip is added, the mime type is a zip file.
-            # The file type is automatically detected through the file structure
-            mime_type = "application/zip"
+        mime_type = get_mime_type(path)
+        headers = {"accept": "application/json, text/plain, */*"}
+
+        if compress:
+            encoder = ZipFileEncoder(path, compression_level=compression_level, chunk_size=chunk_size,
+                                     progress_callback=progress_callback)
+            metadata = self.__stream_file(route, encoder, headers, max_retries)
+        elif stream:
+            encoder = MultipartFileEncoder(path, mime_type=mime_type, chunk_size=chunk_size,
+                                           progress_callback=progress_callback)
+            metadata = self.__stream_file(route, encoder, headers, max_retries)
         else:
-            raise ValueError(f"File extension {file_extension} is not supported")
+            with open(path, 'rb') as file:
+                files = {'file': (os.path.basename(path), file, mime_type)}
+                response_add_file = self.api_connector.post_request(route, files=files, headers=headers)
+            metadata = self.__added_file_metadata(response_add_file)
+        self.__expire_data_version()
+        return metadata
+
+    def __expire_data_version(self):
+        """Makes the next check of the data version of the workgroup ask for it, as the file added changes it"""
+        watcher = getattr(self.api_connector, "data_version_watcher", None)
+        if isinstance(watcher, DataVersionWatcher):
+            watcher.expire()
+
+    def add_files(self, paths, max_workers=4, stream=True, chunk_size=DEFAULT_CHUNK_SIZE, max_retries=0, compress=False,
+                  wait=True, poll_interval=1.0, max_poll_interval=30.0, timeout=None, fail_fast=False,
+                  max_poll_failures=3, clock=time.monotonic, sleep=time.sleep):
+        """Adds several files to the project, uploading them in parallel, then waits for their ingestion.
+        The ingestion status of the files is polled with an adaptive backoff: the delay between two polls is reset to
+        poll_interval when a status changes and doubled, up to max_poll_interval, when none does.
+        It returns an UploadSummary with the file ID, the state and the timings of every file,
+        and the throughput of the upload.
+
+        :param paths: The paths to the files to add
+        :param max_workers: The number of files uploaded at once
+        :param stream: Whether to stream the files instead of loading them in memory
+        :param chunk_size: The number of bytes read from a file at once, when streaming
+        :param max_retries: The number of times an upload is started again after a network error, when streaming
+        :param compress: Whether to compress the files into zip archives while streaming them
+        :param wait: Whether to wait for the ingestion of the files
+        :param poll_interval: The initial number of seconds between two polls of the ingestion status
+        :param max_poll_interval: The maximum number of seconds between two polls of the ingestion status
+        :param timeout: The maximum number of seconds to wait for the ingestion once the files are uploaded,
+            None to wait until every file is ingested
+        :param fail_fast: Whether to stop at the first file whose upload or ingestion fails
+        :param max_poll_failures: The number of polls in a row that can fail to return the status of a file before its
+            ingestion is counted as failed
+        :param clock: The function returning the current time in seconds
+        :param sleep: The function used to wait between two polls
+        """
+        paths = list(paths)
+        for path in paths:
+            get_mime_type(path)
+        uploads = [FileUpload(path) for path in paths]
+
+        stop = threading.Event()
+
+        def upload(file_upload):
+            if stop.is_set():
+                return file_upload
+            file_upload.started_at = clock()
+            try:
+                metadata = self.add_file(file_upload.path, stream=stream, chunk_size=chunk_size,
+                                         max_retries=max_retries, compress=compress)
+            except Exception:
+                if fail_fast:
+                    stop.set()
+                raise
+            file_upload.uploaded_at = clock()
+            file_upload.file_id = metadata.get("id")
+            file_upload.status = metadata.get("status")
+            if ingestion_state(file_upload.status) != "pending":
+                file_upload.ingested_at = file_upload.uploaded_at
+            if fail_fast and file_upload.state == "failed":
+                stop.set()
+            return file_upload
+
+        started_at = clock()
+        errors = []
+        for _ in parallel_fetch(upload, uploads, max_workers=max_workers, max_retries=0, errors=errors):
+            pass
+        for error in errors:
+            error.key.error = error.error
+        stopped_early = fail_fast and any(u.state == "failed" for u in uploads)
+        uploaded_at = clock()
+
+        if wait and not stopped_early:
+            stopped_early = self.__wait_for_ingestion(uploads, max_workers, poll_interval, max_poll_interval,
+                                                      timeout, fail_fast, max_poll_failures, clock, sleep)
+        if any(u.state == "done" for u in uploads):
+            self.invalidate_caches()  # The memoized data does not hold the ingested files
+            self.__expire_data_version()  # The data version changed again once the files were ingested
+        return UploadSummary(uploads, started_at, uploaded_at, clock(), stopped_early)
+
+    def __wait_for_ingestion(self, uploads, max_workers, poll_interval, max_poll_interval, timeout, fail_fast,
+                             max_poll_failures, clock, sleep):
+        """Polls the ingestion status of the uploaded files until none of them is pending.
+        A poll fails when its request fails or returns no status: the ingestion of a file whose polls failed
+        max_poll_failures times in a row is counted as failed, so that the polling ends even without a timeout.
+        Returns True if the polling stopped at a failed ingestion.
+
+        :param uploads: The FileUpload of the files
+        :param max_workers: The number of statuses requested at once
+        :param poll_interval: The initial number of seconds between two polls
+        :param max_poll_interval: The maximum number of seconds between two polls
+        :param timeout: The maximum number of seconds to wait, None for no limit
+        :param fail_fast: Whether to stop at the first failed ingestion
+        :param max_poll_failures: The number of polls of a file in a row that can fail before its ingestion is failed
+        :param clock: The function returning the current time in seconds
+        :param sleep: The function used to wait between two polls
+        """
+        deadline = None if timeout is None else clock() + timeout
+        interval = poll_interval
+        pending = [u for u in uploads if u.state == "pending"]
+        poll_failures = {}
+        while pending:
+            if deadline is not None and clock() + interval > deadline:
+                return False
+            sleep(interval)
+            changed = False
+            errors, failed_polls = [], []
+            for file_upload, status in parallel_fetch(lambda u: self.get_file_ingestion_status(u.file_id), pending,
+                                                      max_workers=max_workers, errors=errors):
+                if status is None:
+                    failed_polls.append((file_upload, Exception(f"No ingestion status for file {file_upload.file_id}")))
+                    continue
+                poll_failures.pop(file_upload, None)
+                changed = changed or status != file_upload.status
+                file_upload.status = status
+                if file_upload.state != "pending":
+                    file_upload.ingested_at = clock()
+                if fail_fast and file_upload.state == "failed":
+                    return True
+            failed_polls += [(error.key, error.error) for error in errors]
+            for file_upload, error in failed_polls:
+                poll_failures[file_upload] = poll_failures.get(file_upload, 0) + 1
+                if poll_failures[file_upload] >= max_poll_failures:
+                    file_upload.error = error
+                    if fail_fast:
+                        return True
+            interval = poll_interval if changed else min(max_poll_interval, interval * 2)
+            pending = [u for u in pending if u.state == "pending"]
+        return False
+
+    def __stream_file(self, route, encoder, headers, max_retries):
+        """Streams a multipart encoded file to the project, starting the upload again after a network error.
+        Before a new attempt, the latest files of the project are checked so that a file received by the server
+        despite the error is not added twice.
+
+        :param route: The route of the request
+        :param encoder: The MultipartFileEncoder of the file
+        :param headers: Additional headers
+        :param max_retries: The number of times the upload is started again after a network error
+        """
+        headers = {**headers, "Content-Type": encoder.content_type}
+        known_file_ids = self.__latest_file_ids() if max_retries > 0 else set()
+        for nb_try in range(max_retries + 1):
+            try:
+                response_add_file = self.api_connector.post_request(route, data=encoder, headers=headers)
+                return self.__added_file_metadata(response_add_file)
+            except self.api_connector.retry_policy.retry_exceptions:
+                if nb_try == max_retries:
+                    raise
+                received = [f for f in self.__latest_files()
+                            if f["id"] not in known_file_ids and f["name"] == encoder.filename]
+                if received:
+                    return self.get_file_metadata(received[0]["id"])
+
+    def __latest_files(self, limit=20):
+        """Returns the metadata of the files most recently added to the project
+
+        :param limit: The maximum number of files to return
+        """
+        return self.get_project_files_metadata(1, limit, sort_order="DESC").get("files", [])
 
-        with open(path, 'rb') as file:
-            files = {'file': (os.path.basename(path), file, mime_type)}
-            headers = {"accept": "application/json, text/plain, */*"}
-            response_add_file = self.api_connector.post_request(route, files=files, headers=headers)
+    def __latest_file_ids(self):
+        """Returns the IDs of the files most recently added to the project"""
+        return {f["id"] for f in self.__latest_files()}
 
+    @staticmethod
+    def __added_file_metadata(response_add_file):
+        """Returns the information of an added file, or raises an exception if the file could not be added
+
+        :param response_add_file: The response of the request adding the file
+        """
         # print(response_add_file.status_code) to get the status response
         if response_add_file.status_code == 201:
             return response_add_file.json()
@@ -0,0 +1,252 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - depends on the installed extras
+    pyarrow = None
+
+# A quoted string or identifier, a comment, a run of whitespace or anything else
+SQL_TOKEN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/|\s+|[^'\"\s/-]+|[/-]", re.DOTALL)
+CACHEABLE_STATEMENTS = ("SELECT", "WITH", "VALUES", "EXPLAIN")
+
+
+def normalize_sql(sql: str):
+    """Returns an SQL request with its comments removed, its whitespace collapsed and its trailing semicolons
+    stripped, so that requests differing only in their layout share a cache entry.
+    Quoted strings and identifiers are kept as they are.
+
+    :param sql: the SQL request
+    """
+    parts = []
+    for token in SQL_TOKEN.findall(sql):
+        if token.isspace() or token.startswith("--") or token.startswith("/*"):
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+        else:
+            parts.append(token)
+    return "".join(parts).strip().rstrip(";").rstrip()
+
+
+class QueryCache:
+    """A cache of the results of the SQL requests of the datasources of a workgroup.
+    Results are kept in memory, and on disk in Parquet files if a directory is given, so that they survive the
+    process. Each level is bounded in size and evicts its least recently used results first.
+    A result expires ttl seconds after it was stored. Results are also tied to the data version of the workgroup:
+    they are dropped as soon as the version changes, so that newly ingested data is never hidden by the cache."""
+    def __init__(self, max_bytes: int = 256 << 20, ttl: float = 300.0, directory=None, max_disk_bytes: int = 1 << 30,
+                 data_version=None, version_check_interval: float = 0.0, clock=time.time):
+        """Initializes the QueryCache class.
+
+        :param max_bytes: the maximum size of the results kept in memory
+        :param ttl: the number of seconds a result is served from the cache, None to keep it until evicted
+        :param directory: the directory of the Parquet files of the results, None to only keep them in memory
+        :param max_disk_bytes: the maximum size of the Parquet files
+        :param data_version: a function returning the data version of the workgroup, set by the APIConnector to its
+            DataVersionWatcher if None
+        :param version_check_interval: the number of seconds during which a data version is trusted without asking
+            for it again, 0 to ask for it on every lookup
+        :param clock: the function returning the current time in seconds since the epoch
+        """
+        if directory is not None and pyarrow is None:
+            raise ImportError("Caching results on disk requires pyarrow. "
+                              "Install it with 'pip install igrafx_mining_sdk[arrow]'.")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.directory = None if directory is None else os.path.expanduser(directory)
+        self.max_disk_bytes = max_disk_bytes
+        self.data_version = data_version
+        self.version_check_interval = version_check_interval
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> (result, stored_at, data version, size), the most recently used last
+        self._bytes = 0
+        self._version = None
+        self._version_checked_at = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(datasource_name: str, sql: str, **options):
+        """Returns the cache key of an SQL request on a datasource
+
+        :param datasource_name: the name of the datasource
+        :param sql: the SQL request
+        :param options: the options changing the result of the request, such as its dtype backend
+        """
+        return json.dumps([datasource_name, normalize_sql(sql), sorted(options.items())], default=str)
+
+    @staticmethod
+    def is_cacheable(sql: str):
+        """Returns True if the SQL request only reads data"""
+        words = normalize_sql(sql).split(None, 1)
+        return bool(words) and words[0].upper() in CACHEABLE_STATEMENTS
+
+    def current_version(self):
+        """Returns the data version of the workgroup, asking for it at most every version_check_interval seconds.
+        When it changed since the last call, all the cached results are dropped."""
+        if self.data_version is None:
+            return None
+        now = self._clock()
+        with self._lock:
+            if self._version_checked_at is not None and now - self._version_checked_at < self.version_check_interval:
+                return self._version
+        version = self.data_version()
+        with self._lock:
+            if version != self._version:
+                if self._version_checked_at is not None:
+                    self.clear()
+                self._version = version
+            self._version_checked_at = now
+            return version
+
+    def get(self, key: str):
+        """Returns a copy of the cached result of a key, or None if it is missing, expired or out of date.
+        Nothing is served if the data version cannot be known.
+
+        :param key: the key returned by the key method
+        """
+        try:
+            version = self.current_version()
+        except Exception as e:
+            print(f"Could not check the data version, the cache is bypassed: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.__is_fresh(entry[1], entry[2], now, version):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy()
+            if entry is not None:
+                self.__drop(key)
+        result, stored_at = self.__read_file(key, now, version) if self.directory is not None else (None, None)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.__store(key, result, stored_at, version)
+            return result.copy()
+
+    def put(self, key: str, result):
+        """Caches the result of a key
+
+        :param key: the key returned by the key method
+        :param result: the pandas Dataframe returned by the request
+        """
+        try:
+            version = self.current_version()
+        except Exception:
+            return
+        now = self._clock()
+        with self._lock:
+            self.__store(key, result.copy(), now, version)
+        if self.directory is not None:
+            self.__write_file(key, result, now, version)
+
+    def clear(self):
+        """Drops all the cached results, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            for path in self.__files():
+                self.__remove(path)
+
+    def stats(self):
+        """Returns the number of hits, misses and evictions, and the number and size of the results in memory"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+    def __is_fresh(self, stored_at, version, now, current_version):
+        return (self.ttl is None or now - stored_at < self.ttl) and version == current_version
+
+    def __store(self, key, result, stored_at, version):
+        """Keeps a result in memory and evicts the least recently used results beyond max_bytes"""
+        size = int(result.memory_usage(deep=True).sum())
+        if key in self._entries:
+            self.__drop(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (result, stored_at, version, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self.__drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def __drop(self, key):
+        self._bytes -= self._entries.pop(key)[3]
+
+    def __path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".parquet")
+
+    def __files(self):
+        if self.directory is None:
+            return []
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".parquet")]
+
+    def __read_file(self, key, now, version):
+        """Returns the result of a key stored on disk and the time it was stored, or (None, None) if it is missing,
+        expired or out of date"""
+        path = self.__path(key)
+        try:
+            table = pyarrow.parquet.read_table(path)
+        except (OSError, pyarrow.ArrowException):
+            return None, None
+        metadata = json.loads((table.schema.metadata or {}).get(b"igrafx_query_cache", b"{}"))
+        if metadata.get("key") != key or not self.__is_fresh(metadata["stored_at"], metadata["version"], now, version):
+            self.__remove(path)
+            return None, None
+        os.utime(path)  # The modification time orders the files from the least recently used
+        return table.to_pandas(), metadata["stored_at"]
+
+    def __write_file(self, key, result, now, version):
+        """Stores the result of a key on disk, then removes the least recently used files beyond max_disk_bytes"""
+        try:
+            table = pyarrow.Table.from_pandas(result, preserve_index=False)
+        except (pyarrow.ArrowException, TypeError, ValueError):
+            return  # Columns mixing several types are only cached in memory
+        metadata = {**(table.schema.metadata or {}),
+                    b"igrafx_query_cache": json.dumps({"key": key, "stored_at": now, "version": version}).encode()}
+        path = self.__path(key)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        pyarrow.parquet.write_table(table.replace_schema_metadata(metadata), temporary)
+        os.replace(temporary, path)  # Readers never see a partly written file
+        files = []
+        for file in self.__files():
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file))
+        total = sum(size for _, size, _ in files)
+        for _, size, file in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            self.__remove(file)
+            total -= size
+
+    @staticmethod
+    def __remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def __repr__(self):
+        return f"QueryCache(entries={len(self._entries)}, bytes={self._bytes}, hits={self.hits}, misses={self.misses})"
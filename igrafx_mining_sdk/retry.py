@@ -0,0 +1,180 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import asyncio
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests as req
+
+try:
+    import aiohttp
+    _AIOHTTP_ERRORS = (aiohttp.ClientConnectionError,)
+except ImportError:  # pragma: no cover - depends on the installed extras
+    _AIOHTTP_ERRORS = ()
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRY_STATUSES = (429, 502, 503, 504)
+RETRY_EXCEPTIONS = (req.ConnectionError, req.Timeout, ConnectionError, TimeoutError,
+                    asyncio.TimeoutError) + _AIOHTTP_ERRORS
+
+
+class RetryMetrics:
+    """Thread-safe counters of the retries made by a RetryPolicy"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Sets all the counters back to zero"""
+        with self._lock:
+            self.retries = 0
+            self.retries_by_reason = {}
+            self.sleep_time = 0.0
+            self.given_up = 0
+
+    def record_retry(self, reason, delay: float):
+        """Records a retry
+
+        :param reason: the status code or the name of the exception that caused the retry
+        :param delay: the number of seconds slept before the retry
+        """
+        with self._lock:
+            self.retries += 1
+            self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+            self.sleep_time += delay
+
+    def record_give_up(self):
+        """Records a request that failed after its retries or its time budget were exhausted"""
+        with self._lock:
+            self.given_up += 1
+
+    def to_dict(self):
+        """Returns a snapshot of the counters"""
+        with self._lock:
+            return {
+                'retries': self.retries,
+                'retriesByReason': dict(self.retries_by_reason),
+                'sleepTime': self.sleep_time,
+                'givenUp': self.given_up,
+            }
+
+
+class RetryPolicy:
+    """A retry policy shared by the HTTP requests of a connector.
+    Requests are retried with an exponential backoff and full jitter after a connection error, a timeout, or one of
+    the ``retry_statuses``. The ``Retry-After`` header of the response is honoured when present.
+    A 429 status is retried for every request since the server rejected it before processing it; other errors are
+    only retried for idempotent requests. All the retries of a request must fit in ``total_timeout`` seconds."""
+    def __init__(self, max_retries: int = 3, backoff_factor: float = 0.5, max_backoff: float = 30.0,
+                 jitter: bool = True, total_timeout: float = 120.0, retry_statuses=RETRY_STATUSES,
+                 retry_exceptions=RETRY_EXCEPTIONS, idempotent_methods=IDEMPOTENT_METHODS, route_rules=None,
+                 respect_retry_after: bool = True, clock=time.monotonic, sleep=time.sleep, rng=random.random):
+        """Initializes a RetryPolicy
+
+        :param max_retries: the maximum number of retries of a request
+        :param backoff_factor: the delay before the first retry, doubled at each retry
+        :param max_backoff: the maximum delay between two retries, unless the server asks for more with Retry-After
+        :param jitter: whether to draw the delay uniformly between 0 and the backoff (full jitter)
+        :param total_timeout: the number of seconds after which a request is no longer retried, None for no limit
+        :param retry_statuses: the HTTP status codes that are retried
+        :param retry_exceptions: the exceptions that are retried
+        :param idempotent_methods: the HTTP methods that can safely be replayed
+        :param route_rules: a list of (method, route pattern, idempotent) tuples overriding the idempotency of the
+            requests whose route matches the regular expression
+        :param respect_retry_after: whether to wait for the delay given by the Retry-After header
+        :param clock: the function returning the current time in seconds
+        :param sleep: the function used to wait
+        :param rng: the function returning a random float in [0, 1)
+        """
+        if max_retries < 0:
+            raise ValueError("max_retries must be positive")
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.total_timeout = total_timeout
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions)
+        self.idempotent_methods = frozenset(m.upper() for m in idempotent_methods)
+        self.route_rules = [(method.upper(), re.compile(pattern), idempotent)
+                            for method, pattern, idempotent in (route_rules or [])]
+        self.respect_retry_after = respect_retry_after
+        self.clock = clock
+        self.sleep = sleep
+        self._rng = rng
+        self.metrics = RetryMetrics()
+
+    def is_idempotent(self, method: str, route: str):
+        """Returns True if the request can be replayed without side effects
+
+        :param method: the HTTP method of the request
+        :param route: the route of the request
+        """
+        method = method.upper()
+        for rule_method, pattern, idempotent in self.route_rules:
+            if rule_method == method and pattern.search(route):
+                return idempotent
+        return method in self.idempotent_methods
+
+    def backoff(self, attempt: int):
+        """Returns the delay before the given retry, without Retry-After
+
+        :param attempt: the number of the retry, starting at 0
+        """
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        return delay * self._rng() if self.jitter else delay
+
+    def retry_after(self, response):
+        """Returns the delay asked by the Retry-After header of a response, or None if there is none
+
+        :param response: the HTTP response
+        """
+        value = (getattr(response, "headers", None) or {}).get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+    def next_delay(self, method: str, route: str, attempt: int, started_at: float, response=None, error=None):
+        """Returns the number of seconds to wait before retrying a request, or None if it must not be retried.
+        Each retry is recorded in the metrics of the policy.
+
+        :param method: the HTTP method of the request
+        :param route: the route of the request
+        :param attempt: the number of retries already made
+        :param started_at: the time of the first attempt, as given by the clock of the policy
+        :param response: the response of the last attempt, if any
+        :param error: the exception raised by the last attempt, if any
+        """
+        if error is not None:
+            if not isinstance(error, self.retry_exceptions) or not self.is_idempotent(method, route):
+                return None
+            reason = type(error).__name__
+        elif response is not None and response.status_code in self.retry_statuses:
+            if response.status_code != 429 and not self.is_idempotent(method, route):
+                return None
+            reason = response.status_code
+        else:
+            return None
+
+        delay = self.retry_after(response) if self.respect_retry_after and response is not None else None
+        delay = self.backoff(attempt) if delay is None else delay
+        elapsed = self.clock() - started_at
+        if attempt >= self.max_retries or (self.total_timeout is not None and elapsed + delay > self.total_timeout):
+            self.metrics.record_give_up()
+            return None
+        self.metrics.record_retry(reason, delay)
+        return delay
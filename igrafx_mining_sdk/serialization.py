@@ -0,0 +1,361 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import json
+import mmap
+import struct
+import zlib
+from operator import itemgetter
+import networkx as nx
+import numpy as np
+from igrafx_mining_sdk.compact_graph import MISSING, CompactGraph, StringPool
+from igrafx_mining_sdk.graph import Graph, GraphInstance
+from igrafx_mining_sdk.json_decoding import dumps, loads
+
+MAGIC = b"IGXGRAPH"
+FORMAT_VERSION = 1
+COMPRESSIONS = (None, "zlib")
+# The magic number, the format version and the length of the JSON header, which starts right after
+PREFIX = struct.Struct("<8sHQ")
+ALIGNMENT = 64  # The arrays start at multiples of 64 bytes, so that they can be viewed in place in a memory map
+MIN_COMPRESSED_BYTES = 256  # Smaller arrays are stored as they are
+CHUNK_SIZE = 1024  # The number of graphs decoded at once when iterating over a GraphFile
+MAX_STRING_LOOKUPS = 4096  # The whole string table is decoded for the codes of more rows
+
+
+def _encode_values(values: list, pool: StringPool):
+    """Returns the kind of the values of a column, their array and the mask of the present values or None.
+    Strings are stored as int32 codes of the string table, integers as int64, numbers as float64 and booleans as int8.
+    Other values, such as lists or columns mixing integers and numbers, are stored as the codes of their JSON, so
+    that they are decoded as they were. Missing string and JSON values have the code -1."""
+    kinds = set(map(type, values))
+    present = None
+    if object in kinds:  # The type of MISSING
+        kinds.discard(object)
+        present = np.fromiter((value is not MISSING for value in values), dtype=bool, count=len(values))
+    if kinds == {bool}:
+        return "bool", np.array([value is True for value in values], dtype=np.int8), present
+    if kinds in ({int}, {float}):
+        kind, dtype, default = ("int", np.int64, 0) if kinds == {int} else ("float", np.float64, 0.0)
+        try:
+            array = np.array(values if present is None else [default if value is MISSING else value
+                                                             for value in values], dtype=dtype)
+            return kind, array, present
+        except OverflowError:  # Integers beyond int64 are stored as JSON, decoded by loads as the API payloads are
+            pass
+    if kinds == {str}:
+        kind, strings = "str", values
+    else:
+        kind = "json"
+        strings = [MISSING if value is MISSING else dumps(value) for value in values]
+    if present is None:
+        return kind, np.array(pool.codes(strings), dtype=np.int32), None
+    codes = np.full(len(strings), -1, dtype=np.int32)
+    codes[present] = pool.codes([string for string in strings if string is not MISSING])
+    return kind, codes, None
+
+
+def _encode_records(records: list, pool: StringPool):
+    """Returns the columns of a list of attribute dictionaries, as (name, kind, values, mask) tuples"""
+    names = {}
+    for record in records:
+        names.update(dict.fromkeys(record))
+    names = list(names)
+    if len(names) > 1 and all(len(record) == len(names) for record in records):
+        # Every record has every attribute, as the vertices returned by the API mostly do: no value is missing
+        columns = [list(values) for values in zip(*map(itemgetter(*names), records))]
+    else:
+        columns = [[record.get(name, MISSING) for record in records] for name in names]
+    return [(name, *_encode_values(values, pool)) for name, values in zip(names, columns)]
+
+
+def _graph_lists(graph):
+    """Returns the graph record, the node IDs, the node attributes, the positions of the source and destination nodes
+    of the edges, and the edge attributes of a graph"""
+    if isinstance(graph, CompactGraph):
+        graph = graph.to_networkx()
+    if not isinstance(graph, nx.DiGraph):
+        raise ValueError(f"Cannot serialize a {type(graph).__name__}, only graphs and graph instances")
+    record = {"type": "Graph", "project_id": getattr(graph, "project_id", graph.graph.get("project_id"))}
+    if isinstance(graph, GraphInstance):
+        record.update(type="GraphInstance", rework_total=graph.rework_total, concurrency_rate=graph.concurrency_rate)
+    node_ids = list(graph._node)
+    positions = {node: i for i, node in enumerate(node_ids)}
+    sources, destinations, edge_records = [], [], []
+    for source, successors in graph._succ.items():
+        position = positions[source]
+        for destination, attributes in successors.items():
+            sources.append(position)
+            destinations.append(positions[destination])
+            edge_records.append(attributes)
+    return record, node_ids, list(graph._node.values()), sources, destinations, edge_records
+
+
+def _encode(graphs, compression: str = "zlib", level: int = 1):
+    """Returns the parts of the binary representation of a list of graphs, to be written one after the other"""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}, expected one of {COMPRESSIONS}")
+    pool = StringPool()
+    graph_records, node_ids, node_records, sources, destinations, edge_records = [], [], [], [], [], []
+    node_offsets, edge_offsets = [0], [0]
+    for graph in graphs:
+        record, ids, nodes, graph_sources, graph_destinations, edges = _graph_lists(graph)
+        graph_records.append(record)
+        node_ids += ids
+        node_records += nodes
+        sources += graph_sources
+        destinations += graph_destinations
+        edge_records += edges
+        node_offsets.append(len(node_ids))
+        edge_offsets.append(len(sources))
+    if not {type(node) for node in node_ids} <= {str, int, float, bool}:
+        raise ValueError("Only graphs whose node IDs are strings or numbers can be serialized")
+
+    arrays = {"graphs.node_offsets": np.array(node_offsets, dtype=np.int64),
+              "graphs.edge_offsets": np.array(edge_offsets, dtype=np.int64),
+              "edges.source": np.array(sources, dtype=np.int32),
+              "edges.destination": np.array(destinations, dtype=np.int32)}
+    key_kind, arrays["nodes.id"], _ = _encode_values(node_ids, pool)
+    tables = {}
+    for table, records in (("graphs", graph_records), ("nodes", node_records), ("edges", edge_records)):
+        tables[table] = []
+        for i, (name, kind, values, mask) in enumerate(_encode_records(records, pool)):
+            column = {"name": name, "kind": kind, "values": f"{table}.{i}", "mask": None}
+            arrays[column["values"]] = values
+            if mask is not None:
+                column["mask"] = f"{table}.{i}.mask"
+                arrays[column["mask"]] = mask
+            tables[table].append(column)
+    # The string table, written last as the columns above interned their strings
+    encoded = [pool.string(code).encode("utf-8", "surrogatepass") for code in range(len(pool))]
+    arrays["strings.offsets"] = np.cumsum([0] + [len(string) for string in encoded], dtype=np.int64)
+    arrays["strings.data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    blocks, descriptions, offset = [], {}, 0
+    for name, array in arrays.items():
+        data = array.tobytes()
+        stored = None
+        if compression == "zlib" and len(data) >= MIN_COMPRESSED_BYTES:
+            compressed = zlib.compress(data, level)
+            if len(compressed) < len(data):
+                data, stored = compressed, "zlib"
+        descriptions[name] = {"offset": offset, "bytes": len(data), "dtype": array.dtype.str, "count": len(array),
+                              "compression": stored}
+        padding = -len(data) % ALIGNMENT
+        blocks += [data, bytes(padding)]
+        offset += len(data) + padding
+    header = json.dumps({"version": FORMAT_VERSION, "graphs": len(graph_records), "node_id_kind": key_kind,
+                         "tables": tables, "arrays": descriptions}, separators=(",", ":")).encode()
+    start = PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)) + header
+    return [start, bytes(-len(start) % ALIGNMENT), *blocks]
+
+
+def dumps_graphs(graphs, compression: str = "zlib", level: int = 1):
+    """Returns the binary representation of graphs and graph instances, read back by loads_graphs or GraphFile
+
+    :param graphs: an iterable of Graph, GraphInstance, CompactGraph or CompactGraphInstance
+    :param compression: None, or "zlib" to compress the arrays
+    :param level: the zlib compression level, from 1 (fastest) to 9 (smallest)
+    """
+    return b"".join(_encode(graphs, compression, level))
+
+
+def dump_graphs(graphs, path, compression: str = "zlib", level: int = 1):
+    """Writes the binary representation of graphs and graph instances to a file, read back by load_graphs or
+    GraphFile. Without compression, the file can be read from a memory map without copying its arrays.
+
+    :param graphs: an iterable of Graph, GraphInstance, CompactGraph or CompactGraphInstance
+    :param path: the path of the file
+    :param compression: None, or "zlib" to compress the arrays
+    :param level: the zlib compression level, from 1 (fastest) to 9 (smallest)
+    """
+    parts = _encode(graphs, compression, level)
+    with open(path, "wb") as f:
+        for part in parts:
+            f.write(part)
+
+
+def loads_graphs(data):
+    """Returns the list of graphs and graph instances of a binary representation returned by dumps_graphs
+
+    :param data: the bytes returned by dumps_graphs
+    """
+    with GraphFile(data) as graph_file:
+        return list(graph_file)
+
+
+def load_graphs(path):
+    """Returns the list of graphs and graph instances of a file written by dump_graphs
+
+    :param path: the path of the file
+    """
+    with GraphFile(path) as graph_file:
+        return list(graph_file)
+
+
+class GraphFile:
+    """The graphs and graph instances written by dump_graphs, read from a memory map of the file or from bytes.
+    The file starts with a magic number, the version of the format and a JSON header describing its arrays, then holds
+    the arrays, each compressed on its own: the offsets of the nodes and edges of each graph, the positions of the
+    source and destination nodes of the edges, a string table, and the attributes of the graphs, nodes and edges
+    column by column. An array is read the first time it is needed, in place when it is not compressed, so that
+    reading a few graphs of a large file only reads the parts of the file they are in."""
+    def __init__(self, source):
+        """Initializes the GraphFile class.
+
+        :param source: the path of a file written by dump_graphs, or bytes returned by dumps_graphs
+        """
+        self._file = self._mmap = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._buffer = source
+        else:
+            self._file = open(source, "rb")
+            try:
+                self._buffer = self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # An empty file cannot be mapped
+                self._file.close()
+                raise ValueError(f"{source} is not a graph file") from None
+        if len(self._buffer) < PREFIX.size:
+            raise ValueError("Not a graph file")
+        magic, version, header_length = PREFIX.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise ValueError("Not a graph file")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Graph file version {version} is not supported, this version of the SDK reads the "
+                             f"versions up to {FORMAT_VERSION}, please upgrade it")
+        self.version = version
+        self.header = json.loads(bytes(self._buffer[PREFIX.size:PREFIX.size + header_length]))
+        end = PREFIX.size + header_length
+        self._data_start = end + -end % ALIGNMENT
+        self._arrays = {}
+        self._strings = None
+
+    def _array(self, name):
+        """Returns an array of the file, read on the first call"""
+        array = self._arrays.get(name)
+        if array is None:
+            description = self.header["arrays"][name]
+            start = self._data_start + description["offset"]
+            dtype = np.dtype(description["dtype"])
+            if description["compression"] == "zlib":
+                array = np.frombuffer(zlib.decompress(self._buffer[start:start + description["bytes"]]), dtype=dtype)
+            elif description["compression"] is None:
+                array = np.frombuffer(self._buffer, dtype=dtype, count=description["count"], offset=start)
+            else:
+                raise ValueError(f"Unknown compression {description['compression']!r} of the array {name}")
+            self._arrays[name] = array
+        return array
+
+    def _strings_of(self, codes: list):
+        """Returns the strings of codes, indexed by their code. Only the strings of the codes are decoded when a few
+        graphs of a large file are read, and the whole string table is decoded and kept otherwise."""
+        if self._strings is None and len(codes) <= MAX_STRING_LOOKUPS:
+            data, offsets = self._array("strings.data"), self._array("strings.offsets")
+            return {code: data[offsets[code]:offsets[code + 1]].tobytes().decode("utf-8", "surrogatepass")
+                    for code in set(codes) if code >= 0}
+        if self._strings is None:
+            data = self._array("strings.data").tobytes()
+            offsets = self._array("strings.offsets").tolist()
+            self._strings = [data[start:end].decode("utf-8", "surrogatepass")
+                             for start, end in zip(offsets, offsets[1:])]
+        return self._strings
+
+    def _values(self, kind, values, mask, start, stop):
+        """Returns the values of a column between two rows, with MISSING for the missing ones"""
+        values = self._array(values)[start:stop]
+        if kind in ("str", "json"):
+            codes = values.tolist()
+            strings = self._strings_of(codes)
+            if kind == "str":
+                result = [MISSING if code < 0 else strings[code] for code in codes]
+            else:
+                result = [MISSING if code < 0 else loads(strings[code]) for code in codes]
+        elif kind == "bool":
+            result = values.astype(bool).tolist()
+        else:
+            result = values.tolist()
+        if mask is not None:
+            for i in np.flatnonzero(~self._array(mask)[start:stop]).tolist():
+                result[i] = MISSING
+        return result
+
+    def _records(self, table, start, stop):
+        """Returns the attribute dictionaries of a table between two rows"""
+        columns = self.header["tables"][table]
+        if not columns:
+            return [{} for _ in range(start, stop)]
+        names = [column["name"] for column in columns]
+        values = [self._values(column["kind"], column["values"], column["mask"], start, stop) for column in columns]
+        return [{name: value for name, value in zip(names, row) if value is not MISSING} for row in zip(*values)]
+
+    def graphs(self, start: int = 0, stop: int = None):
+        """Returns the graphs and graph instances between two positions, decoding their columns at once
+
+        :param start: the position of the first graph
+        :param stop: the position following the last graph, the end of the file by default
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return []
+        node_offsets = self._array("graphs.node_offsets")[start:stop + 1].tolist()
+        edge_offsets = self._array("graphs.edge_offsets")[start:stop + 1].tolist()
+        first_node, first_edge = node_offsets[0], edge_offsets[0]
+        node_ids = self._values(self.header["node_id_kind"], "nodes.id", None, first_node, node_offsets[-1])
+        node_records = self._records("nodes", first_node, node_offsets[-1])
+        sources = self._array("edges.source")[first_edge:edge_offsets[-1]].tolist()
+        destinations = self._array("edges.destination")[first_edge:edge_offsets[-1]].tolist()
+        edge_records = self._records("edges", first_edge, edge_offsets[-1])
+
+        graphs = []
+        for i, record in enumerate(self._records("graphs", start, stop)):
+            node_start, node_stop = node_offsets[i] - first_node, node_offsets[i + 1] - first_node
+            edge_start, edge_stop = edge_offsets[i] - first_edge, edge_offsets[i + 1] - first_edge
+            if record["type"] == "GraphInstance":
+                graph = GraphInstance(record["project_id"], (), (), record["rework_total"],
+                                      record["concurrency_rate"])
+            else:
+                graph = Graph(record["project_id"], (), ())
+            ids = node_ids[node_start:node_stop]
+            graph._add_decoded(zip(ids, node_records[node_start:node_stop]),
+                               ((ids[source], ids[destination], attributes or None)
+                                for source, destination, attributes in zip(sources[edge_start:edge_stop],
+                                                                           destinations[edge_start:edge_stop],
+                                                                           edge_records[edge_start:edge_stop])))
+            graphs.append(graph)
+        return graphs
+
+    def __len__(self):
+        return self.header["graphs"]
+
+    def __getitem__(self, position: int):
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("graph position out of range")
+        return self.graphs(position, position + 1)[0]
+
+    def __iter__(self):
+        for start in range(0, len(self), CHUNK_SIZE):
+            yield from self.graphs(start, start + CHUNK_SIZE)
+
+    def close(self):
+        """Releases the arrays read and closes the memory map of the file"""
+        self._arrays.clear()
+        self._strings = None
+        if self._mmap is not None:
+            self._buffer = None
+            try:
+                self._mmap.close()
+            except BufferError:  # Arrays still used elsewhere keep the memory map open until they are released
+                pass
+            self._file.close()
+            self._mmap = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f"GraphFile(version={self.version}, graphs={len(self)})"
@@ -0,0 +1,336 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import io
+import os
+import uuid
+import zipfile
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+MIME_TYPES = {
+    ".csv": "text/csv",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".xls": "application/vnd.ms-excel",
+    # When a zip is added, the mime type is a zip file.
+    # The file type is automatically detected through the file structure
+    ".zip": "application/zip",
+}
+
+
+def get_mime_type(path):
+    """Returns the mime type of a file that can be added to a project, based on its extension
+
+    :param path: The path to the file
+    """
+    file_extension = os.path.splitext(path)[-1].lower()
+    if file_extension not in MIME_TYPES:
+        raise ValueError(f"File extension {file_extension} is not supported")
+    return MIME_TYPES[file_extension]
+
+
+class _MultipartBody:
+    """A multipart/form-data body holding a single file, generated chunk by chunk while it is sent.
+    The body can be iterated several times, which allows the request to be replayed."""
+    def __init__(self, path, field_name, filename, mime_type, chunk_size, progress_callback):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be strictly positive")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.boundary = uuid.uuid4().hex
+        self.filename = filename
+        self._head = (f'--{self.boundary}\r\n'
+                      f'Content-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+                      f'Content-Type: {mime_type}\r\n\r\n').encode()
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode()
+        self.file_size = os.path.getsize(path)
+        self.bytes_sent = 0
+
+    @property
+    def content_type(self):
+        """Returns the Content-Type header of the body"""
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __iter__(self):
+        self.bytes_sent = 0
+        for chunk in self._chunks():
+            self.bytes_sent += len(chunk)
+            yield chunk
+            if self.progress_callback is not None:
+                self.progress_callback(*self._progress())
+
+    def _progress(self):
+        """Returns the progress reported to the callback: the number of bytes sent so far, and the total number of
+        bytes when it is known in advance, None otherwise"""
+        return self.bytes_sent, None
+
+    def _chunks(self):
+        yield self._head
+        yield from self._file_chunks()
+        yield self._tail
+
+    def _file_chunks(self):
+        """Yields the content of the file"""
+        with open(self.path, 'rb') as file:
+            while True:
+                chunk = file.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+class MultipartFileEncoder(_MultipartBody):
+    """A multipart/form-data body holding a single file, generated chunk by chunk while it is sent.
+    Only one chunk of the file is held in memory at a time. Its length is known in advance, so the body is sent with a
+    Content-Length header rather than with a chunked transfer encoding.
+    The body can be iterated several times, which allows the request to be replayed."""
+    def __init__(self, path, field_name: str = "file", filename: str = None, mime_type: str = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, progress_callback=None):
+        """Initializes the encoder
+
+        :param path: The path to the file to send
+        :param field_name: The name of the form field holding the file
+        :param filename: The name of the file sent to the server, defaults to the name of the file
+        :param mime_type: The mime type of the file, deduced from its extension by default
+        :param chunk_size: The number of bytes read from the file at once
+        :param progress_callback: A function called with the number of bytes sent so far and the total number of bytes
+        """
+        super().__init__(path, field_name, filename or os.path.basename(path), mime_type or get_mime_type(path),
+                         chunk_size, progress_callback)
+
+    def __len__(self):
+        return len(self._head) + self.file_size + len(self._tail)
+
+    def _progress(self):
+        return self.bytes_sent, len(self)
+
+
+class ZipFileEncoder(_MultipartBody):
+    """A multipart/form-data body holding a file compressed into a zip archive while it is sent.
+    The archive is never written to disk: each chunk of the file is deflated and sent as soon as it is read.
+    The archive holds the file under its own name, so the file type declared in the FileStructure stays that of
+    the file. The compressed length is not known in advance, so the body is sent with a chunked transfer encoding,
+    and the progress callback is given the number of bytes of the file compressed so far and the size of the file.
+    The body can be iterated several times, which allows the request to be replayed."""
+    def __init__(self, path, field_name: str = "file", filename: str = None, compression_level: int = 6,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, progress_callback=None):
+        """Initializes the encoder
+
+        :param path: The path to the file to compress and send
+        :param field_name: The name of the form field holding the archive
+        :param filename: The name of the archive sent to the server, defaults to the name of the file followed by .zip
+        :param compression_level: The deflate compression level, from 0 (no compression) to 9 (best compression)
+        :param chunk_size: The number of bytes read from the file at once
+        :param progress_callback: A function called with the number of bytes of the file compressed so far
+            and the size of the file
+        """
+        if os.path.splitext(path)[-1].lower() == ".zip":
+            raise ValueError("The file is already a zip archive")
+        if not 0 <= compression_level <= 9:
+            raise ValueError("compression_level must be between 0 and 9")
+        get_mime_type(path)
+        super().__init__(path, field_name, filename or os.path.basename(path) + ".zip", MIME_TYPES[".zip"],
+                         chunk_size, progress_callback)
+        self.compression_level = compression_level
+        self.bytes_read = 0
+
+    def _progress(self):
+        return self.bytes_read, self.file_size
+
+    def _file_chunks(self):
+        self.bytes_read = 0
+        sink = _ChunkSink()
+        # The size of the entry is not known before it is written: the zip64 extension is needed if the file or its
+        # compressed data, at most slightly larger than the file, may exceed 2 GB
+        force_zip64 = self.file_size + self.file_size // 100 + (1 << 16) > zipfile.ZIP64_LIMIT
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=self.compression_level) as zf:
+            with zf.open(os.path.basename(self.path), 'w', force_zip64=force_zip64) as entry:
+                for chunk in super()._file_chunks():
+                    entry.write(chunk)
+                    self.bytes_read += len(chunk)
+                    if sink.size:
+                        yield sink.take()
+        if sink.size:
+            yield sink.take()
+
+
+class _ChunkSink(io.RawIOBase):
+    """A write-only, non seekable stream buffering what is written to it until it is taken"""
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def take(self):
+        """Returns and forgets the bytes written since the last call"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+DONE_INGESTION_STATUSES = ("SUCCESS", "SUCCEEDED", "DONE", "COMPLETED", "FINISHED", "INGESTED")
+FAILED_INGESTION_STATUSES = ("ERROR", "FAILED", "CANCELED", "CANCELLED", "REJECTED")
+
+
+def ingestion_state(status):
+    """Returns 'pending', 'failed' or 'done' for the ingestion status of a file.
+    The statuses that are not known to be done or failed are pending, including a missing status, as returned for
+    an error body or an unknown file.
+
+    :param status: The status of the file, either as returned by get_file_ingestion_status or as a plain string
+    """
+    if isinstance(status, dict):
+        status = status.get("status")
+    if status is None:
+        return "pending"
+    status = str(status).upper()
+    if status in FAILED_INGESTION_STATUSES:
+        return "failed"
+    if status in DONE_INGESTION_STATUSES:
+        return "done"
+    return "pending"
+
+
+class FileUpload:
+    """The upload and the ingestion of one file of a bulk upload, with its timings"""
+    def __init__(self, path):
+        """Initializes a FileUpload
+
+        :param path: The path to the file
+        """
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.file_id = None
+        self.status = None
+        self.error = None
+        self.started_at = None
+        self.uploaded_at = None
+        self.ingested_at = None
+
+    @property
+    def state(self):
+        """Returns 'skipped', 'failed', 'pending' or 'done'"""
+        if self.error is not None:
+            return "failed"
+        if self.started_at is None:
+            return "skipped"
+        return ingestion_state(self.status)
+
+    @property
+    def upload_seconds(self):
+        """Returns the number of seconds spent sending the file, or None if it was not sent"""
+        if self.uploaded_at is None:
+            return None
+        return self.uploaded_at - self.started_at
+
+    @property
+    def latency(self):
+        """Returns the number of seconds between the start of the upload and the end of the ingestion,
+        or None if the ingestion did not end"""
+        if self.ingested_at is None:
+            return None
+        return self.ingested_at - self.started_at
+
+    def to_dict(self):
+        """Returns the upload as a dictionary"""
+        return {
+            'path': str(self.path),
+            'fileId': self.file_id,
+            'size': self.size,
+            'state': self.state,
+            'status': self.status,
+            'error': None if self.error is None else str(self.error),
+            'uploadSeconds': self.upload_seconds,
+            'latency': self.latency,
+        }
+
+    def __repr__(self):
+        return f"FileUpload(path={str(self.path)!r}, file_id={self.file_id!r}, state={self.state!r})"
+
+
+class UploadSummary:
+    """The summary of a bulk upload returned by Project.add_files"""
+    def __init__(self, uploads, started_at: float, uploaded_at: float, finished_at: float, stopped_early: bool):
+        """Initializes an UploadSummary
+
+        :param uploads: The FileUpload of every file, in the order of the paths
+        :param started_at: The time the first upload started
+        :param uploaded_at: The time the last upload ended
+        :param finished_at: The time the last ingestion ended or the polling stopped
+        :param stopped_early: Whether the pipeline stopped at the first fatal error
+        """
+        self.uploads = uploads
+        self.started_at = started_at
+        self.uploaded_at = uploaded_at
+        self.finished_at = finished_at
+        self.stopped_early = stopped_early
+
+    def __filter(self, state):
+        return [upload for upload in self.uploads if upload.state == state]
+
+    @property
+    def succeeded(self):
+        """Returns the files that were uploaded and ingested"""
+        return self.__filter("done")
+
+    @property
+    def failed(self):
+        """Returns the files whose upload or ingestion failed"""
+        return self.__filter("failed")
+
+    @property
+    def pending(self):
+        """Returns the files still being ingested when the polling stopped"""
+        return self.__filter("pending")
+
+    @property
+    def skipped(self):
+        """Returns the files that were not sent because the pipeline stopped early"""
+        return self.__filter("skipped")
+
+    @property
+    def bytes_sent(self):
+        """Returns the number of bytes of the files that were uploaded"""
+        return sum(upload.size for upload in self.uploads if upload.uploaded_at is not None)
+
+    @property
+    def upload_throughput(self):
+        """Returns the number of bytes sent per second during the upload phase"""
+        elapsed = self.uploaded_at - self.started_at
+        return self.bytes_sent / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def throughput(self):
+        """Returns the number of bytes uploaded and ingested per second, from the first upload to the last ingestion"""
+        elapsed = self.finished_at - self.started_at
+        ingested = sum(upload.size for upload in self.succeeded)
+        return ingested / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self):
+        """Returns the summary as a dictionary"""
+        return {
+            'files': [upload.to_dict() for upload in self.uploads],
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'pending': len(self.pending),
+            'skipped': len(self.skipped),
+            'bytesSent': self.bytes_sent,
+            'uploadThroughput': self.upload_throughput,
+            'throughput': self.throughput,
+            'elapsed': self.finished_at - self.started_at,
+            'stoppedEarly': self.stopped_early,
+        }
+
+    def __repr__(self):
+        return (f"UploadSummary(succeeded={len(self.succeeded)}, failed={len(self.failed)}, "
+                f"pending={len(self.pending)}, skipped={len(self.skipped)})")
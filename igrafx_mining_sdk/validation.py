@@ -0,0 +1,230 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+
+import csv
+import re
+from itertools import islice
+from operator import itemgetter, not_
+import numpy as np
+import pandas as pd
+from igrafx_mining_sdk.column_mapping import ColumnMapping, FileStructure, FileType
+
+# strptime directives of the Java date pattern letters, by minimum number of repetitions
+JAVA_TIME_DIRECTIVES = {
+    'M': {1: '%m', 3: '%b', 4: '%B'},
+    'd': {1: '%d'},
+    'H': {1: '%H'},
+    'h': {1: '%I'},
+    'm': {1: '%M'},
+    's': {1: '%S'},
+    'S': {1: '%f'},
+    'a': {1: '%p'},
+    'E': {1: '%a', 4: '%A'},
+    'Z': {1: '%z'},
+    'X': {1: '%z'},
+    'x': {1: '%z'},
+}
+JAVA_TIME_TOKEN = re.compile(r"'((?:[^']|'')*)'|(([A-Za-z])\3*)|(.)", re.DOTALL)
+
+
+def java_time_format_to_strptime(time_format: str):
+    """Converts the Java date pattern of a time column (e.g., "yyyy-MM-dd'T'HH:mm:ss") into a strptime format
+
+    :param time_format: the Java date pattern
+    """
+    result = []
+    for match in JAVA_TIME_TOKEN.finditer(time_format):
+        quoted, letters, letter, literal = match.groups()
+        if letters:
+            if letter in 'yu':
+                result.append('%y' if len(letters) == 2 else '%Y')
+                continue
+            directives = JAVA_TIME_DIRECTIVES.get(letter, {})
+            counts = [count for count in directives if count <= len(letters)]
+            if not counts:
+                raise ValueError(f"Unsupported pattern '{letters}' in time format {time_format}")
+            result.append(directives[max(counts)])
+        else:
+            text = literal if literal is not None else (quoted.replace("''", "'") or "'")
+            result.append(text.replace('%', '%%'))
+    return "".join(result)
+
+
+class ValidationIssue:
+    """A value of a CSV file that the ingestion would reject"""
+    def __init__(self, row, column, value, message: str):
+        """Initializes a ValidationIssue
+
+        :param row: the number of the record, starting at 1 after the header, or None for an issue with the whole file
+        :param column: the name of the column, or None for an issue with the whole record
+        :param value: the rejected value
+        :param message: the description of the issue
+        """
+        self.row = row
+        self.column = column
+        self.value = value
+        self.message = message
+
+    def to_dict(self):
+        """Returns the issue as a dictionary"""
+        return {'row': self.row, 'column': self.column, 'value': self.value, 'message': self.message}
+
+    def __repr__(self):
+        return (f"ValidationIssue(row={self.row}, column={self.column!r}, value={self.value!r}, "
+                f"message={self.message!r})")
+
+
+class ValidationReport:
+    """The result of the validation of a CSV file against a column mapping"""
+    def __init__(self, issues, issue_count: int, rows: int):
+        """Initializes a ValidationReport
+
+        :param issues: the first issues found, ordered by row
+        :param issue_count: the total number of issues found
+        :param rows: the number of records checked
+        """
+        self.issues = issues
+        self.issue_count = issue_count
+        self.rows = rows
+
+    @property
+    def is_valid(self):
+        """Returns True if no issue was found"""
+        return self.issue_count == 0
+
+    @property
+    def truncated(self):
+        """Returns True if more issues were found than the report holds"""
+        return self.issue_count > len(self.issues)
+
+    def to_dict(self):
+        """Returns the report as a dictionary"""
+        return {
+            'valid': self.is_valid,
+            'rows': self.rows,
+            'issueCount': self.issue_count,
+            'issues': [issue.to_dict() for issue in self.issues],
+        }
+
+    def __repr__(self):
+        return f"ValidationReport(rows={self.rows}, issue_count={self.issue_count})"
+
+
+def validate_csv(path, filestructure: FileStructure, columnmapping: ColumnMapping, max_errors: int = 100,
+                 chunk_size: int = 20000):
+    """Checks a CSV file against a file structure and a column mapping before it is added to a project.
+    The file is read chunk by chunk with the delimiter, quote and escape characters of the file structure.
+    Every record must have as many fields as the header, or as the first record if the file has no header.
+    The case IDs and the activities must not be empty, the timestamps must match the time format of their column
+    and the metrics must be numbers. The values of a chunk are checked column by column with vectorised operations.
+    It returns a ValidationReport holding the first max_errors issues and the total number of issues.
+
+    :param path: the path to the CSV file
+    :param filestructure: the file structure the file will be added with
+    :param columnmapping: the column mapping of the project
+    :param max_errors: the maximum number of issues kept in the report
+    :param chunk_size: the number of records checked at once. Smaller chunks keep fewer records alive at a time, which
+        makes the garbage collections they trigger cheaper
+    """
+    if filestructure.file_type != FileType.CSV:
+        raise ValueError("Only CSV files can be validated")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be strictly positive")
+    checks = _column_checks(columnmapping)
+    issues = []
+    issue_count = 0
+    rows = 0
+
+    with open(path, newline='', encoding=filestructure.charset) as file:
+        reader = csv.reader(file, delimiter=filestructure.delimiter, quotechar=filestructure.quote_char or None,
+                            escapechar=filestructure.escape_char or None, doublequote=True, strict=False)
+        first = next(reader, None)
+        if first is None:
+            return ValidationReport([ValidationIssue(None, None, None, "The file is empty")], 1, 0)
+        expected = len(first)
+        names = first if filestructure.header else [f"column {i}" for i in range(expected)]
+        out_of_range = [c for c in checks if c[0] >= expected]
+        if out_of_range:
+            issues = [ValidationIssue(None, None, None,
+                                      f"Column index {index} is out of the {expected} columns of the file")
+                      for index, _, _ in out_of_range]
+            return ValidationReport(issues[:max_errors], len(issues), 0)
+        if not filestructure.header:
+            reader = _prepend(first, reader)
+
+        getter = itemgetter(*[index for index, _, _ in checks])
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                break
+            chunk_issues, chunk_count = _check_chunk(chunk, rows, expected, checks, getter, names,
+                                                     filestructure.comment_char, max_errors - len(issues))
+            issues.extend(chunk_issues)
+            issue_count += chunk_count
+            rows += len(chunk)
+    return ValidationReport(issues, issue_count, rows)
+
+
+def _prepend(first, reader):
+    yield first
+    yield from reader
+
+
+def _column_checks(columnmapping):
+    """Returns the (index, kind, argument) checks of the columns of a mapping"""
+    checks = [(columnmapping.case_id_column.index, "required", None),
+              (columnmapping.task_name_column.index, "required", None)]
+    for i, column in enumerate(columnmapping.time_columns):
+        checks.append((column.index, "time", (column.time_format, java_time_format_to_strptime(column.time_format),
+                                              i == 0)))
+    checks.extend((column.index, "metric", None) for column in columnmapping.metric_columns)
+    return checks
+
+
+def _check_chunk(chunk, offset, expected, checks, getter, names, comment_char, budget):
+    """Checks the records of a chunk and returns the first ``budget`` issues and the number of issues found"""
+    budget = max(budget, 0)
+    found = []
+    count = 0
+    lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+    bad = np.flatnonzero(lengths != expected)
+    for position in bad:
+        record = chunk[position]
+        if not record or (comment_char and record[0].startswith(comment_char)):
+            continue
+        count += 1
+        if count <= budget:
+            found.append((position, -1, ValidationIssue(
+                offset + int(position) + 1, None, None, f"Expected {expected} fields, found {len(record)}")))
+
+    if len(bad):
+        positions = np.flatnonzero(lengths == expected)
+        records = [chunk[position] for position in positions]
+    else:
+        positions = np.arange(len(chunk))
+        records = chunk
+    if records:
+        values = list(zip(*map(getter, records))) if len(checks) > 1 else [list(map(getter, records))]
+        for order, ((index, kind, argument), column) in enumerate(zip(checks, values)):
+            invalid, message = _invalid_values(column, kind, argument)
+            rejected = np.flatnonzero(invalid)
+            count += len(rejected)
+            for position in rejected[:budget]:
+                found.append((positions[position], order, ValidationIssue(
+                    offset + int(positions[position]) + 1, names[index], column[position], message)))
+
+    found.sort(key=itemgetter(0, 1))
+    return [issue for _, _, issue in found[:budget]], count
+
+
+def _invalid_values(column, kind, argument):
+    """Returns the mask of the invalid values of a column and the description of the issue"""
+    empty = np.fromiter(map(not_, column), dtype=bool, count=len(column))
+    if kind == "required":
+        return empty, "Missing value"
+    if kind == "time":
+        java_format, time_format, required = argument
+        invalid = pd.isna(pd.to_datetime(column, format=time_format, errors="coerce", utc=True))
+        return (invalid if required else invalid & ~empty), f"Timestamp does not match the format {java_format}"
+    invalid = pd.isna(pd.to_numeric(column, errors="coerce"))
+    return invalid & ~empty, "Not a number"
@@ -1,17 +1,26 @@
 # MIT License, Copyright 2023 iGrafx
 # https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
 
+import asyncio
 import requests as req
 from igrafx_mining_sdk.project import Project
 from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.graph_cache import GraphCache
+from igrafx_mining_sdk.query_cache import QueryCache
+from igrafx_mining_sdk.retry import RetryPolicy
 
 
 class Workgroup:
     """A iGrafx P360 Live Mining workgroup, which is used to log in and access projects"""
 
-    def __init__(self, w_id: str, w_key: str, apiurl: str, authurl: str, jdbc_url: str = None, ssl_verify=True):
+    def __init__(self, w_id: str, w_key: str, apiurl: str, authurl: str, jdbc_url: str = None, ssl_verify=True,
+                 pool_connections: int = 10, pool_maxsize: int = 10, max_concurrency: int = 10,
+                 retry_policy: RetryPolicy = None, sql_transport: str = "jdbc", sql_pool_size: int = 4,
+                 query_cache: QueryCache = None, data_version_check_interval: float = 5.0,
+                 graph_cache: GraphCache = None, graph_backend: str = "networkx"):
         """ Creates a iGrafx P360 Live Mining Workgroup and automatically logs into the iMining Public API using
-        the provided client id and secret key
+        the provided client id and secret key.
+        The workgroup can be used as a context manager, in which case its connections are closed on exit.
 
         :param w_id: the workgroup ID, which can be found in iGrafx P360 Live Mining
         :param w_key: the workgroup's secret key, used for authentication, also found in iGrafx P360 Live Mining
@@ -19,21 +28,74 @@ class Workgroup:
         :param authurl: the URL of the authentication found in iGrafx P360 Live Mining
         :param jdbc_url: the URL of the jdbc found in iGrafx P360 Live Mining
         :param ssl_verify: verify SSL certificates
+        :param pool_connections: the number of host connection pools kept by the HTTP session
+        :param pool_maxsize: the maximum number of connections kept alive per host
+        :param max_concurrency: the maximum number of requests in flight at once for the asynchronous methods
+        :param retry_policy: the policy retrying the requests after transient errors, a default one if None
+        :param sql_transport: how the datasources send SQL requests, "jdbc" for the Avatica JDBC driver run in a JVM
+            or "avatica" for the Avatica JSON protocol spoken from Python, which does not need Java
+        :param sql_pool_size: the maximum number of SQL connections the datasources of the workgroup open at once
+        :param query_cache: the cache of the results of the SQL requests of the datasources, None to not cache them.
+            Its results are dropped whenever the data version of the workgroup changes
+        :param data_version_check_interval: the number of seconds during which the projects and datasources trust the
+            data version of the workgroup before asking for it again, to check that their memoized data is up to date
+        :param graph_cache: the cache on disk of the graphs and graph instances of the projects, shared by processes,
+            None to not store them. Its entries are tied to the data version of their project
+        :param graph_backend: "networkx" for graphs that are networkx DiGraphs, or "compact" for graphs stored in
+            arrays, which take less memory and are faster to build, and are converted to networkx on demand
         """
         self.w_id = w_id
         self.w_key = w_key
         self._datasources = []
-        self.api_connector = APIConnector(w_id, w_key, apiurl, authurl, jdbc_url, ssl_verify)
+        self.api_connector = APIConnector(w_id, w_key, apiurl, authurl, jdbc_url, ssl_verify,
+                                          pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                          max_concurrency=max_concurrency, retry_policy=retry_policy,
+                                          sql_transport=sql_transport, sql_pool_size=sql_pool_size,
+                                          query_cache=query_cache,
+                                          data_version_check_interval=data_version_check_interval,
+                                          graph_cache=graph_cache, graph_backend=graph_backend)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    def close(self):
+        """Closes the SQL connections of the datasources and the HTTP connections kept alive by the workgroup"""
+        self.api_connector.close()
+
+    async def aclose(self):
+        """Closes the HTTP connections kept alive by the workgroup, including those of the asynchronous methods"""
+        if self.api_connector._async_connector is not None:
+            await self.api_connector._async_connector.close()
+        self.api_connector.close()
 
     def get_project_list(self):
         """Returns a list of all projects in the workgroup"""
         response_project_list = self.api_connector.get_request("/projects").json()
         return response_project_list
 
+    async def aget_project_list(self):
+        """Asynchronously returns a list of all projects in the workgroup"""
+        response_project_list = await self.api_connector.async_connector.get_request("/projects")
+        return response_project_list.json()
+
     def get_app_version(self):
         """Returns the version of the app"""
         return self.api_connector.get_request("/version").json()
 
+    async def aget_app_version(self):
+        """Asynchronously returns the version of the app"""
+        response_version = await self.api_connector.async_connector.get_request("/version")
+        return response_version.json()
+
     def create_project(self, project_name: str, description: str = None):
         """Creates a project within the workgroup
 
@@ -69,6 +131,15 @@ class Workgroup:
         """
         return self.get_workgroup_metadata.get("dataVersion")
 
+    async def aget_workgroup_metadata(self):
+        """Asynchronously returns the metadata of the workgroup"""
+        response_workgroup_metadata = await self.api_connector.async_connector.get_request(f"/workgroups/{self.w_id}")
+        return response_workgroup_metadata.json()
+
+    async def aget_workgroup_data_version(self):
+        """Asynchronously returns the data version of the workgroup"""
+        return (await self.aget_workgroup_metadata()).get("dataVersion")
+
     @property
     def datasources(self):
         """Requests and returns the list of datasources associated with the workgroup"""
@@ -86,9 +157,24 @@ class Workgroup:
 
         return self._datasources
 
+    async def adatasources(self):
+        """Asynchronously requests and returns the list of datasources associated with the workgroup.
+        The projects are requested concurrently, within the concurrency limit of the workgroup."""
+        projects = await asyncio.gather(*(self.aproject_from_id(p_id) for p_id in await self.aget_project_list()))
+        datasources = await asyncio.gather(*(project.adatasources() for project in projects if project))
+        self._datasources = [ds for project_datasources in datasources for ds in project_datasources]
+        return self._datasources
+
     def project_from_id(self, pid):
         """Returns a project based on its id, or None if no such project exists
 
         :param pid: The id of the project"""
         p = Project(pid, self.api_connector)
         return p if p.exists else None
+
+    async def aproject_from_id(self, pid):
+        """Asynchronously returns a project based on its id, or None if no such project exists
+
+        :param pid: The id of the project"""
+        p = Project(pid, self.api_connector)
+        return p if await p.aexists() else None
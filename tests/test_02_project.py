@@ -1,15 +1,24 @@
 # MIT License, Copyright 2023 iGrafx
 # https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import json
+import random
+import re
+import sqlite3
 import time
 from unittest.mock import MagicMock
 from pathlib import Path
 from datetime import datetime
 import uuid
 import pytest
-from igrafx_mining_sdk.project import FileStructure
+import requests as req
+from igrafx_mining_sdk.project import FileStructure, Project
+from igrafx_mining_sdk.graph import GraphInstance
 from igrafx_mining_sdk.column_mapping import Column, ColumnType, ColumnMapping, FileType
 from igrafx_mining_sdk.datasource import Datasource
 from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.data_version import DataVersionWatcher
+from igrafx_mining_sdk.process_keys import KeySample
+from igrafx_mining_sdk.avatica import AvaticaError
 
 
 class TestProject:
@@ -240,3 +249,266 @@ class TestProject:
         """Test that the project variants can be returned"""
         time.sleep(3)
         assert pytest.project.get_project_variants(1, 3)
+
+    def test_fetch_graph_instances(self, api_connector):
+        """Test that graph instances are fetched in parallel and that failed process keys are recorded."""
+        base_dir = Path(__file__).resolve().parent
+        with open(base_dir / 'data' / 'graphs' / 'graph_with_invalid_edges.json') as f:
+            payload = json.load(f)
+        found = MagicMock(status_code=200)
+        found.json.return_value = payload
+        missing = MagicMock(status_code=404)
+        missing.raise_for_status.side_effect = req.HTTPError(response=missing)
+        api_connector.get_request.side_effect = lambda route, params: (
+            missing if params["processId"] == "unknown" else found)
+
+        project = Project("project_id", api_connector)
+        project._process_keys = ["a", "unknown", "b"]
+        graph_instances = project.get_graph_instances(max_workers=2)
+        assert len(graph_instances) == 2
+        assert all(isinstance(gi, GraphInstance) for gi in graph_instances)
+        assert [e.key for e in project.graph_instance_errors] == ["unknown"]
+        assert project.graph_instance_errors[0].status_code == 404
+
+    def test_iter_graph_instances(self, api_connector):
+        """Test that graph instances are requested lazily, within the prefetch window."""
+        base_dir = Path(__file__).resolve().parent
+        with open(base_dir / 'data' / 'graphs' / 'graph_with_invalid_edges.json') as f:
+            payload = json.load(f)
+        api_connector.get_request.return_value.status_code = 200
+        api_connector.get_request.return_value.json.return_value = payload
+        project = Project("project_id", api_connector)
+        project._process_keys = [str(i) for i in range(50)]
+
+        sequential = project.iter_graph_instances()
+        assert isinstance(next(sequential), GraphInstance)
+        assert api_connector.get_request.call_count == 1
+        sequential.close()
+
+        api_connector.get_request.reset_mock()
+        concurrent = project.iter_graph_instances(max_workers=2, prefetch=4)
+        assert isinstance(next(concurrent), GraphInstance)
+        assert api_connector.get_request.call_count <= 5
+        assert len(list(concurrent)) == 49
+
+    def test_add_file_stream_resumes(self, api_connector):
+        """Test that a streamed upload is started again after a network error, unless the file was received."""
+        base_dir = Path(__file__).resolve().parent
+        file_path = base_dir / 'data' / 'tables' / 'testdata.csv'
+        api_connector.retry_policy.retry_exceptions = (req.ConnectionError,)
+        created = MagicMock(status_code=201)
+        created.json.return_value = {"id": "new", "name": "testdata.csv"}
+        api_connector.post_request.side_effect = [req.ConnectionError("reset"), created]
+        api_connector.get_request.return_value.json.return_value = {"files": [{"id": "old", "name": "testdata.csv"}]}
+        project = Project("project_id", api_connector)
+        assert project.add_file(str(file_path), stream=True, max_retries=1) == {"id": "new", "name": "testdata.csv"}
+        assert api_connector.post_request.call_count == 2
+
+        api_connector.post_request.side_effect = [req.ConnectionError("reset")]
+        api_connector.get_request.return_value.json.side_effect = [
+            {"files": []}, {"files": [{"id": "received", "name": "testdata.csv"}]}, {"id": "received"}]
+        assert project.add_file(str(file_path), stream=True, max_retries=1) == {"id": "received"}
+
+    def test_add_file_expires_data_version(self, api_connector):
+        """Test that adding a file makes the next check of the data version ask for it."""
+        file_path = Path(__file__).resolve().parent / 'data' / 'tables' / 'testdata.csv'
+        versions = iter([1, 2])
+        api_connector.data_version_watcher = DataVersionWatcher(lambda: next(versions), check_interval=3600)
+        api_connector.post_request.return_value = MagicMock(status_code=201, json=MagicMock(return_value={"id": "f"}))
+        assert api_connector.data_version_watcher.current() == 1
+        Project("project_id", api_connector).add_file(str(file_path))
+        assert api_connector.data_version_watcher.current() == 2
+
+    def test_add_files(self, api_connector):
+        """Test that files are uploaded in parallel and polled with a backoff until they are ingested."""
+        tables = Path(__file__).resolve().parent / 'data' / 'tables'
+        paths = [str(tables / 'testdata.csv'), str(tables / 'p2pShortExcel.xlsx')]
+        created = {}
+
+        def post_request(route, data, headers):
+            file_id = f"id{len(created)}"
+            created[file_id] = iter([{"status": "PROCESSING", "progress": 50}, {"status": "PROCESSING", "progress": 50},
+                                     {"status": "PROCESSING", "progress": 50}, {"status": "SUCCESS", "progress": 100}])
+            return MagicMock(status_code=201, json=MagicMock(return_value={"id": file_id, "status": {
+                "status": "PROCESSING", "progress": 0}}))
+
+        api_connector.post_request.side_effect = post_request
+        api_connector.get_request.side_effect = lambda route: MagicMock(
+            json=MagicMock(return_value={"status": next(created[route.rsplit('/', 1)[-1]])}))
+        sleeps = []
+        project = Project("project_id", api_connector)
+        summary = project.add_files(paths, max_workers=2, sleep=sleeps.append)
+
+        assert sorted(u.file_id for u in summary.uploads) == ["id0", "id1"]
+        assert len(summary.succeeded) == 2 and not summary.stopped_early
+        assert sleeps == [1.0, 1.0, 2.0, 4.0]
+        assert summary.bytes_sent == sum(Path(p).stat().st_size for p in paths)
+        assert all(u.latency >= u.upload_seconds for u in summary.uploads)
+        assert summary.to_dict()['succeeded'] == 2
+
+    def test_add_files_poll_failures(self, api_connector):
+        """Test that files given by a generator are uploaded, and that their ingestion fails after repeated polls
+        without a status."""
+        tables = Path(__file__).resolve().parent / 'data' / 'tables'
+        file_ids = iter(["missing", "broken"])
+        api_connector.post_request.side_effect = lambda route, data, headers: MagicMock(
+            status_code=201, json=MagicMock(return_value={"id": next(file_ids)}))
+
+        def get_request(route):
+            if route.endswith("broken"):
+                raise ValueError("Not a JSON body")
+            return MagicMock(json=MagicMock(return_value={"error": "Unknown file"}))
+
+        api_connector.get_request.side_effect = get_request
+        sleeps = []
+        summary = Project("project_id", api_connector).add_files(
+            (str(tables / name) for name in ['testdata.csv', 'p2pShortExcel.xlsx']), max_workers=1,
+            max_poll_failures=3, sleep=sleeps.append)
+        assert len(summary.uploads) == 2 and len(summary.failed) == 2
+        assert len(sleeps) == 3 and all(u.status is None for u in summary.uploads)
+
+    def test_add_files_fail_fast(self, api_connector):
+        """Test that the pipeline stops at the first failed upload when asked to."""
+        file_path = str(Path(__file__).resolve().parent / 'data' / 'tables' / 'testdata.csv')
+        api_connector.post_request.return_value.status_code = 500
+        project = Project("project_id", api_connector)
+        summary = project.add_files([file_path] * 10, max_workers=1, fail_fast=True)
+        assert summary.stopped_early
+        assert len(summary.failed) >= 1 and len(summary.skipped) >= 1
+        assert api_connector.get_request.call_count == 0
+
+        with pytest.raises(ValueError):
+            project.add_files([file_path, "log.parquet"])
+
+    def test_cache_coherency(self, api_connector):
+        """Test that the memoized graph is dropped only in the projects whose files changed with the data version."""
+        with open(Path(__file__).resolve().parent / 'data' / 'graphs' / 'graph.json') as f:
+            graph = json.load(f)
+        data = {"version": 1, "p1": [{"id": "a", "status": "DONE"}], "p2": [{"id": "b", "status": "DONE"}]}
+
+        def get_request(route, params=None):
+            pid = route.split("/")[2]
+            return MagicMock(status_code=200, json=MagicMock(return_value=graph if route.endswith("/graph")
+                                                             else {"files": data[pid]}))
+
+        api_connector.get_request.side_effect = get_request
+        api_connector.data_version_watcher = DataVersionWatcher(lambda: data["version"], check_interval=0)
+        p1, p2 = Project("p1", api_connector), Project("p2", api_connector)
+        first_p1, first_p2 = p1.graph(), p2.graph()
+        assert p1.graph() is first_p1 and p2.graph(gateways=True) is not first_p2
+
+        data["version"] = 2
+        data["p1"] = [{"id": "c", "status": "PENDING"}]
+        assert p1.graph() is not first_p1
+        assert p2.graph(gateways=True) is p2.graph(gateways=True)
+        assert p1.cache_stats()['graph'] == {'hits': 1, 'misses': 2}
+        assert (p1.cache_stats()['invalidations'], p2.cache_stats()['invalidations']) == (1, 0)
+
+    def test_cache_check_shared(self, api_connector):
+        """Test that the projects of a connector ask for their latest files once per data version, and that the
+        memoized data is kept when the data version cannot be requested."""
+        with open(Path(__file__).resolve().parent / 'data' / 'graphs' / 'graph.json') as f:
+            graph = json.load(f)
+        versions = [1]
+
+        def fetch_version():
+            if isinstance(versions[0], Exception):
+                raise versions[0]
+            return versions[0]
+
+        api_connector.get_request.side_effect = lambda route, params=None: MagicMock(
+            status_code=200, json=MagicMock(return_value=graph if route.endswith("/graph") else {"files": []}))
+        api_connector.data_version_watcher = DataVersionWatcher(fetch_version, check_interval=0)
+        for _ in range(3):
+            Project("p1", api_connector).graph()
+        routes = [c.args[0] for c in api_connector.get_request.call_args_list]
+        assert routes.count("/projects/p1/files") == 1 and routes.count("/project/p1/graph") == 3
+
+        project = Project("p1", api_connector)
+        first = project.graph()
+        versions[0] = req.ConnectionError("unreachable")
+        assert project.graph() is first and project.cache_invalidations == 0
+
+    def test_discover_process_keys(self, api_connector, mocker):
+        """Test that process keys are requested in pages, then only those of the rows after the watermark while the
+        files of the project do not change, and all of them again when they do."""
+        connection = sqlite3.connect(":memory:")
+        connection.create_function("TIMESTAMP_TO_MILLIS", 1, lambda millis: millis)
+        connection.create_function("MILLIS_TO_TIMESTAMP", 1, lambda millis: millis)
+        connection.execute("CREATE TABLE cases (__time INTEGER, processkey TEXT)")
+        connection.executemany("INSERT INTO cases VALUES (?, ?)", [(i, f"case'{i:02d}") for i in range(10)])
+        ds = Datasource("cases", "cases", MagicMock(query_cache=None))
+        ds._connection = connection
+        mocker.patch.object(Project, "cases_datasource", new_callable=mocker.PropertyMock, return_value=ds)
+        files = mocker.patch.object(Project, "_Project__files_fingerprint", return_value="file 1")
+        request = mocker.spy(ds, "request")
+
+        project = Project("project_id", api_connector)
+        assert project.discover_process_keys(page_size=4) == 10
+        assert request.call_count == 4  # The watermark, then pages of 4, 4 and 2 keys
+        assert project.process_keys == [f"case'{i:02d}" for i in range(10)]
+        assert project.process_keys + ["other"] == [f"case'{i:02d}" for i in range(10)] + ["other"]
+        assert "case'03" in project.process_keys and "case'99" not in project.process_keys
+
+        # Rows appended without new files are found from the watermark
+        connection.executemany("INSERT INTO cases VALUES (?, ?)", [(9, "case'10"), (12, "case'00")])
+        request.reset_mock()
+        assert project.discover_process_keys(page_size=4) == 1
+        assert project.process_keys[-1] == "case'10"
+        assert "__time\" >= MILLIS_TO_TIMESTAMP(9)" in request.call_args_list[1].args[0]
+
+        # A new file can hold rows older than the watermark
+        connection.execute("INSERT INTO cases VALUES (3, 'case''11')")
+        files.return_value = "file 2"
+        project.invalidate_caches()
+        request.reset_mock()
+        assert len(project.process_keys) == 12
+        assert project.process_keys[-1] == "case'11"
+        assert "MILLIS_TO_TIMESTAMP" not in request.call_args_list[1].args[0]
+
+        files.side_effect = ValueError("unavailable")
+        assert project.discover_process_keys(page_size=4) == 12
+
+    def test_sample_process_keys(self, api_connector, mocker):
+        """Test that a shuffled sample is drawn by the datasource, reproducibly and in proportion to its strata,
+        from a hash of the process keys rather than of their time."""
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        connection.create_function("MOD", 2, lambda a, b: a % b)
+        connection.create_function("RIGHT", 2, lambda text, length: text[-length:])
+        connection.create_function("REGEXP_REPLACE", 3, lambda text, pattern, new: re.sub(pattern, new, text))
+        connection.create_function("PARSE_LONG", 2, lambda text, radix: int(text, radix) if text else None)
+        connection.execute("CREATE TABLE cases (__time INTEGER, processkey TEXT, variant TEXT)")
+        connection.executemany("INSERT INTO cases VALUES (?, ?, ?)",
+                               [(0, f"case{i}", "a" if i % 4 else "b") for i in range(2000)])  # All at the same time
+        ds = Datasource("cases", "cases", MagicMock(query_cache=None))
+        ds._connection = connection
+        mocker.patch.object(Project, "cases_datasource", new_callable=mocker.PropertyMock, return_value=ds)
+        added = mocker.spy(KeySample, "add")
+
+        project = Project("project_id", api_connector)
+        sample = project.sample_process_keys(20, seed=1)
+        assert len(set(sample)) == 20 and added.call_count < 200
+        assert project.sample_process_keys(20, seed=1) == sample
+        assert project.sample_process_keys(20, seed=2) != sample
+        assert len(project._process_keys) == 0
+
+        stratified = project.sample_process_keys(40, seed=1, stratify_by="variant")
+        assert sum(int(key[4:]) % 4 == 0 for key in stratified) == 10
+        assert len(project.sample_process_keys(40, seed=1, sql_sampling=False, stratify_by="variant")) == 40
+
+        graph_instance = mocker.patch.object(Project, "graph_instance_from_key")
+        project.get_graph_instances(limit=5, shuffle=True, seed=1)
+        assert [c.args[0] for c in graph_instance.call_args_list] == project.sample_process_keys(5, seed=1)
+
+        # Only the datasources rejecting the sampling request make the keys sampled locally
+        project._process_keys = [f"case{i}" for i in range(10)]
+        project._process_keys_stale = True
+        mocker.patch.object(Project, "discover_process_keys")
+        mocker.patch.object(Project, "sample_process_keys", side_effect=AvaticaError("No match found for PARSE_LONG"))
+        graph_instance.reset_mock()
+        with pytest.warns(RuntimeWarning, match="PARSE_LONG"):
+            project.get_graph_instances(limit=5, shuffle=True, seed=1)
+        assert graph_instance.call_count == 5
+        Project.sample_process_keys.side_effect = ConnectionError("unreachable")
+        with pytest.raises(ConnectionError):
+            project.get_graph_instances(limit=5, shuffle=True, seed=1)
@@ -1,6 +1,8 @@
 # MIT License, Copyright 2023 iGrafx
 # https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
 import os
+import sqlite3
+from unittest.mock import MagicMock
 import pytest
 import pandas as pd
 from igrafx_mining_sdk.datasource import Datasource
@@ -92,3 +94,44 @@ class TestDatasource:
         ds.close_ds_connection()
         assert ds._cursor is None
         assert ds._connection is None
+
+    def test_iter_request(self):
+        """Test that the results are fetched in chunks with the same dtypes, on a local DB-API connection"""
+        connection = sqlite3.connect(":memory:")
+        connection.execute("CREATE TABLE cases (id TEXT, duration INTEGER, price REAL)")
+        connection.executemany("INSERT INTO cases VALUES (?, ?, ?)",
+                               [(f"case{i}", None if i == 7 else i, i * 1.5) for i in range(10)])
+        ds = Datasource("cases", "cases", MagicMock())
+        ds._connection = connection
+
+        chunks = list(ds.iter_request("SELECT * FROM cases ORDER BY id", chunk_size=4))
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert all(chunk.dtypes.to_dict() == chunks[0].dtypes.to_dict() for chunk in chunks)
+        assert str(chunks[0].dtypes["duration"]) == "Int64"
+        assert pd.concat(chunks)["duration"].isna().sum() == 1
+        with pytest.raises(ValueError):
+            next(ds.iter_request("SELECT * FROM cases", chunk_size=0))
+
+    def test_request_arrow(self):
+        """Test that the results are returned as typed Arrow columns and as Arrow or NumPy backed Dataframes"""
+        pyarrow = pytest.importorskip("pyarrow")
+        connection = sqlite3.connect(":memory:")
+        connection.execute("CREATE TABLE cases (id TEXT, duration INTEGER, price REAL)")
+        connection.executemany("INSERT INTO cases VALUES (?, ?, ?)",
+                               [(f"case{i}", None if i < 4 else i, i * 1.5) for i in range(10)])
+        ds = Datasource("cases", "cases", MagicMock())
+        ds._connection = connection
+
+        table = ds.request_arrow("SELECT * FROM cases ORDER BY id", chunk_size=3)
+        assert table.num_rows == 10 and table.column_names == ["id", "duration", "price"]
+        assert table.schema.types == [pyarrow.string(), pyarrow.int64(), pyarrow.float64()]
+        assert table["duration"].null_count == 4 and table["duration"].num_chunks == 4
+
+        df = ds.request("SELECT * FROM cases ORDER BY id", dtype_backend="pyarrow")
+        assert isinstance(df["id"].dtype, pd.ArrowDtype) and df["duration"].sum() == sum(range(4, 10))
+        df = ds.request("SELECT * FROM cases ORDER BY id", dtype_backend="pyarrow", dictionary_encode=True)
+        assert isinstance(df["id"].dtype, pd.CategoricalDtype) and df["id"].iloc[9] == "case9"
+        df = ds.request("SELECT * FROM cases WHERE id = 'none'", dtype_backend="numpy_nullable")
+        assert len(df) == 0 and list(df.columns) == ["id", "duration", "price"]
+        with pytest.raises(ValueError):
+            ds.request("SELECT * FROM cases", dtype_backend="arrow")
@@ -1,8 +1,12 @@
 # MIT License, Copyright 2023 iGrafx
 # https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import copy
+import json
 from pathlib import Path
 import pytest
-from igrafx_mining_sdk.graph import Graph
+import requests as req
+from igrafx_mining_sdk import json_decoding
+from igrafx_mining_sdk.graph import Graph, GraphInstance
 
 
 class TestGraph:
@@ -40,3 +44,45 @@ class TestGraph:
         file_path = base_dir / 'data' / 'graphs' / 'graph.json'
         g = Graph.from_json(0, str(file_path))
         assert len(g) > 0
+
+    def test_from_dict_same_as_networkx(self):
+        """Test that the graphs built from dictionaries are those built by the networkx methods, and that the
+        dictionaries are copied unless they were decoded by the SDK."""
+        base_dir = Path(__file__).resolve().parent
+        with open(base_dir / 'data' / 'graphs' / 'graph.json') as f:
+            payload = json.load(f)
+        payload["vertices"].append(dict(payload["vertices"][0], extra=1))  # Merged with the first one
+        original = copy.deepcopy(payload)
+        expected = Graph(0, [(item["id"], dict(item)) for item in payload["vertices"]],
+                         [(item["source"], item["destination"], dict(item)) for item in payload["edges"]])
+        g = Graph.from_dict(0, payload)
+        assert list(g.nodes(data=True)) == list(expected.nodes(data=True))
+        assert list(g.edges(data=True)) == list(expected.edges(data=True))
+        assert list(g.pred.items()) == list(expected.pred.items())
+        assert payload == original
+        assert all(g.nodes[item["id"]] is not item for item in payload["vertices"])
+        g.nodes[payload["vertices"][1]["id"]]["name"] = "renamed"
+        assert payload == original
+
+        decoded = Graph._from_decoded(0, payload)
+        assert list(decoded.nodes(data=True)) == list(expected.nodes(data=True))
+        assert decoded.nodes[payload["vertices"][1]["id"]] is payload["vertices"][1]  # Not copied
+
+        with open(base_dir / 'data' / 'graphs' / 'graph_with_invalid_edges.json') as f:
+            payload = json.load(f)
+        expected = GraphInstance(0, [(item["id"], dict(item)) for item in payload["vertexInstances"]],
+                                 [(item["source"]["id"], item["destination"]["id"]) for item in payload["edgeInstances"]],
+                                 payload["reworkTotal"], payload["concurrencyRate"])
+        gi = GraphInstance.from_dict(0, payload)
+        assert list(gi.nodes(data=True)) == list(expected.nodes(data=True))
+        assert list(gi.edges(data=True)) == list(expected.edges(data=True))
+        assert all(gi.nodes[item["id"]] is not item for item in payload["vertexInstances"])
+
+    def test_response_json(self, monkeypatch):
+        """Test that response bodies are decoded with or without orjson."""
+        response = req.Response()
+        response._content = b'{"vertices": [{"id": "a", "name": "\\u00e9"}], "edges": []}'
+        expected = {"vertices": [{"id": "a", "name": "\u00e9"}], "edges": []}
+        assert json_decoding.response_json(response) == expected
+        monkeypatch.setattr(json_decoding, "orjson", None)
+        assert json_decoding.response_json(response) == expected
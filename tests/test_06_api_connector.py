@@ -0,0 +1,167 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+from unittest.mock import MagicMock
+import threading
+import time
+import pytest
+from igrafx_mining_sdk.api_connector import APIConnector, TokenManager
+from igrafx_mining_sdk.data_version import DataVersionWatcher
+from igrafx_mining_sdk.workgroup import Workgroup
+
+
+class TestAPIConnector:
+    """Tests for the APIConnector class that do not need a running Mining platform."""
+
+    @pytest.fixture
+    def login(self, mocker):
+        """Mock the login of the APIConnector class."""
+        return mocker.patch.object(APIConnector, '_APIConnector__login', return_value={"access_token": "token"})
+
+    def test_pooled_session(self, login):
+        """Test that the connector mounts a pooled adapter with the given sizes."""
+        connector = APIConnector("id", "key", "https://api/", "https://auth", None, True,
+                                 pool_connections=2, pool_maxsize=16)
+        adapter = connector.session.get_adapter("https://api/pub/projects")
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 16
+        assert connector.apiurl == "https://api/pub"
+
+    def test_invalid_pool_size(self, login):
+        """Test that a pool size of zero is refused."""
+        with pytest.raises(ValueError):
+            APIConnector("id", "key", "https://api", "https://auth", None, True, pool_maxsize=0)
+
+    def test_requests_reuse_session(self, login):
+        """Test that the HTTP verbs go through the shared session."""
+        connector = APIConnector("id", "key", "https://api", "https://auth", None, True)
+        connector.session = MagicMock()
+        connector.session.request.return_value.status_code = 200
+        connector.get_request("/projects")
+        connector.delete_request("/project/id")
+        assert connector.session.request.call_count == 2
+
+    def test_workgroup_context_manager(self, login, mocker):
+        """Test that leaving the workgroup context closes the session."""
+        close = mocker.patch.object(APIConnector, 'close')
+        with Workgroup("id", "key", "https://api", "https://auth") as wg:
+            assert isinstance(wg, Workgroup)
+        close.assert_called_once()
+
+
+class FakeClock:
+    """A clock that only moves forward when told to."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubAuthSession:
+    """A stand-in for the HTTP session, serving an authentication endpoint that issues numbered tokens
+    and an API that only accepts the tokens it considers valid."""
+    def __init__(self, expires_in=300):
+        self.expires_in = expires_in
+        self.logins = 0
+        self.revoked = set()
+        self.api_calls = []
+
+    def post(self, url, data, verify=True):
+        self.logins += 1
+        return MagicMock(status_code=200, **{"json.return_value": {"access_token": f"token{self.logins}",
+                                                                   "expires_in": self.expires_in}})
+
+    def request(self, method, url, headers=None, **kwargs):
+        token = headers["Authorization"].split()[-1]
+        self.api_calls.append(token)
+        status_code = 401 if token in self.revoked else 200
+        return MagicMock(status_code=status_code, **{"json.return_value": {"token": token}})
+
+    def close(self):
+        pass
+
+
+class TestTokenManager:
+    """Tests for the expiry-aware refresh of the token."""
+
+    @pytest.fixture
+    def stub(self, mocker):
+        """Serve the connector from a stub authentication endpoint."""
+        stub = StubAuthSession()
+        mocker.patch.object(APIConnector, '_APIConnector__create_session', return_value=stub)
+        return stub
+
+    def test_proactive_refresh(self, stub):
+        """Test that the token is refreshed before it expires, without a rejected request."""
+        clock = FakeClock()
+        connector = APIConnector("id", "key", "https://api", "https://auth", None, True,
+                                 token_refresh_margin=30, clock=clock)
+        assert connector.get_request("/projects").json() == {"token": "token1"}
+        clock.now = 269
+        assert connector.get_request("/projects").json() == {"token": "token1"}
+        clock.now = 271
+        assert connector.get_request("/projects").json() == {"token": "token2"}
+        assert stub.api_calls == ["token1", "token1", "token2"]
+        assert connector.token_manager.refresh_count == 2
+
+    def test_rejected_token_returns_retried_response(self, stub):
+        """Test that a rejected token is refreshed and that the response of the replayed request is returned."""
+        connector = APIConnector("id", "key", "https://api", "https://auth", None, True, clock=FakeClock())
+        stub.revoked.add("token1")
+        response = connector.get_request("/projects")
+        assert response.status_code == 200
+        assert response.json() == {"token": "token2"}
+        assert stub.logins == 2
+
+    def test_single_refresh_for_concurrent_callers(self):
+        """Test that threads needing a new token at once only trigger one login."""
+        clock = FakeClock()
+        logins = []
+
+        def fetch_token():
+            time.sleep(0.05)
+            logins.append(clock.now)
+            return {"access_token": f"token{len(logins)}", "expires_in": 100}
+        manager = TokenManager(fetch_token, refresh_margin=10, clock=clock)
+        headers = []
+        threads = [threading.Thread(target=lambda: headers.append(manager.get_header())) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(logins) == 1
+        assert all(h == {"Authorization": "Bearer token1"} for h in headers)
+
+    def test_invalidate_only_once(self):
+        """Test that invalidating an already replaced token does not log in again."""
+        tokens = iter(["a", "b", "c"])
+        manager = TokenManager(lambda: {"access_token": next(tokens)}, clock=FakeClock())
+        rejected = manager.get_header()
+        manager.invalidate(rejected)
+        manager.invalidate(rejected)
+        assert manager.header == {"Authorization": "Bearer b"}
+        assert manager.refresh_count == 2
+
+    def test_short_lived_token(self):
+        """Test that a token living less than twice the margin is refreshed halfway through its lifetime."""
+        clock = FakeClock()
+        manager = TokenManager(lambda: {"access_token": "t", "expires_in": 20}, refresh_margin=30, clock=clock)
+        manager.get_header()
+        assert manager.expires_at == 10
+
+
+class TestDataVersionWatcher:
+    """Tests for the DataVersionWatcher class."""
+
+    def test_check_interval(self):
+        """Test that the data version is only asked for again once the check interval has passed."""
+        clock = FakeClock()
+        versions = iter([1, 2, 3])
+        watcher = DataVersionWatcher(lambda: next(versions), check_interval=5, clock=clock)
+        assert watcher.current() == 1
+        clock.now = 4
+        assert watcher.current() == 1
+        clock.now = 5
+        assert watcher.current() == 2
+        watcher.expire()
+        assert watcher.current() == 3 and watcher.check_count == 3
@@ -0,0 +1,116 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import asyncio
+import pytest
+from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.retry import RetryPolicy
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+
+class TestAsyncAPIConnector:
+    """Tests for the AsyncAPIConnector class against a local aiohttp server."""
+
+    @pytest.fixture
+    def connector(self, mocker):
+        """Create an APIConnector whose token has already expired."""
+        mocker.patch.object(APIConnector, '_APIConnector__login', return_value={"access_token": "expired"})
+        return APIConnector("id", "key", "http://127.0.0.1", "http://127.0.0.1/token", None, True,
+                            max_concurrency=4)
+
+    @staticmethod
+    def make_app(state):
+        """Build a server that only accepts the refreshed token and records the concurrency."""
+        async def token(request):
+            state["logins"] += 1
+            await asyncio.sleep(0.01)
+            return web.json_response({"access_token": "fresh", "expires_in": 300})
+
+        async def projects(request):
+            if request.headers.get("Authorization") != "Bearer fresh":
+                return web.Response(status=401)
+            state["in_flight"] += 1
+            state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            await asyncio.sleep(0.01)
+            state["in_flight"] -= 1
+            return web.json_response([{"id": "p"}])
+
+        app = web.Application()
+        app.router.add_post("/token", token)
+        app.router.add_get("/pub/projects", projects)
+        return app
+
+    def test_single_refresh_and_concurrency_cap(self, connector):
+        """Test that parallel requests with an expired token trigger a single login and respect the cap."""
+        state = {"logins": 0, "in_flight": 0, "max_in_flight": 0}
+
+        async def scenario():
+            async with TestServer(self.make_app(state)) as server:
+                connector.apiurl = str(server.make_url("/pub"))
+                connector._authurl = str(server.make_url("/token"))
+                async with connector.async_connector as async_connector:
+                    return await asyncio.gather(*(async_connector.get_request("/projects") for _ in range(20)))
+
+        responses = asyncio.run(scenario())
+        assert [r.status_code for r in responses] == [200] * 20
+        assert responses[0].json() == [{"id": "p"}]
+        assert state["logins"] == 1
+        assert state["max_in_flight"] <= 4
+        assert connector.token_header == {"Authorization": "Bearer fresh"}
+
+    def test_new_event_loop(self, connector):
+        """Test that the session of a previous event loop is closed when the connector is used from a new one."""
+        state = {"logins": 0, "in_flight": 0, "max_in_flight": 0}
+        async_connector = connector.async_connector
+
+        async def scenario():
+            async with TestServer(self.make_app(state)) as server:
+                connector.apiurl = str(server.make_url("/pub"))
+                connector._authurl = str(server.make_url("/token"))
+                response = await async_connector.get_request("/projects")
+                return response.status_code, async_connector._session
+
+        status_code, first_session = asyncio.run(scenario())
+        second_status_code, second_session = asyncio.run(scenario())
+        assert (status_code, second_status_code) == (200, 200)
+        assert first_session.closed and second_session is not first_session
+        asyncio.run(async_connector.close())
+
+    def test_no_slot_held_between_retries(self, connector):
+        """Test that a request waiting before its retry lets the other requests use its slot of the semaphore."""
+        state = {"logins": 0, "in_flight": 0, "max_in_flight": 0, "unavailable": 1, "done": []}
+        connector.max_concurrency = 1
+        connector.retry_policy = RetryPolicy(backoff_factor=0.3, jitter=False)
+        app = self.make_app(state)
+
+        async def unavailable(request):
+            if state["unavailable"] > 0:
+                state["unavailable"] -= 1
+                return web.Response(status=503)
+            state["done"].append("retried")
+            return web.json_response([])
+
+        app.router.add_get("/pub/unavailable", unavailable)
+
+        async def scenario():
+            async with TestServer(app) as server:
+                connector.apiurl = str(server.make_url("/pub"))
+                connector._authurl = str(server.make_url("/token"))
+                async with connector.async_connector as async_connector:
+                    await async_connector.get_request("/projects")  # Logs in first
+                    retried = asyncio.ensure_future(async_connector.get_request("/unavailable"))
+                    await asyncio.sleep(0.1)
+                    response = await async_connector.get_request("/projects")
+                    state["done"].append("other")
+                    return (await retried).status_code, response.status_code
+
+        assert asyncio.run(scenario()) == (200, 200)
+        assert state["done"] == ["other", "retried"]
+
+    def test_invalid_concurrency(self, connector):
+        """Test that a concurrency of zero is refused."""
+        connector.max_concurrency = 0
+        with pytest.raises(ValueError):
+            assert connector.async_connector
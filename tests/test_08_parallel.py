@@ -0,0 +1,97 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import threading
+import time
+from unittest.mock import MagicMock
+import pytest
+import requests as req
+from igrafx_mining_sdk.parallel import FetchError, RateLimiter, parallel_fetch, is_transient_error
+
+
+def http_error(status_code):
+    """Build an HTTPError carrying a response with the given status code."""
+    response = MagicMock(status_code=status_code)
+    return req.HTTPError(f"{status_code} error", response=response)
+
+
+class TestParallelFetch:
+    """Tests for the parallel fetch helpers."""
+
+    def test_ordered_results(self):
+        """Test that ordered mode yields the results in the order of the keys."""
+        def fetch(key):
+            time.sleep(0.001 * (10 - key))
+            return key * 2
+        results = list(parallel_fetch(fetch, range(10), max_workers=4, ordered=True))
+        assert results == [(k, k * 2) for k in range(10)]
+
+    def test_unordered_results(self):
+        """Test that unordered mode yields every result."""
+        results = list(parallel_fetch(lambda k: k, range(50), max_workers=8))
+        assert sorted(results) == [(k, k) for k in range(50)]
+
+    def test_bounded_in_flight(self):
+        """Test that no more than max_in_flight keys are consumed ahead of the results."""
+        consumed = []
+
+        def keys():
+            for k in range(100):
+                consumed.append(k)
+                yield k
+        results = parallel_fetch(lambda k: k, keys(), max_workers=2, max_in_flight=4, ordered=True)
+        for key, _ in results:
+            assert len(consumed) - key <= 5
+
+    def test_retry_and_errors(self):
+        """Test that transient errors are retried and that failed keys are recorded."""
+        attempts = {}
+        lock = threading.Lock()
+
+        def fetch(key):
+            with lock:
+                attempts[key] = attempts.get(key, 0) + 1
+            if key == "flaky" and attempts[key] < 2:
+                raise http_error(503)
+            if key == "missing":
+                raise http_error(404)
+            if key == "down":
+                raise req.ConnectionError("reset")
+            return key
+        errors = []
+        results = list(parallel_fetch(fetch, ["ok", "flaky", "missing", "down"], max_workers=2, max_retries=2,
+                                      retry_delay=0, errors=errors))
+        assert sorted(results) == [("flaky", "flaky"), ("ok", "ok")]
+        by_key = {e.key: e for e in errors}
+        assert isinstance(by_key["missing"], FetchError)
+        assert by_key["missing"].attempts == 1
+        assert by_key["missing"].status_code == 404
+        assert by_key["down"].attempts == 3
+
+    def test_invalid_workers(self):
+        """Test that zero workers are refused."""
+        with pytest.raises(ValueError):
+            list(parallel_fetch(lambda k: k, [1], max_workers=0))
+
+    def test_transient_errors(self):
+        """Test the classification of transient errors."""
+        assert is_transient_error(http_error(429))
+        assert is_transient_error(req.Timeout())
+        assert not is_transient_error(http_error(400))
+        assert not is_transient_error(KeyError("vertexInstances"))
+
+
+class TestRateLimiter:
+    """Tests for the RateLimiter class."""
+
+    def test_spacing(self):
+        """Test that calls are spaced by the rate interval."""
+        now = [0.0]
+        sleeps = []
+
+        def sleep(duration):
+            sleeps.append(duration)
+            now[0] += duration
+        limiter = RateLimiter(10, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.acquire()
+        assert sleeps == pytest.approx([0.1, 0.1])
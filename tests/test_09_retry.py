@@ -0,0 +1,89 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+import pytest
+import requests as req
+from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.retry import RetryPolicy
+
+
+def response(status_code, headers=None):
+    """Build a response with the given status code and headers."""
+    return MagicMock(status_code=status_code, headers=headers or {})
+
+
+class FakeTime:
+    """A clock that moves forward when slept on."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class TestRetryPolicy:
+    """Tests for the RetryPolicy class."""
+
+    @pytest.fixture
+    def fake_time(self):
+        """Provide a controllable clock."""
+        return FakeTime()
+
+    def test_exponential_backoff_with_jitter(self, fake_time):
+        """Test that delays grow exponentially, are capped and drawn below the backoff."""
+        policy = RetryPolicy(max_retries=10, backoff_factor=1, max_backoff=5, total_timeout=None,
+                             clock=fake_time.clock, rng=lambda: 0.5)
+        delays = [policy.next_delay("GET", "/projects", attempt, 0, response=response(503)) for attempt in range(5)]
+        assert delays == [0.5, 1, 2, 2.5, 2.5]
+
+    def test_retry_after(self, fake_time):
+        """Test that the Retry-After header is honoured, in seconds and as a date."""
+        policy = RetryPolicy(jitter=False, clock=fake_time.clock)
+        assert policy.next_delay("GET", "/projects", 0, 0, response=response(429, {"Retry-After": "7"})) == 7
+        date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=20), usegmt=True)
+        delay = policy.next_delay("GET", "/projects", 0, 0, response=response(503, {"Retry-After": date}))
+        assert 15 < delay <= 20
+
+    def test_idempotency_rules(self, fake_time):
+        """Test that non idempotent requests are only retried after a 429 or when a route rule allows it."""
+        policy = RetryPolicy(jitter=False, clock=fake_time.clock,
+                             route_rules=[("POST", r"/column-mapping$", True), ("GET", r"/export$", False)])
+        assert policy.next_delay("POST", "/project/p/file", 0, 0, response=response(503)) is None
+        assert policy.next_delay("POST", "/project/p/file", 0, 0, error=req.ConnectionError()) is None
+        assert policy.next_delay("POST", "/project/p/file", 0, 0, response=response(429)) is not None
+        assert policy.next_delay("POST", "/project/p/column-mapping", 0, 0, response=response(503)) is not None
+        assert policy.next_delay("GET", "/project/p/export", 0, 0, error=req.ConnectionError()) is None
+        assert policy.next_delay("GET", "/projects", 0, 0, response=response(404)) is None
+
+    def test_limits_and_metrics(self, fake_time):
+        """Test the retry count, the time budget and the metrics."""
+        policy = RetryPolicy(max_retries=2, jitter=False, backoff_factor=1, total_timeout=10, clock=fake_time.clock)
+        assert policy.next_delay("GET", "/a", 0, 0, response=response(502)) == 1
+        assert policy.next_delay("GET", "/a", 1, 0, error=req.Timeout()) == 2
+        assert policy.next_delay("GET", "/a", 2, 0, response=response(502)) is None
+        fake_time.now = 9.5
+        assert policy.next_delay("GET", "/a", 0, 0, response=response(504)) is None
+        assert policy.metrics.to_dict() == {'retries': 2, 'retriesByReason': {502: 1, 'Timeout': 1},
+                                            'sleepTime': 3, 'givenUp': 2}
+
+    def test_connector_retries(self, mocker, fake_time):
+        """Test that the connector retries transient errors for every verb and returns the final response."""
+        mocker.patch.object(APIConnector, '_APIConnector__login', return_value={"access_token": "token"})
+        policy = RetryPolicy(jitter=False, clock=fake_time.clock, sleep=fake_time.sleep)
+        connector = APIConnector("id", "key", "https://api", "https://auth", None, True, retry_policy=policy)
+        connector.session = MagicMock()
+        connector.session.request.side_effect = [req.ConnectionError("reset"), response(503), response(200)]
+        assert connector.put_request("/projects/p/unarchive").status_code == 200
+        assert fake_time.sleeps == [0.5, 1.0]
+        assert connector.retry_metrics.retries == 2
+
+        connector.session.request.side_effect = [req.ConnectionError("reset")]
+        with pytest.raises(req.ConnectionError):
+            connector.post_request("/project/p/file")
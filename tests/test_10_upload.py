@@ -0,0 +1,74 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import email
+import io
+import zipfile
+from pathlib import Path
+import pytest
+from igrafx_mining_sdk.upload import MultipartFileEncoder, ZipFileEncoder, get_mime_type
+
+FILE_PATH = Path(__file__).resolve().parent / 'data' / 'tables' / 'testdata.csv'
+
+
+def parse_multipart(content_type, body):
+    """Parse a multipart body and return its parts."""
+    message = email.message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    return message.get_payload()
+
+
+class TestMultipartFileEncoder:
+    """Tests for the streaming multipart encoder."""
+
+    def test_body(self):
+        """Test that the streamed body is a valid multipart body holding the file."""
+        encoder = MultipartFileEncoder(str(FILE_PATH), chunk_size=64)
+        body = b"".join(encoder)
+        assert len(body) == len(encoder)
+        parts = parse_multipart(encoder.content_type, body)
+        assert len(parts) == 1
+        assert parts[0].get_filename() == "testdata.csv"
+        assert parts[0].get_content_type() == "text/csv"
+        assert parts[0].get_payload(decode=True) == FILE_PATH.read_bytes()
+
+    def test_progress_and_replay(self):
+        """Test that the progress callback reaches the total and that the body can be sent twice."""
+        progress = []
+        encoder = MultipartFileEncoder(str(FILE_PATH), chunk_size=100,
+                                       progress_callback=lambda sent, total: progress.append((sent, total)))
+        first = b"".join(encoder)
+        assert progress[-1] == (len(encoder), len(encoder))
+        assert all(a[0] < b[0] for a, b in zip(progress, progress[1:]))
+        assert b"".join(encoder) == first
+
+    def test_unsupported_extension(self):
+        """Test that unsupported files are refused."""
+        with pytest.raises(ValueError):
+            get_mime_type("log.parquet")
+
+
+class TestZipFileEncoder:
+    """Tests for the encoder compressing a file into a zip archive while it is sent."""
+
+    def test_archive(self):
+        """Test that the body holds a zip archive of the file, under the name of the file."""
+        progress = []
+        encoder = ZipFileEncoder(str(FILE_PATH), chunk_size=64, compression_level=9,
+                                 progress_callback=lambda read, total: progress.append((read, total)))
+        body = b"".join(encoder)
+        parts = parse_multipart(encoder.content_type, body)
+        assert parts[0].get_filename() == "testdata.csv.zip"
+        assert parts[0].get_content_type() == "application/zip"
+        archive = zipfile.ZipFile(io.BytesIO(parts[0].get_payload(decode=True)))
+        assert archive.namelist() == ["testdata.csv"]
+        assert archive.read("testdata.csv") == FILE_PATH.read_bytes()
+        assert progress[-1] == (FILE_PATH.stat().st_size, FILE_PATH.stat().st_size)
+        assert encoder.bytes_sent == len(body)
+        assert b"".join(encoder) == body
+        assert len(b"".join(ZipFileEncoder(str(FILE_PATH), compression_level=0))) > len(body)
+
+    def test_invalid(self):
+        """Test that zip files and invalid compression levels are refused."""
+        with pytest.raises(ValueError):
+            ZipFileEncoder(str(FILE_PATH.with_name("testdata_zip.zip")))
+        with pytest.raises(ValueError):
+            ZipFileEncoder(str(FILE_PATH), compression_level=10)
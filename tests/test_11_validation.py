@@ -0,0 +1,66 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import pytest
+from igrafx_mining_sdk.column_mapping import Column, ColumnMapping, ColumnType, FileStructure, FileType
+from igrafx_mining_sdk.validation import java_time_format_to_strptime, validate_csv
+
+COLUMN_MAPPING = ColumnMapping([
+    Column('Case ID', 0, ColumnType.CASE_ID),
+    Column('Activity', 1, ColumnType.TASK_NAME),
+    Column('Start', 2, ColumnType.TIME, time_format="yyyy-MM-dd'T'HH:mm"),
+    Column('End', 3, ColumnType.TIME, time_format="yyyy-MM-dd'T'HH:mm"),
+    Column('Price', 4, ColumnType.METRIC),
+    Column('Country', 5, ColumnType.DIMENSION),
+])
+
+CSV_CONTENT = """Case ID;Activity;Start;End;Price;Country
+1;A;2024-01-01T10:00;2024-01-01T11:00;10.5;FR
+1;;2024-01-01T10:00;;abc;FR
+# a comment
+
+2;'B; quoted';01/01/2024;2024-01-01T11:00;;US
+3;C;2024-01-01T10:00
+;D;2024-01-01T10:00;2024-01-01T11:00;1e3;DE
+"""
+
+
+class TestValidation:
+    """Tests for the validation of CSV files against a column mapping."""
+
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        """Write a CSV file with a few invalid rows."""
+        path = tmp_path / "log.csv"
+        path.write_text(CSV_CONTENT)
+        return path
+
+    def test_java_time_format_to_strptime(self):
+        """Test that Java date patterns are converted into strptime formats."""
+        assert java_time_format_to_strptime("yyyy-MM-dd'T'HH:mm:ss.SSS") == "%Y-%m-%dT%H:%M:%S.%f"
+        assert java_time_format_to_strptime("dd/MM/yy hh:mm a") == "%d/%m/%y %I:%M %p"
+        assert java_time_format_to_strptime("EEEE d MMMM yyyy 'at' HH'h' '%'") == "%A %d %B %Y at %Hh %%"
+        with pytest.raises(ValueError):
+            java_time_format_to_strptime("yyyy-DDD")
+
+    def test_validate_csv(self, csv_path):
+        """Test that the issues of the file are reported with their row, in order."""
+        filestructure = FileStructure(FileType.CSV, delimiter=";", quote_char="'")
+        report = validate_csv(csv_path, filestructure, COLUMN_MAPPING, chunk_size=2)
+        assert not report.is_valid
+        assert [(i.row, i.column, i.value) for i in report.issues] == [
+            (2, 'Activity', ''), (2, 'Price', 'abc'), (5, 'Start', '01/01/2024'), (6, None, None), (7, 'Case ID', '')]
+        assert report.rows == 7
+
+        truncated = validate_csv(csv_path, filestructure, COLUMN_MAPPING, max_errors=2)
+        assert truncated.truncated and truncated.issue_count == 5
+        assert [i.row for i in truncated.issues] == [2, 2]
+
+    def test_validate_csv_without_header(self, tmp_path):
+        """Test that a file without header is valid when its records match the mapping."""
+        path = tmp_path / "log.csv"
+        path.write_text("1,A,2024-01-01T10:00,2024-01-01T11:00,3,FR\n2,B,2024-01-02T10:00,,4,US\n")
+        report = validate_csv(path, FileStructure(FileType.CSV, header=False), COLUMN_MAPPING)
+        assert report.is_valid and report.rows == 2
+
+        with pytest.raises(ValueError):
+            validate_csv(path, FileStructure(FileType.XLSX), COLUMN_MAPPING)
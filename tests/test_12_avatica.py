@@ -0,0 +1,104 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import json
+from datetime import datetime
+from unittest.mock import MagicMock
+import pytest
+from igrafx_mining_sdk.avatica import AvaticaError, connect, parse_jdbc_url
+from igrafx_mining_sdk.connection_pool import ConnectionPool
+from igrafx_mining_sdk.datasource import Datasource
+
+JDBC_URL = "jdbc:avatica:remote:url=http://druid/druid/v2/sql/avatica/;transparent_reconnection=true"
+COLUMNS = [{"columnName": "processkey", "type": {"id": 12, "name": "VARCHAR"}},
+           {"columnName": "duration", "type": {"id": -5, "name": "BIGINT"}},
+           {"columnName": "enddate", "type": {"id": 93, "name": "TIMESTAMP"}}]
+ROWS = [[f"case{i}", None if i == 3 else i, 1704103200000 + i * 1000] for i in range(25)]
+
+
+class FakeAvaticaSession:
+    """An HTTP session answering the requests of the Avatica JSON protocol with the rows above."""
+
+    def __init__(self):
+        self.requests = []
+
+    def post(self, url, json=None, verify=True):
+        self.requests.append(json)
+        kind = json["request"]
+        if kind == "prepareAndExecute" and "FROM missing" in json["sql"]:
+            return self.response({"response": "error", "errorMessage": "Table missing not found"}, 500)
+        if kind == "prepareAndExecute":
+            size = json["maxRowsInFirstFrame"]
+            return self.response({"response": "executeResults", "results": [{
+                "signature": {"columns": COLUMNS}, "updateCount": -1,
+                "firstFrame": {"offset": 0, "done": size >= len(ROWS), "rows": ROWS[:size]}}]})
+        if kind == "fetch":
+            stop = json["offset"] + json["frameMaxSize"]
+            return self.response({"response": "fetch", "frame": {
+                "offset": json["offset"], "done": stop >= len(ROWS), "rows": ROWS[json["offset"]:stop]}})
+        if kind == "createStatement":
+            return self.response({"response": "createStatement", "statementId": 7})
+        return self.response({"response": kind})
+
+    @staticmethod
+    def response(body, status_code=200):
+        content = json.dumps(body).encode()
+        return MagicMock(ok=status_code < 400, status_code=status_code, content=content,
+                         json=MagicMock(return_value=body))
+
+
+class TestAvatica:
+    """Tests for the Avatica JSON transport of the datasources."""
+
+    def test_parse_jdbc_url(self):
+        """Test that the HTTP URL and the properties are read from the JDBC URL."""
+        url, properties = parse_jdbc_url(JDBC_URL)
+        assert url == "http://druid/druid/v2/sql/avatica/"
+        assert properties == {"transparent_reconnection": "true"}
+        with pytest.raises(ValueError):
+            parse_jdbc_url(JDBC_URL + ";serialization=protobuf")
+        with pytest.raises(ValueError):
+            parse_jdbc_url("jdbc:postgresql://host/db")
+
+    def test_cursor(self):
+        """Test that rows are fetched frame by frame, as tuples or as columns."""
+        session = FakeAvaticaSession()
+        connection = connect(JDBC_URL, "user", "secret", session=session, frame_size=10)
+        assert session.requests[0]["info"] == {"transparent_reconnection": "true", "user": "user",
+                                               "password": "secret"}
+        cursor = connection.cursor()
+        cursor.execute("SELECT * FROM edges")
+        assert [d[0] for d in cursor.description] == ["processkey", "duration", "enddate"]
+        assert cursor.fetchone() == ("case0", 0, datetime(2024, 1, 1, 10, 0))
+        assert len(cursor.fetchmany(12)) == 12
+        columns = cursor.fetchmany_columns()
+        assert columns["processkey"] == [f"case{i}" for i in range(13, 25)]
+        assert cursor.fetchall() == []
+        assert [r["offset"] for r in session.requests if r["request"] == "fetch"] == [10, 20]
+
+        with pytest.raises(AvaticaError, match="Table missing not found"):
+            cursor.execute("SELECT * FROM missing")
+        cursor.close()
+        connection.close()
+        assert session.requests[-1]["request"] == "closeConnection"
+
+    def test_datasource(self):
+        """Test that a datasource using the Avatica transport returns Dataframes with fixed dtypes."""
+        session = FakeAvaticaSession()
+        pool = ConnectionPool(lambda: connect(JDBC_URL, "user", "secret", session=session))
+        api_connector = MagicMock(sql_pool=MagicMock(return_value=pool), sql_transport="avatica")
+        ds = Datasource("edges", "edges", api_connector)
+        df = ds.request("SELECT * FROM edges")
+        assert len(df) == 25 and list(df.columns) == ["processkey", "duration", "enddate"]
+        assert df["enddate"].iloc[1] == datetime(2024, 1, 1, 10, 0, 1)
+
+        chunks = list(ds.iter_request("SELECT * FROM edges", chunk_size=10))
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        assert all(str(chunk["duration"].dtype) == "Int64" for chunk in chunks)
+        assert str(chunks[0]["enddate"].dtype).startswith("datetime64")
+        df = ds.request("SELECT * FROM edges", dtype_backend="numpy_nullable")
+        assert df.dtypes.to_dict() == chunks[0].dtypes.to_dict()
+        assert [r["request"] for r in session.requests].count("openConnection") == 1
+        ds.close_ds_connection()
+
+        with pytest.raises(ValueError):
+            Datasource("edges", "edges", api_connector, sql_transport="odbc")
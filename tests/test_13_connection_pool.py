@@ -0,0 +1,147 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import sqlite3
+import threading
+from unittest.mock import MagicMock
+import pytest
+from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.connection_pool import ConnectionPool
+from igrafx_mining_sdk.datasource import Datasource
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def sqlite_connect():
+    """Opens an in-memory database that can be used from the threads of the pool."""
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+class TestConnectionPool:
+    """Tests for the pool of SQL connections shared by the datasources of a workgroup."""
+
+    def test_reuse(self):
+        """Test that a checked in connection is reused rather than a new one opened."""
+        connect = MagicMock(side_effect=sqlite_connect)
+        pool = ConnectionPool(connect, max_size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            assert second is first
+        assert connect.call_count == 1 and pool.reused_count == 1
+        assert (pool.size, pool.idle, pool.in_use) == (1, 1, 0)
+        with pytest.raises(ValueError):
+            pool.release(sqlite_connect())
+
+    def test_max_size(self):
+        """Test that a checkout waits for a connection to be checked in once the pool is full."""
+        pool = ConnectionPool(sqlite_connect, max_size=1, timeout=0.05)
+        connection = pool.acquire()
+        with pytest.raises(TimeoutError):
+            pool.acquire()
+
+        pool.timeout = 5
+        threading.Timer(0.05, pool.release, args=(connection,)).start()
+        assert pool.acquire() is connection
+
+    def test_validation(self):
+        """Test that a connection idle for too long is validated, and replaced if it no longer works."""
+        clock = FakeClock()
+        pool = ConnectionPool(sqlite_connect, validation_interval=10, max_idle_time=100, clock=clock)
+        connection = pool.acquire()
+        pool.release(connection)
+        clock.now = 20
+        assert pool.acquire() is connection  # Valid, so reused
+        connection.close()
+        pool.release(connection)
+        clock.now = 40
+        replacement = pool.acquire()
+        assert replacement is not connection
+        assert pool.discarded_count == 1 and pool.size == 1
+
+        pool.release(replacement)
+        clock.now = 200
+        assert pool.acquire() is not replacement  # Closed after being idle for too long
+        assert pool.opened_count == 3
+
+    def test_discard_on_error(self):
+        """Test that a connection whose context raised is closed if it no longer works, and reused otherwise."""
+        broken, fresh = MagicMock(), MagicMock()
+        broken.cursor.side_effect = RuntimeError("connection lost")
+        pool = ConnectionPool(MagicMock(side_effect=[broken, fresh]), max_size=1)
+        with pytest.raises(RuntimeError):
+            with pool.connection():
+                raise RuntimeError("connection lost")
+        broken.close.assert_called_once()
+        assert pool.discarded_count == 1
+        with pytest.raises(ValueError):
+            with pool.connection() as connection:
+                assert connection is fresh
+                raise ValueError("syntax error")
+        with pytest.raises(ConnectionError):
+            with pool.connection() as connection:
+                assert connection is fresh
+                raise ConnectionError("connection reset")
+        fresh.close.assert_called_once()
+        assert pool.discarded_count == 2
+
+    def test_generator_closed_early(self):
+        """Test that the connection of a generator of results closed before its end is checked back in."""
+        connection = MagicMock()
+        pool = ConnectionPool(MagicMock(return_value=connection), max_size=1)
+
+        def results():
+            with pool.connection():
+                yield from range(10)
+
+        rows = results()
+        assert next(rows) == 0
+        rows.close()
+        assert (pool.idle, pool.discarded_count) == (1, 0)
+        connection.close.assert_not_called()
+
+    def test_close(self):
+        """Test that closing the pool closes the idle connections, and the others once checked in."""
+        idle, busy = MagicMock(), MagicMock()
+        pool = ConnectionPool(MagicMock(side_effect=[idle, busy]), max_size=2)
+        first, second = pool.acquire(), pool.acquire()
+        assert (first, second) == (idle, busy)
+        pool.release(first)
+        pool.close()
+        idle.close.assert_called_once()
+        busy.close.assert_not_called()
+        pool.release(busy)
+        busy.close.assert_called_once()
+        with pytest.raises(Exception, match="closed"):
+            pool.acquire()
+
+    def test_datasources_share_the_pool(self, mocker):
+        """Test that datasources borrow connections from the pool of the connector and close them with it, and that
+        the connections held by datasources are opened outside the pool."""
+        mocker.patch.object(APIConnector, '_APIConnector__login', return_value={"access_token": "token"})
+        connect = mocker.patch.object(APIConnector, 'connect_sql', side_effect=lambda sql_transport: sqlite_connect())
+        connector = APIConnector("id", "key", "https://api", "https://auth", None, True, sql_pool_size=2)
+        for name in ["_vertex", "_edge", "cases", "_vertex"]:
+            ds = Datasource(name, name, connector)
+            assert ds.request("SELECT 1 AS one")["one"].tolist() == [1]
+        assert connect.call_count == 1
+        assert connector.sql_pool() is connector.sql_pool("jdbc")
+
+        held = [Datasource("cases", "cases", connector) for _ in range(3)]
+        assert all(ds.cursor is not None for ds in held)
+        assert connect.call_count == 4 and connector.sql_pool().in_use == 0
+        assert Datasource("cases", "cases", connector).request("SELECT 1 AS one")["one"].tolist() == [1]
+        for ds in held:
+            ds.close_ds_connection()
+        assert connector.sql_pool().idle == 1
+
+        pool = connector.sql_pool()
+        connector.close()
+        assert pool.closed and pool.size == 0
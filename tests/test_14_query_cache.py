@@ -0,0 +1,116 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import sqlite3
+from unittest.mock import MagicMock
+import pytest
+import pandas as pd
+from igrafx_mining_sdk.api_connector import APIConnector
+from igrafx_mining_sdk.datasource import Datasource
+from igrafx_mining_sdk.query_cache import QueryCache, normalize_sql
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def frame(size):
+    """Returns a Dataframe of the given number of integers."""
+    return pd.DataFrame({"value": range(size)})
+
+
+class TestQueryCache:
+    """Tests for the cache of the results of the SQL requests."""
+
+    def test_normalize_sql(self):
+        """Test that the layout and the comments of a request do not change its key, unlike its quoted values."""
+        assert normalize_sql("SELECT  a,\n b -- the b\nFROM \"t  1\" /* c */ WHERE s = 'x  y' ;") == \
+            "SELECT a, b FROM \"t  1\" WHERE s = 'x  y'"
+        assert QueryCache.key("ds", "SELECT 1") == QueryCache.key("ds", " SELECT\t1;")
+        assert QueryCache.key("ds", "SELECT 1") != QueryCache.key("other", "SELECT 1")
+        assert QueryCache.is_cacheable("  select * from t") and not QueryCache.is_cacheable("DELETE FROM t")
+
+    def test_lru_and_ttl(self):
+        """Test that the least recently used results are evicted first, and that results expire."""
+        clock = FakeClock()
+        size = int(frame(100).memory_usage(deep=True).sum())
+        cache = QueryCache(max_bytes=2 * size, ttl=60, clock=clock)
+        cache.put("a", frame(100))
+        cache.put("b", frame(100))
+        assert cache.get("a") is not None  # a is now more recently used than b
+        cache.put("c", frame(100))
+        assert cache.get("b") is None and cache.get("a") is not None and cache.get("c") is not None
+        assert cache.evictions == 1
+
+        result = cache.get("a")
+        result["value"] = 0  # The cached result is not changed by the caller
+        assert cache.get("a")["value"].sum() == sum(range(100))
+        clock.now += 61
+        assert cache.get("a") is None
+        assert cache.stats()["entries"] == 1
+
+    def test_data_version(self):
+        """Test that a change of the data version drops the cached results."""
+        data_version = MagicMock(return_value=1)
+        cache = QueryCache(data_version=data_version)
+        cache.put("a", frame(10))
+        assert cache.get("a") is not None
+        data_version.return_value = 2
+        assert cache.get("a") is None
+        data_version.side_effect = Exception("unreachable")
+        cache.put("b", frame(10))
+        assert cache.get("b") is None
+
+    def test_connector_data_version(self, mocker):
+        """Test that a cache given to a connector checks the data version through its watcher."""
+        mocker.patch.object(APIConnector, '_APIConnector__login', return_value={"access_token": "token"})
+        fetch = mocker.patch.object(APIConnector, '_APIConnector__fetch_data_version', return_value=1)
+        clock = FakeClock()
+        cache = QueryCache()
+        connector = APIConnector("id", "key", "https://api", "https://auth", None, True, query_cache=cache,
+                                 data_version_check_interval=5.0, clock=clock)
+        assert cache.data_version == connector.data_version_watcher.current
+        cache.put("a", frame(10))
+        for _ in range(3):
+            assert cache.get("a") is not None
+        assert fetch.call_count == 1
+        clock.now += 10
+        fetch.return_value = 2
+        assert cache.get("a") is None and fetch.call_count == 2
+
+    def test_disk(self, tmp_path):
+        """Test that the results stored on disk are served by another cache, with their dtypes."""
+        pytest.importorskip("pyarrow")
+        clock = FakeClock()
+        result = pd.DataFrame({"id": pd.array(["a", None], dtype="string"), "n": pd.array([1, None], dtype="Int64")})
+        QueryCache(directory=tmp_path, clock=clock, data_version=lambda: 3).put("a", result)
+        cache = QueryCache(directory=tmp_path, clock=clock, data_version=lambda: 3)
+        pd.testing.assert_frame_equal(cache.get("a"), result)
+        assert QueryCache(directory=tmp_path, clock=clock, data_version=lambda: 4).get("a") is None
+        assert list(tmp_path.glob("*.parquet")) == []
+
+        QueryCache(directory=tmp_path).put("a", frame(1000))
+        size = next(tmp_path.glob("*.parquet")).stat().st_size
+        cache = QueryCache(directory=tmp_path, max_disk_bytes=int(size * 1.5))
+        cache.put("b", frame(1000))
+        assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+    def test_datasource(self):
+        """Test that a datasource serves repeated read requests from the cache of the workgroup."""
+        connection = sqlite3.connect(":memory:")
+        connection.execute("CREATE TABLE cases (id TEXT)")
+        connection.executemany("INSERT INTO cases VALUES (?)", [("a",), ("b",)])
+        cache = QueryCache()
+        ds = Datasource("cases", "cases", MagicMock(query_cache=cache))
+        ds._connection = connection
+        assert ds.request("SELECT DISTINCT id FROM cases")["id"].tolist() == ["a", "b"]
+        connection.execute("INSERT INTO cases VALUES ('c')")
+        assert ds.request("SELECT DISTINCT id\nFROM cases")["id"].tolist() == ["a", "b"]
+        assert ds.request("SELECT DISTINCT id FROM cases", use_cache=False)["id"].tolist() == ["a", "b", "c"]
+        assert len(ds.request("SELECT DISTINCT id FROM cases", dtype_backend="numpy_nullable")) == 3
+        assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,92 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import json
+import os
+from pathlib import Path
+from unittest.mock import MagicMock
+from igrafx_mining_sdk.data_version import DataVersionWatcher
+from igrafx_mining_sdk.graph import GraphInstance
+from igrafx_mining_sdk.graph_cache import GraphCache, main
+from igrafx_mining_sdk.project import Project
+
+with open(Path(__file__).resolve().parent / 'data' / 'graphs' / 'graph_with_invalid_edges.json') as f:
+    GRAPH_INSTANCE = json.load(f)
+
+
+class TestGraphCache:
+    """Tests for the cache on disk of the graphs and graph instances."""
+
+    def test_get_put(self, tmp_path):
+        """Test that an entry is read back by another cache, but not with another data version."""
+        key = GraphCache.key("p1", "graph_instance", "v1", process_key="case 1")
+        GraphCache(tmp_path).put(key, GRAPH_INSTANCE)
+        cache = GraphCache(tmp_path)
+        assert cache.get(key) == GRAPH_INSTANCE
+        assert cache.get(GraphCache.key("p1", "graph_instance", "v2", process_key="case 1")) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        with open(cache.path(key), "wb") as f:
+            f.write(b"not gzip")
+        assert cache.get(key) is None
+        assert not os.path.exists(cache.path(key))
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entries are evicted beyond max_bytes."""
+        keys = [GraphCache.key("p1", "graph_instance", "v1", process_key=str(i)) for i in range(3)]
+        cache = GraphCache(tmp_path)
+        cache.put(keys[0], GRAPH_INSTANCE)
+        size = os.path.getsize(cache.path(keys[0]))
+        cache = GraphCache(tmp_path, max_bytes=int(size * 2.5))
+        cache.put(keys[1], GRAPH_INSTANCE)
+        os.utime(cache.path(keys[1]), (1, 1))
+        os.utime(cache.path(keys[0]), (2, 2))  # keys[0] was used after keys[1]
+        cache.put(keys[2], GRAPH_INSTANCE)
+        assert [cache.get(key) is not None for key in keys] == [True, False, True]
+        assert cache.evictions == 1 and cache.stats()["entries"] == 2
+
+        assert cache.prune(project_id="other") == 0
+        assert cache.prune(project_id="p1") == 2
+
+    def test_cli(self, tmp_path, capsys):
+        """Test that the command line lists and prunes the entries."""
+        cache = GraphCache(tmp_path)
+        cache.put(GraphCache.key("p1", "graph", "v1", mode="simplified"), {"nodes": []})
+        cache.put(GraphCache.key("p2", "graph_instance", "v1", process_key="case 1"), GRAPH_INSTANCE)
+        main(["--directory", str(tmp_path), "stats"])
+        assert capsys.readouterr().out.startswith("2 entries")
+        main(["--directory", str(tmp_path), "list", "--project", "p2"])
+        output = capsys.readouterr().out
+        assert "case 1" in output and "p1" not in output
+        main(["--directory", str(tmp_path), "prune", "--project", "p1"])
+        assert capsys.readouterr().out == "Removed 1 entries\n"
+        main(["--directory", str(tmp_path), "clear"])
+        assert cache.stats()["entries"] == 0
+
+    def test_project(self, tmp_path):
+        """Test that a new process reads the graph instances from the cache until the data version changes."""
+        data = {"version": 1, "files": [{"id": "a", "status": "DONE"}]}
+
+        def get_request(route, params=None):
+            body = GRAPH_INSTANCE if route.endswith("/graphInstance") else {"files": data["files"]}
+            return MagicMock(status_code=200, json=MagicMock(return_value=body))
+
+        def connector():
+            return MagicMock(get_request=MagicMock(side_effect=get_request), graph_cache=GraphCache(tmp_path),
+                             data_version_watcher=DataVersionWatcher(lambda: data["version"], check_interval=0))
+
+        first = connector()
+        assert isinstance(Project("p1", first).graph_instance_from_key("case 1"), GraphInstance)
+        second = connector()
+        assert isinstance(Project("p1", second).graph_instance_from_key("case 1"), GraphInstance)
+        assert [c.args[0] for c in second.get_request.call_args_list] == ["/projects/p1/files"]
+
+        data["version"] = 2
+        data["files"] = [{"id": "b", "status": "DONE"}]
+        third = connector()
+        Project("p1", third).graph_instance_from_key("case 1")
+        assert third.get_request.call_args_list[-1].args[0] == "/project/p1/graphInstance"
+
+        data["version"] = 3  # A change without a new file, such as a new column mapping or a reset
+        fourth = connector()
+        Project("p1", fourth).graph_instance_from_key("case 1")
+        assert fourth.get_request.call_args_list[-1].args[0] == "/project/p1/graphInstance"
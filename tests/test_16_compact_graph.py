@@ -0,0 +1,70 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+import pytest
+from igrafx_mining_sdk.compact_graph import CompactGraph, CompactGraphInstance, StringPool
+from igrafx_mining_sdk.graph import Graph, GraphInstance
+from igrafx_mining_sdk.project import Project
+
+DATA = Path(__file__).resolve().parent / 'data' / 'graphs'
+
+
+class TestCompactGraph:
+    """Tests for the graphs stored in arrays."""
+
+    @pytest.mark.parametrize("graph_class, compact_class, file_name", [
+        (Graph, CompactGraph, 'graph.json'),
+        (GraphInstance, CompactGraphInstance, 'graph_with_invalid_edges.json')])
+    def test_same_graph(self, graph_class, compact_class, file_name):
+        """Test that a compact graph has the nodes, edges and attributes of the networkx graph."""
+        graph = graph_class.from_json("p", str(DATA / file_name))
+        compact = compact_class.from_json("p", str(DATA / file_name))
+        assert (compact.number_of_nodes(), compact.number_of_edges()) == (len(graph), graph.number_of_edges())
+        assert compact.edge_list() == list(graph.edges())
+        for node in graph:
+            assert compact.node_attributes(node) == graph.nodes[node]
+            assert list(compact.successors(node)) == list(graph.successors(node))
+            assert sorted(compact.predecessors(node)) == sorted(graph.predecessors(node))
+        source, destination = next(iter(graph.edges()))
+        assert compact.has_edge(source, destination) and not compact.has_edge(destination, "unknown")
+        assert compact.edge_attributes(source, destination) == graph.edges[source, destination]
+
+        networkx_graph = compact.to_networkx()
+        assert isinstance(networkx_graph, graph_class) and networkx_graph is compact.to_networkx()
+        assert list(networkx_graph.nodes(data=True)) == list(graph.nodes(data=True))
+        assert list(networkx_graph.edges(data=True)) == list(graph.edges(data=True))
+        assert dict(compact.in_degree) == dict(graph.in_degree)  # Taken from the networkx graph
+
+    def test_columns(self):
+        """Test that attributes missing from some nodes or of several types are kept as they are."""
+        pool = StringPool()
+        nodes = [("a", {"name": "A", "count": 1, "rate": 0.5, "done": True}),
+                 ("b", {"name": "B", "rate": 2, "tags": ["x"]}),
+                 ("a", {"extra": None})]
+        compact = CompactGraph("p", nodes, [("a", "b"), ("b", "c"), ("a", "b")], pool=pool)
+        assert compact.node_attributes("a") == {"name": "A", "count": 1, "rate": 0.5, "done": True, "extra": None}
+        assert compact.node_attributes("b") == {"name": "B", "rate": 2.0, "tags": ["x"]}
+        assert compact.node_attributes("c") == {}
+        assert compact.number_of_edges() == 2 and list(compact) == ["a", "b", "c"]
+        assert len(pool) == 5  # a, b, c, A and B
+
+    def test_pools(self):
+        """Test that each compact graph has its own StringPool unless one is given."""
+        first, second = CompactGraph("p", [("a", {"name": "A"})], []), CompactGraph("p", [("a", {"name": "A"})], [])
+        assert first.pool is not second.pool and len(first.pool) == 2
+        pool = StringPool()
+        third = CompactGraph("p", [("a", {"name": "A"})], [], pool=pool)
+        fourth = CompactGraph("p", [("a", {"name": "B"})], [], pool=pool)
+        assert third.pool is fourth.pool is pool and len(pool) == 3
+
+    def test_project_backend(self):
+        """Test that the projects of a workgroup with the compact backend return compact graph instances."""
+        with open(DATA / 'graph_with_invalid_edges.json') as f:
+            payload = json.load(f)
+        api_connector = MagicMock(graph_backend="compact")
+        api_connector.get_request.return_value.json.return_value = payload
+        graph_instance = Project("p", api_connector).graph_instance_from_key("case 1")
+        assert isinstance(graph_instance, CompactGraphInstance)
+        assert graph_instance.rework_total == payload["reworkTotal"]
@@ -0,0 +1,91 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import random
+from collections import Counter, defaultdict
+from unittest.mock import MagicMock
+import numpy as np
+import pytest
+from igrafx_mining_sdk.aggregation import AggregatedGraph, GraphAggregator, aggregate_graph_instances
+from igrafx_mining_sdk.compact_graph import CompactGraphInstance
+from igrafx_mining_sdk.graph import GraphInstance
+from igrafx_mining_sdk.project import Project
+
+
+def graph_instances(count, graph_class=GraphInstance, rework=True):
+    """Returns graph instances of random cases going through five activities, with a time in milliseconds.
+    Without rework, each event is a node of its own."""
+    rng = random.Random(0)
+    result = []
+    for _ in range(count):
+        events = [rng.choice("ABCDE") for _ in range(rng.randint(2, 8))]
+        time = 0
+        nodes = []
+        for i, name in enumerate(events):
+            time += rng.randint(1, 100000)
+            node_id = name if rework else f"{name}{i}"
+            nodes.append((node_id, {"id": node_id, "name": name, "eventInstance": i, "time": time}))
+        node_ids = [node_id for node_id, _ in nodes]
+        result.append(graph_class("p", nodes, list(zip(node_ids, node_ids[1:])), len(events) - len(set(events)),
+                                  rng.random()))
+    return result
+
+
+class TestAggregation:
+    """Tests for the aggregation of graph instances."""
+
+    def test_counts(self):
+        """Test that the frequencies and the rework and concurrency statistics are those counted one by one."""
+        instances = graph_instances(500)
+        aggregated = aggregate_graph_instances(iter(instances + [None]), "p")
+        assert isinstance(aggregated, AggregatedGraph) and aggregated.instance_count == 500
+        nodes = Counter(node for gi in instances for node in gi)
+        edges = Counter(edge for gi in instances for edge in gi.edges)
+        assert {node: frequency for node, frequency in aggregated.nodes(data="frequency")} == nodes
+        assert {(u, v): frequency for u, v, frequency in aggregated.edges(data="frequency")} == edges
+        assert aggregated.nodes["A"]["name"] == "A" and "duration_p50" not in aggregated.edges["A", "B"]
+        assert aggregated.rework_total == sum(gi.rework_total for gi in instances)
+        assert aggregated.rework_instance_count == sum(gi.rework_total > 0 for gi in instances)
+        assert aggregated.concurrency_rate_mean == pytest.approx(np.mean([gi.concurrency_rate for gi in instances]))
+        assert aggregated.concurrency_rate_max == max(gi.concurrency_rate for gi in instances)
+
+    def test_durations(self):
+        """Test that the duration percentiles are estimated within their histogram bin, in small batches."""
+        instances = graph_instances(2000, rework=False)
+        durations = defaultdict(list)
+        for gi in instances:
+            for u, v in gi.edges:
+                durations[u, v].append(gi.nodes[v]["time"] - gi.nodes[u]["time"])
+        aggregator = GraphAggregator("p", time_attribute="time", percentiles=(10, 50, 90), batch_size=100)
+        aggregated = aggregator.update(instances).graph()
+        for (u, v), values in durations.items():
+            attributes = aggregated.edges[u, v]
+            assert attributes["duration_count"] == len(values)
+            assert (attributes["duration_min"], attributes["duration_max"]) == (min(values), max(values))
+            assert attributes["duration_mean"] == pytest.approx(np.mean(values))
+            values = sorted(values)
+            for percentile in (10, 50, 90):
+                # The estimate is in the bin of the value of its rank, the bins being 26% wider at each step
+                rank = max(int(np.ceil(percentile / 100 * len(values))) - 1, 0)
+                assert values[rank] / 1.26 - 1 <= attributes[f"duration_p{percentile}"] <= values[rank] * 1.26 + 1
+
+    def test_compact_graph_instances(self):
+        """Test that compact graph instances aggregate as the networkx ones."""
+        networkx = aggregate_graph_instances(graph_instances(200), "p", time_attribute="time")
+        compact = aggregate_graph_instances(graph_instances(200, CompactGraphInstance), "p", time_attribute="time")
+        assert dict(compact.nodes(data=True)) == dict(networkx.nodes(data=True))
+        assert sorted(compact.edges(data=True)) == sorted(networkx.edges(data=True))
+
+    def test_invalid_parameters(self):
+        """Test that invalid duration bins and percentiles are rejected."""
+        with pytest.raises(ValueError):
+            GraphAggregator(duration_bins=[0, 10, 5])
+        with pytest.raises(ValueError):
+            GraphAggregator(percentiles=(50, 101))
+
+    def test_project(self):
+        """Test that a project aggregates its graph instances as they are streamed."""
+        project = Project("p", MagicMock())
+        project.iter_graph_instances = MagicMock(return_value=iter(graph_instances(50)))
+        aggregated = project.aggregate_graph_instances(limit=50, max_workers=4, time_attribute="time")
+        assert aggregated.instance_count == 50 and aggregated.project_id == "p"
+        assert project.iter_graph_instances.call_args.kwargs["max_workers"] == 4
@@ -0,0 +1,75 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+import random
+from pathlib import Path
+import networkx as nx
+from igrafx_mining_sdk.graph import Graph
+
+DATA = Path(__file__).resolve().parent / 'data' / 'graphs'
+
+
+def random_graph(size=40, seed=0):
+    """Returns a random graph of activities, with loops and a few nodes sharing an activity name"""
+    rng = random.Random(seed)
+    nodes = [(i, {"id": i, "name": f"Activity {i % (size - 5)}"}) for i in range(size)]
+    edges = {(rng.randrange(size), rng.randrange(size)) for _ in range(size * 2)}
+    return Graph("p", nodes, sorted(edges))
+
+
+class TestGraphIndex:
+    """Tests for the precomputed indexes of graphs."""
+
+    def test_same_as_networkx(self):
+        """Test that the index answers as the networkx algorithms."""
+        graph = random_graph()
+        index = graph.index()
+        order = {node: i for i, node in enumerate(index.topological_order())}
+        assert sorted(order) == sorted(graph)
+        for source, target in graph.edges:
+            assert index.component(source) <= index.component(target)
+            if index.component(source) < index.component(target):
+                assert order[source] < order[target]
+        loops = [component for component in nx.strongly_connected_components(graph)
+                 if len(component) > 1 or graph.has_edge(*[next(iter(component))] * 2)]
+        assert sorted(map(sorted, index.loops())) == sorted(map(sorted, loops))
+        for source in graph:
+            assert index.descendants(source) == nx.descendants(graph, source)
+            assert index.in_loop(source) == any(source in loop for loop in loops)
+            for target in graph:
+                if source == target:
+                    continue
+                assert index.is_reachable(source, target) == nx.has_path(graph, source, target)
+                path = index.shortest_path(source, target)
+                if path is None:
+                    assert not nx.has_path(graph, source, target)
+                else:
+                    assert path[0] == source and path[-1] == target and nx.is_path(graph, path)
+                    assert len(path) - 1 == nx.shortest_path_length(graph, source, target)
+        assert index.nodes_named("Activity 0") == (0, 35) and index.nodes_named("Unknown") == ()
+
+    def test_most_frequent_paths(self):
+        """Test that the paths are ordered by the product of the probabilities of their edges."""
+        graph = Graph("p", [], [("S", "A", {"frequency": 90}), ("S", "B", {"frequency": 10}),
+                                ("A", "E", {"frequency": 30}), ("A", "B", {"frequency": 60}),
+                                ("B", "E", {"frequency": 70}), ("B", "S", {"frequency": 0})])
+        index = graph.index()
+        assert index.most_frequent_paths("S", "E", k=2) == [["S", "A", "B", "E"], ["S", "A", "E"]]
+        assert index.most_frequent_paths("S", "E", k=5) == [["S", "A", "B", "E"], ["S", "A", "E"], ["S", "B", "E"]]
+        assert index.most_frequent_paths("E", "S") == []
+        assert index.most_frequent_paths("S", "E", k=1, weight="unknown") == [["S", "A", "E"]]
+
+    def test_invalidated_on_change(self):
+        """Test that the index is kept with the graph and built again once the graph changed."""
+        graph = Graph.from_json("p", str(DATA / 'graph.json'))
+        index = graph.index()
+        assert graph.index() is index
+        start, end = index.nodes_named("START")[0], index.nodes_named("END")[0]
+        assert not index.is_reachable(end, start)
+        graph.add_edge(end, start)
+        assert graph.index() is not index and graph.index().is_reachable(end, start)
+        index = graph.index()
+        graph.remove_edges_from([(end, start)])
+        assert not graph.index().is_reachable(end, start)
+        index = graph.index()
+        graph.invalidate_index()
+        assert graph.index() is not index
@@ -0,0 +1,84 @@
+# MIT License, Copyright 2023 iGrafx
+# https://github.com/igrafx/mining-python-sdk/blob/dev/LICENSE
+from pathlib import Path
+import pytest
+from igrafx_mining_sdk.compact_graph import CompactGraphInstance
+from igrafx_mining_sdk.graph import Graph, GraphInstance
+from igrafx_mining_sdk.serialization import GraphFile, dump_graphs, dumps_graphs, load_graphs, loads_graphs
+
+DATA = Path(__file__).resolve().parent / 'data' / 'graphs'
+
+
+def assert_same_graph(graph, other):
+    """Asserts that two graphs have the same type, nodes, edges and attributes, in the same order"""
+    assert type(other) is type(graph) and other.project_id == graph.project_id
+    assert list(other.nodes(data=True)) == list(graph.nodes(data=True))
+    assert list(other.edges(data=True)) == list(graph.edges(data=True))
+    if isinstance(graph, GraphInstance):
+        assert (other.rework_total, other.concurrency_rate) == (graph.rework_total, graph.concurrency_rate)
+
+
+class TestSerialization:
+    """Tests for the binary format of graphs and graph instances."""
+
+    @pytest.mark.parametrize("compression", [None, "zlib"])
+    def test_round_trip(self, compression):
+        """Test that graphs and graph instances are read back as they were written."""
+        graph = Graph.from_json("p", str(DATA / 'graph.json'))
+        graph_instance = GraphInstance.from_json("p", str(DATA / 'graph_with_invalid_edges.json'))
+        mixed = GraphInstance("q", [("a", {"name": "A", "count": 1, "rate": 0.5, "done": True, "tags": ["x"]}),
+                                    ("b", {"name": "B", "rate": 2, "label": "é\U0001F600", "none": None}),
+                                    (3, {"count": 2 ** 40})], [("a", "b"), ("b", 3), (3, "a")], 2, 0.25)
+        graphs = [graph, graph_instance, mixed, Graph("p", (), ())] * 3
+        loaded = loads_graphs(dumps_graphs(graphs, compression=compression))
+        assert len(loaded) == len(graphs)
+        for original, other in zip(graphs, loaded):
+            assert_same_graph(original, other)
+        assert type(loaded[2].nodes["b"]["rate"]) is int  # Integers mixed with numbers are not turned into floats
+        assert loaded[2].nodes["a"]["tags"] is not loaded[6].nodes["a"]["tags"]
+
+    def test_file(self, tmp_path):
+        """Test that a file is read through a memory map, all at once or graph by graph."""
+        graph_instance = GraphInstance.from_json("p", str(DATA / 'graph_with_invalid_edges.json'))
+        compact = CompactGraphInstance("p", [("a", {"name": "A"}), ("b", {"name": "B"})], [("a", "b")], 0, 0.0)
+        graphs = [GraphInstance("p", [(i, {"name": f"Activity {i}"})], [], i, 0.0) for i in range(2500)]
+        graphs[1000] = graph_instance
+        path = tmp_path / "graphs.bin"
+        dump_graphs(graphs + [compact], path, compression=None)
+        with GraphFile(path) as graph_file:
+            assert len(graph_file) == 2501
+            assert_same_graph(graph_instance, graph_file[1000])
+            assert_same_graph(compact.to_networkx(), graph_file[-1])
+            assert graph_file[7].nodes[7] == {"name": "Activity 7"}
+            with pytest.raises(IndexError):
+                graph_file[2501]
+        loaded = load_graphs(path)
+        for original, other in zip(graphs, loaded):
+            assert_same_graph(original, other)
+
+    def test_invalid(self, tmp_path):
+        """Test that other files, newer versions and unknown compressions are rejected."""
+        data = bytearray(dumps_graphs([Graph("p", [("a", {})], [])]))
+        with pytest.raises(ValueError):
+            loads_graphs(b"not a graph file")
+        data[8] = 2  # The format version
+        with pytest.raises(ValueError, match="version 2"):
+            loads_graphs(bytes(data))
+        with pytest.raises(ValueError):
+            dumps_graphs([], compression="lz4")
+        with pytest.raises(ValueError):
+            dumps_graphs([Graph("p", [(("a", 1), {})], [])])
+
+    def test_to_json(self, tmp_path):
+        """Test that graphs and graph instances are written as the JSON of the API and read back from it."""
+        graph = Graph.from_json("p", str(DATA / 'graph.json'))
+        graph.to_json(tmp_path / "graph.json")
+        assert_same_graph(graph, Graph.from_json("p", tmp_path / "graph.json"))
+        graph_instance = GraphInstance("p", [("a", {"id": "a", "name": "A", "eventInstance": 0}), ("b", {"name": "B"})],
+                                       [("a", "b")], 1, 0.5)
+        jgraph = graph_instance.to_dict()
+        assert jgraph["edgeInstances"] == [{"source": {"id": "a", "name": "A", "eventInstance": 0},
+                                            "destination": {"id": "b", "name": "B"}}]
+        other = GraphInstance.from_dict("p", jgraph)
+        assert list(other.edges) == [("a", "b")] and other.nodes["b"] == {"name": "B", "id": "b"}
+        assert (other.rework_total, other.concurrency_rate) == (1, 0.5)